@@ -1,7 +1,7 @@
 import os
 import numpy as np
 import pandas as pd
-from welib.BEM.steadyBEM import SteadyBEM, FASTFile2SteadyBEM
+from welib.BEM.steadyBEM import SteadyBEMBatch, FASTFile2SteadyBEM
 import matplotlib.pyplot as plt
 
 MyDir=os.path.dirname(__file__)
@@ -28,27 +28,16 @@ def main(test=False,extra=False):
     tilt = 6; # TODO
     V0=V0*np.cos(tilt*np.pi/180)
 
-    CP=np.zeros((len(vlambda),len(vpitch)))
-    CT=np.zeros((len(vlambda),len(vpitch)))
-
-    i=0
-    ntot=len(vlambda)*len(vpitch)
-    for il,lambd in enumerate(vlambda):
-        for ip,pitch in enumerate(vpitch):
-            i+=1
-            Omega=lambd*V0/R * 60/(2*np.pi)
-            xdot=0      #[m/s]
-            u_turb=0    #[m/s]
-            a0,ap0 = None, None
-            BEM=SteadyBEM(Omega,pitch,V0,xdot,u_turb,
-                        nB,cone,r,chord,twist,polars,
-                        rho=rho,bTIDrag=True,bAIDrag=True,
-                        a_init =a0, ap_init=ap0
-                        )
-            a0,ap0 = BEM.a, BEM.aprime
-            print('{:5d}/{:d} lambda={:4.2f} pitch={:4.0f} CP={:5.3f}'.format(i,ntot,lambd,pitch,BEM.CP))
-            CP[il,ip]=BEM.CP
-            CT[il,ip]=BEM.CT
+    # --- Running all operating points at once
+    LAMBDA, PITCH = np.meshgrid(vlambda, vpitch, indexing='ij')
+    Omega  = LAMBDA.flatten()*V0/R * 60/(2*np.pi)
+    xdot   = 0      #[m/s]
+    u_turb = 0      #[m/s]
+    BEM=SteadyBEMBatch(Omega,PITCH.flatten(),V0,xdot,u_turb,
+                nB,cone,r,chord,twist,polars,
+                rho=rho,bTIDrag=True,bAIDrag=True)
+    CP=BEM.CP.reshape(LAMBDA.shape)
+    CT=BEM.CT.reshape(LAMBDA.shape)
     CP[CP<0]=0
     CT[CT<0]=0
 
@@ -9,13 +9,14 @@ from numpy import pi, cos, exp, sqrt, sin, arctan2, arccos
 from scipy.interpolate import interp1d
 import pandas as pd
 import matplotlib.pyplot as plt
+from welib.airfoils.Polar import PolarTable
 
 
 def _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag=True, bTIDrag=True):
     """Tabulated airfoil data interpolation
         Inputs
         ----------
-        Polars: interpolant function for each alpha
+        Polars: interpolant function for each alpha, or PolarTable
         alpha: Angle Of Attack [rad]
         phi  : flow angle  [rad]
 
@@ -28,9 +29,14 @@ def _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag=True, bTIDrag=True):
     alpha[alpha> pi] -= 2*pi
     Cl = np.zeros(alpha.shape)
     Cd = np.zeros(alpha.shape)
-    for i,(fPolar,alph) in enumerate(zip(fPolars,alpha)):
-        ClCdCm = fPolar(alph)
-        Cl[i], Cd[i] = ClCdCm[0], ClCdCm[1]
+    # NOTE: last dimension of alpha is the radial dimension (alpha can be of shape nr or nOP x nr)
+    if isinstance(fPolars, PolarTable):
+        ClCdCm = fPolars(alpha)
+        Cl[...], Cd[...] = ClCdCm[...,0], ClCdCm[...,1]
+    else:
+        for i,fPolar in enumerate(fPolars):
+            ClCdCm = fPolar(alpha[...,i])
+            Cl[...,i], Cd[...,i] = ClCdCm[...,0], ClCdCm[...,1]
     # --- Normal and tangential
     cn = Cl * cos(phi) + Cd * sin(phi)
     ct = Cl * sin(phi) - Cd * cos(phi)
@@ -135,7 +141,7 @@ def SteadyBEM(Omega,pitch,V0,xdot,u_turb,
         cone  [deg]:
         r     [m]  : from rhub to R
         chord [m]  :
-        polars     : nSpan matrices  
+        polars     : nSpan matrices, or PolarTable
 
         Outputs
         ----------
@@ -156,7 +162,10 @@ def SteadyBEM(Omega,pitch,V0,xdot,u_turb,
     sigma    = chord * nB / (2.0 * pi * r * cCone)
     lambda_r = Omega * r * cCone/ V0
     # Creating interpolation functions for each polar, now in rad!
-    fPolars = [interp1d(p[:,0]*pi/180,p[:,1:],axis=0) for p in polars]
+    if isinstance(polars, PolarTable):
+        fPolars = polars
+    else:
+        fPolars = [interp1d(p[:,0]*pi/180,p[:,1:],axis=0) for p in polars]
     # Initializing outputs
     if a_init is None:
         a_init = np.ones((len(r)))*0.2
@@ -263,6 +272,165 @@ def SteadyBEM(Omega,pitch,V0,xdot,u_turb,
     return BEM
 
 
+class SteadyBEMBatch_Outputs:
+    def toDataFrame(BEM):
+        """ Integrated values for each operating point """
+        df = pd.DataFrame()
+        df['WS_[m/s]']         = BEM.V0
+        df['RotSpeed_[rpm]']   = BEM.Omega *60/(2*np.pi)
+        df['Pitch_[deg]']      = BEM.Pitch
+        df['AeroThurst_[kN]']  = BEM.Thrust/1000
+        df['AeroTorque_[kNm]'] = BEM.Torque/1000
+        df['AeroPower_[kW]']   = BEM.Power/1000
+        df['AeroCP_[-]']       = BEM.CP
+        df['AeroCT_[-]']       = BEM.CT
+        df['AeroCQ_[-]']       = BEM.CQ
+        df['AeroFlap_[kNm]']   = BEM.Flap/1000
+        df['AeroEdge_[kNm]']   = BEM.Edge/1000
+        df['nIt_[-]']          = BEM.nIt
+        return df
+
+def SteadyBEMBatch(Omega,pitch,V0,xdot,u_turb,
+        nB, cone, r, chord, twist, polars, # Rotor
+        rho=1.225,KinVisc=15.68*10**-6,    # Environment
+        nItMax=100, aTol=10**-6, bTipLoss=True, bHubLoss=False, bAIDrag=True, bTIDrag=True, bSwirl=True, relaxation=0.4, a_init=None, ap_init=None):
+    """ Run the BEM main loop for a set of operating points simultaneously.
+        The algorithm is the same as `SteadyBEM`, but all operating points are iterated
+        at once as one (nOP x nr) array problem. Operating points that have converged are
+        removed from the iterations.
+
+        Inputs:
+        -------
+        Omega [rpm]: array of length nOP (or scalar)
+        pitch [deg]: array of length nOP (or scalar)
+        V0    [m/s]: array of length nOP (or scalar)
+        xdot  [m/s]: array of length nOP (or scalar)
+        u_turb[m/s]: array of length nOP (or scalar)
+        twist [deg]:
+        cone  [deg]:
+        r     [m]  : from rhub to R
+        chord [m]  :
+        polars     : nSpan matrices, or PolarTable
+        a_init, ap_init: initial inductions, arrays of shape nr or nOP x nr
+
+        Outputs
+        ----------
+        BEM : class with attributes, such as BEM.a (nOP x nr), BEM.Power (nOP)
+    """
+    Omega, pitch, V0, xdot, u_turb = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in (Omega, pitch, V0, xdot, u_turb)])
+    nOP = len(V0)
+    nr  = len(r)
+    # --- Converting units
+    fulltwist = (twist[None,:]+pitch[:,None]) *pi/180    # [rad]
+    Omega    = Omega*2*pi/60 # [rad/s]
+    # --- Derived params
+    rhub, R  = r[0], r[-1]
+    # Computing a dr, such that sum(dr)=R-rhub
+    dr    = np.diff(r)
+    MidPointAfter = np.concatenate((  r[0:-1]+dr/2 , [R] ))
+    MidPointBefore= np.concatenate(( [r[0]] ,  r[1:]-dr/2))
+    dr    = MidPointAfter-MidPointBefore
+    cCone    = cos(cone*pi/180.)
+    sigma    = chord * nB / (2.0 * pi * r * cCone)
+    lambda_r = Omega[:,None] * r[None,:] * cCone/ V0[:,None]
+    # Creating interpolation functions for each polar, now in rad!
+    if isinstance(polars, PolarTable):
+        fPolars = polars
+    else:
+        fPolars = [interp1d(p[:,0]*pi/180,p[:,1:],axis=0) for p in polars]
+    # Initializing outputs
+    a      = np.zeros((nOP,nr))
+    aprime = np.zeros((nOP,nr))
+    a     [:,:] = 0.2  if a_init  is None else a_init
+    aprime[:,:] = 0.01 if ap_init is None else ap_init
+    phi, Cl, Cd, Un, Ut, Vrel_norm, F = [np.zeros((nOP,nr)) for _ in range(7)]
+    nIt = np.zeros(nOP, dtype=int)
+    # --- Vectorized BEM algorithm, iterating only on the active operating points
+    IA = np.arange(nOP) # Indices of active operating points
+    for i in np.arange(nItMax):
+        # Subset of radial inputs for active operating points
+        a_last, aprime_last = a[IA], aprime[IA]
+        Omg, V, lambda_rA   = Omega[IA,None], V0[IA,None], lambda_r[IA]
+        # --- Step 1: Wind Components
+        UtA = Omg * r * (1. + aprime_last)
+        UnA = V * (1. - a_last) - xdot[IA,None] + u_turb[IA,None]
+        VrelA = np.sqrt(UnA** 2 + UtA** 2)
+        # --- Step 2: Flow Angle
+        phiA = arctan2(UnA, UtA) # flow angle [rad]
+        # --- Tip loss
+        rA   = np.broadcast_to(r, phiA.shape)
+        Ftip = np.ones(phiA.shape)
+        Fhub = np.ones(phiA.shape)
+        IOK=sin(phiA)>0.01
+        if bTipLoss:
+            # Glauert tip correction
+            Ftip[IOK] = 2/pi*arccos(exp(-nB/2*(R-rA[IOK])/(rA[IOK]*sin(phiA[IOK]))))
+        if bHubLoss:
+            # Prandtl hub loss correction
+            Fhub[IOK] = 2/pi*arccos(exp(-nB/2*(rA[IOK]-rhub)/(rhub*sin(phiA[IOK]))))
+        FA=Ftip*Fhub
+        FA[FA<=0]=0.5 # To avoid singularities
+        # --- Step 3: Angle of attack
+        alpha = phiA - fulltwist[IA] # [rad], contains pitch
+        # --- Step 4: Profile Data
+        ClA, CdA, cnForAI, ctForTI = _fAeroCoeffWrap(fPolars, alpha, phiA, bAIDrag, bTIDrag)
+        # --- Step 5: Induction Coefficients
+        aA, aprimeA, _ = _fInductionCoefficients(a_last, VrelA, V, FA, cnForAI, ctForTI,
+                                               lambda_rA, np.broadcast_to(sigma, phiA.shape), phiA, relaxation, bSwirl)
+        # Storing values of active operating points
+        a[IA], aprime[IA] = aA, aprimeA
+        phi[IA], Cl[IA], Cd[IA], Un[IA], Ut[IA], Vrel_norm[IA], F[IA] = phiA, ClA, CdA, UnA, UtA, VrelA, FA
+        nIt[IA] = i + 1
+        # --- Convergence, per operating point
+        if i > 3:
+            err = np.mean(np.abs(aA-a_last),axis=1) + np.mean(np.abs(aprimeA - aprime_last),axis=1)
+            IA = IA[err>=aTol]
+            if len(IA)==0:
+                break
+    if len(IA)>0 and i == nItMax-1:
+        print('Maximum iterations reached for {} operating points'.format(len(IA)))
+    # --------------------------------------------------------------------------------
+    # --- Step 6: Outputs
+    # --------------------------------------------------------------------------------
+    BEM=SteadyBEMBatch_Outputs();
+    BEM.a,BEM.aprime,BEM.phi,BEM.Cl,BEM.Cd,BEM.Un,BEM.Ut,BEM.Vrel,BEM.F,BEM.nIt = a,aprime,phi,Cl,Cd,Un,Ut,Vrel_norm,F,nIt
+    # Radial quantities (recomputed since thought as derived outputs)
+    BEM.cn = BEM.Cl * cos(BEM.phi) + BEM.Cd * sin(BEM.phi)
+    BEM.ct = BEM.Cl * sin(BEM.phi) - BEM.Cd * cos(BEM.phi)
+    BEM.Pn    = 0.5 * rho * BEM.Vrel**2 * chord * BEM.cn   # [N/m]
+    BEM.Pt    = 0.5 * rho * BEM.Vrel**2 * chord * BEM.ct   # [N/m]
+    BEM.alpha = (BEM.phi - fulltwist)*180/pi               # [deg]
+    BEM.phi   = BEM.phi*180/pi                             # [deg]
+    BEM.Re    = BEM.Vrel * chord / KinVisc / 10**6  # Reynolds number in Millions
+    BEM.Gamma = 0.5 * BEM.Vrel * chord * BEM.Cl   # Circulation [m^2/s]
+    # Radial quantities, "dr" formulation
+    BEM.ThrLoc   = dr * BEM.Pn * cCone
+    BEM.ThrLocLn = BEM.Pn * cCone
+    BEM.Ct       = nB * BEM.ThrLoc / (0.5 * rho * V0[:,None]** 2 * (2*pi * r * cCone * dr))
+    BEM.TqLoc    = dr * r * BEM.Pt * cCone
+    BEM.TqLocLn  = r * BEM.Pt * cCone
+    BEM.Cq      = nB * BEM.TqLoc / (0.5 * rho * V0[:,None]** 2 * (2*pi * r * cCone)) * dr * r * cCone
+    BEM.Cp      = BEM.Cq*lambda_r
+    # --- Integral quantities
+    BEM.Torque = nB * np.trapz(r * (BEM.Pt * cCone), r, axis=1)  # Rotor shaft torque [N]
+    BEM.Thrust = nB * np.trapz(     BEM.Pn * cCone, r, axis=1)   # Rotor shaft thrust [N]
+    BEM.Flap   = np.trapz( (BEM.Pn * cCone) * (r - rhub), r, axis=1)      # Flap moment at blade root [Nm]
+    BEM.Edge   = np.trapz(  BEM.Pt * (r * cCone) * (r - rhub), r, axis=1) # Edge moment at blade root [Nm]
+    BEM.Power = Omega * BEM.Torque
+    BEM.CP = BEM.Power  / (0.5 * rho * V0**3 * pi * R**2)
+    BEM.CT = BEM.Thrust / (0.5 * rho * V0**2 * pi * R**2)
+    BEM.CQ = BEM.Torque / (0.5 * rho * V0**2 * pi * R**3)
+    BEM.r=r
+    BEM.R=R
+    BEM.uia    = V0[:,None] * BEM.a
+    BEM.uit    = Omega[:,None] * r * BEM.aprime
+    BEM.u_turb = np.ones((nOP,nr))*u_turb[:,None]
+    BEM.Omega = Omega
+    BEM.Pitch = pitch
+    BEM.V0 = V0
+    return BEM
+
+
 def FASTFile2SteadyBEM(FASTFileName):
     from welib.weio.fast_input_deck import FASTInputDeck
     F = FASTInputDeck(FASTFileName,readlist=['AD','ED','ADbld','AF'])
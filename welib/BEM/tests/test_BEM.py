@@ -34,5 +34,40 @@ class Test(unittest.TestCase):
 
         np.seterr(**old_settings)
 
+    def test_BEM_batch(self):
+        # Batch of operating points should give the same results as individual calls
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        V0    = np.array([5,10,12])
+        Omega = np.array([7,11,12])
+        pitch = np.array([2,0,5])
+        BEMs = SteadyBEMBatch(Omega,pitch,V0,0,0,
+                    nB,cone,r,chord,twist,polars,
+                    rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True)
+        np.testing.assert_almost_equal(BEMs.Power[0] ,445183.13,1)
+        np.testing.assert_almost_equal(BEMs.Thrust[0],140978.66,1)
+        for i in range(len(V0)):
+            BEM=SteadyBEM(Omega[i],pitch[i],V0[i],0,0,
+                        nB,cone,r,chord,twist,polars,
+                        rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True)
+            np.testing.assert_almost_equal(BEMs.Power[i], BEM.Power, 5)
+            np.testing.assert_almost_equal(BEMs.a[i,:]  , BEM.a    , 8)
+            np.testing.assert_equal(BEMs.nIt[i], BEM.nIt)
+        df = BEMs.toDataFrame()
+        self.assertEqual(len(df), 3)
+
+    def test_BEM_polartable(self):
+        # Polars resampled on a common grid give very close results
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        table = PolarTable(polars)
+        BEM=SteadyBEM(7,2,5,0,0,
+                    nB,cone,r,chord,twist,table,
+                    rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True)
+        np.testing.assert_almost_equal(BEM.Power ,445183.13,1)
+        np.testing.assert_almost_equal(BEM.Thrust,140978.66,1)
+        BEMs = SteadyBEMBatch([7,11],[2,0],[5,10],0,0,
+                    nB,cone,r,chord,twist,table,
+                    rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True)
+        np.testing.assert_almost_equal(BEMs.Power[0] ,445183.13,1)
+
 if __name__ == '__main__':
     unittest.main()
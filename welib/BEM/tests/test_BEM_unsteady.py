@@ -162,6 +162,99 @@ class Test(unittest.TestCase):
         #plt.show()
 
 
+    def test_timeStep_buffers(self):
+        # Time steps with preallocated states give the same results as with new states
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        motion = PrescribedRotorMotion()
+        motion.init_from_BEM(BEM, tilt=5, cone=2.5, psi0=0)
+        motion.setType('constantRPM', RPM=10)
+        dt=0.1
+        BEM.timeStepInit(0,1,dt)
+        Vwnd_g = np.zeros((BEM.nB,len(BEM.r),3))
+        Vwnd_g[:,:,0] = 10
+        xd,  xd_buf = BEM.getInitStates(), BEM.getInitStates()
+        xd_ref      = BEM.getInitStates()
+        for it,t in enumerate(BEM.time):
+            motion.update(t)
+            args = (motion.psi, motion.psi_B0, motion.origin_pos_gl, motion.omega_gl, motion.R_b2g, 
+                    motion.R_ntr2g, motion.R_bld2b, motion.pos_gl, motion.vel_gl, motion.R_s2g, motion.R_a2g, Vwnd_g)
+            xd_ref = BEM.timeStep(t, dt, xd_ref, *args, firstCallEquilibrium=it==0)
+            Power = BEM.Power[it]
+            xd_new = BEM.timeStep(t, dt, xd, *args, firstCallEquilibrium=it==0, xd1=xd_buf)
+            xd_buf, xd = xd, xd_new
+            np.testing.assert_almost_equal(BEM.Power[it], Power, 10)
+            np.testing.assert_almost_equal(xd.Vind_g, xd_ref.Vind_g, 10)
+            np.testing.assert_almost_equal(xd.a     , xd_ref.a     , 10)
+
+    def test_hubLoss(self):
+        # Regression test with hub loss, tilt and cone (the hub node, where the hub loss factor is singular, is included)
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        BEM.bHubLoss = True
+        time=np.arange(0,1,0.1)
+        with np.errstate(all='ignore'):
+            df = BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=5, cone=2.5)
+        ref = {
+            'RtAeroFxh_[N]'      : 543157.5695001464,
+            'RtAeroMxh_[N-m]'    : 3383278.769435165,
+            'RtAeroPwr_[W]'      : 3542961.242367943,
+            'AB1N001Phi_[deg]'   : 104.26248819231232,
+            'AB1N001Alpha_[deg]' : 90.79544999947258,
+            'AB1N001AxInd_[-]'   : 0.8220148052629853,
+            'AB2N001Phi_[deg]'   : 69.18398976251711,
+            'AB2N001Alpha_[deg]' : 55.468763405323955,
+            'AB2N001AxInd_[-]'   : 0.809809281401509,
+            'AB3N001Phi_[deg]'   : 0.15576833335183332,
+            'AB3N001Alpha_[deg]' : -12.777864359241299,
+            'AB3N001AxInd_[-]'   : 0.9991503184317613,
+            'AB1N010AxInd_[-]'   : 0.2493563424716968,
+            'AB2N010AxInd_[-]'   : 0.2588467459474186,
+            'AB3N010AxInd_[-]'   : 0.2533182126134573,
+        }
+        for k,v in ref.items():
+            np.testing.assert_allclose(df[k].values[-1], v, rtol=1e-6, err_msg=k)
+
+    def test_output_sinks(self):
+        # Outputs stored with a sink are the same as outputs stored in memory
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time=np.arange(0,2,0.1)
+        df = BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        # Ring buffer with small chunks, decimation, and channel selection
+        BEM.outSink       = RingBufferOutputs(5)
+        BEM.outChunkSize  = 3
+        BEM.outDecimation = 2
+        BEM.outChannels   = ['Time_[s]', 'RtAero*', 'AB1N00[1-3]AxInd']
+        df2 = BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        self.assertEqual(BEM.AxInd.shape[0], 3)
+        self.assertEqual(df2.shape, (5, 10))
+        np.testing.assert_almost_equal(df2['Time_[s]'].values, time[::2][-5:])
+        np.testing.assert_almost_equal(df2.values, df[df2.columns].values[::2][-5:])
+
+    def test_output_sink_interrupted(self):
+        # The sink receives the computed time steps and is closed when the time loop is interrupted
+        class Sink(RingBufferOutputs):
+            nClose = 0
+            def close(self):
+                self.nClose += 1
+        def windFunction(x, y, z, t):
+            if t>1.05:
+                raise Exception('Interrupted')
+            return (np.ones(x.shape)*10, np.zeros(x.shape), np.zeros(x.shape))
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time=np.arange(0,2,0.1)
+        df = BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        BEM.outSink      = Sink()
+        BEM.outChunkSize = 4
+        with self.assertRaises(Exception):
+            BEM.simulationConstantRPM(time, 10, windFunction=windFunction, tilt=0, cone=0)
+        self.assertEqual(BEM.outSink.nClose, 1)
+        df2 = BEM.outSink.toDataFrame()
+        self.assertEqual(len(df2), 11)
+        np.testing.assert_almost_equal(df2.values, df[df2.columns].values[:11])
+
 
 if __name__ == '__main__':
     unittest.main()
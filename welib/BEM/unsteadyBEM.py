@@ -17,6 +17,7 @@ import pandas as pd
 # Load more models
 # try:
 from welib.BEM.highthrust import a_Ct
+from welib.airfoils.Polar import PolarTable
 # except: 
 #     pass
 
@@ -127,6 +128,17 @@ class BEMDiscreteStates:
         # Dynamic stall
         self.fs = np.zeros((nB,nr)) # Separation 
 
+    def copy(self, out=None):
+        """ Copy states, into the preallocated states `out` if provided """
+        if out is None:
+            return copy.deepcopy(self)
+        for k, v in self.__dict__.items():
+            if isinstance(v, np.ndarray) and isinstance(getattr(out, k, None), np.ndarray):
+                getattr(out, k)[...] = v
+            else:
+                setattr(out, k, copy.deepcopy(v))
+        return out
+
 class AeroBEM:
     """ 
     Perform unsteady BEM calculations
@@ -173,6 +185,11 @@ class AeroBEM:
         self.bThicknessInterp = True # interpolate the input tabulated airfoil data for thickness variation
         self.WakeMod=1 # 0: no inductions, 1: BEM inductions
         self.bRoughProfiles = False # use rough profiles for input airfoil data
+        # Output storage
+        self.outSink       = None # None: all time steps stored in memory, otherwise: RingBufferOutputs or ChunkFileOutputs
+        self.outChannels   = None # list of channels (see toDataFrame) passed to the sink, wildcards allowed (e.g. 'RtAero*'). None: all
+        self.outDecimation = 1    # only one every `outDecimation` time step is passed to the sink
+        self.outChunkSize  = 1000 # number of stored time steps kept in memory before being passed to the sink
 
     def init_from_FAST(self, FASTFileName):
         from welib.weio.fast_input_deck import FASTInputDeck
@@ -205,15 +222,33 @@ class AeroBEM:
 
     def _init(self):
         # Creating interpolation functions for each polar, now in rad!
-        self.fPolars = [interp1d(p[:,0]*np.pi/180,p[:,1:],axis=0) for p in self.polars]
+        if isinstance(self.polars, PolarTable):
+            self.fPolars = self.polars
+        else:
+            self.fPolars = [interp1d(p[:,0]*np.pi/180,p[:,1:],axis=0) for p in self.polars]
+
+    def usePolarTable(self, dAlpha=0.1):
+        """ Resample all polars on a shared alpha grid (see PolarTable) for faster lookups"""
+        if not isinstance(self.polars, PolarTable):
+            self.polars = PolarTable(self.polars, dAlpha=dAlpha)
+        self._init()
 
     def getInitStates(self):
         return BEMDiscreteStates(self.nB, len(self.r))
 
     def timeStepInit(self, t0, tmax, dt):
-        """ Allocate storage for tiem step values"""
+        """ Allocate storage for tiem step values
+        If an output sink is used, the storage only contains `outChunkSize` time steps
+        """
         self.time=np.arange(t0,tmax+dt/2,dt)
         nt = len(self.time)
+        self._outOffset = 0 # Number of stored time steps already passed to the sink
+        self._outNRec   = 0 # Number of stored time steps
+        self._outOpened = False
+        self._outClosed = False
+        if self.outSink is not None:
+            nt = int(np.min([self.outChunkSize, np.ceil((nt-1)/self.outDecimation)+1]))
+            self._outTime = np.zeros(nt)
         nB = self.nB
         nr = len(self.r)
         # --- Spanwise data
@@ -278,90 +313,126 @@ class AeroBEM:
 
 
     def calcOutput(self):
-        R = np.sqrt(self.RtArea/pi)
-        q = 0.5*self.rho*self.RtArea*self.RtVAvg[:,0]**2
-        self.CT=self.Thrust/(q)
-        self.CQ=self.Torque/(q*R)
-        self.CP=self.Power /(q*self.RtVAvg[:,0])
+        self.CT, self.CQ, self.CP = self._calcCoeffs(self.Thrust, self.Torque, self.Power, self.RtArea, self.RtVAvg)
 
+    def _calcCoeffs(self, Thrust, Torque, Power, RtArea, RtVAvg):
+        R = np.sqrt(RtArea/pi)
+        q = 0.5*self.rho*RtArea*RtVAvg[:,0]**2
+        return Thrust/(q), Torque/(q*R), Power/(q*RtVAvg[:,0])
 
-    def toDataFrame(self):
-        """ Export time series to a pandas dataframe
+    def _outputChannels(self, time, n=None):
+        """ Returns a dictionary of output channels from the first `n` rows of the storage
         Column names are set to match OpenFAST outputs
         """
-        columns=['Time_[s]']
-        columns+=['Thrust_[N]']
-        columns+=['Torque_[N/m]']
-
-        #if not hasattr(self,'CP'):
-        self.calcOutput()
-
-        df = pd.DataFrame()
-        df['Time_[s]']        = self.time
-        df['Azimuth_[deg]']   = np.mod(self.psi,360)
-        df['RtAeroFxh_[N]']   = self.Thrust
-        df['RtAeroMxh_[N-m]'] = self.Torque
-        df['RtAeroPwr_[W]']   = self.Power
-        df['RtAeroCt_[-]']    = self.CT
-        df['RtAeroCq_[-]']    = self.CQ
-        df['RtAeroCp_[-]']    = self.CP
-
-        df['RtVAvgxh_[m/s]']  = self.RtVAvg[:,0]
-        df['RtVAvgyh_[m/s]']  = self.RtVAvg[:,1]
-        df['RtVAvgzh_[m/s]']  = self.RtVAvg[:,2]
-        df['RtArea_[m^2]']    = self.RtArea
-        df['RtSkew_[deg]']    = self.chi0
+        I = slice(0, n)
+        CT, CQ, CP = self._calcCoeffs(self.Thrust[I], self.Torque[I], self.Power[I], self.RtArea[I], self.RtVAvg[I])
+        nr = len(self.r)
+        ch = {}
+        ch['Time_[s]']        = time
+        ch['Azimuth_[deg]']   = np.mod(self.psi[I],360)
+        ch['RtAeroFxh_[N]']   = self.Thrust[I]
+        ch['RtAeroMxh_[N-m]'] = self.Torque[I]
+        ch['RtAeroPwr_[W]']   = self.Power[I]
+        ch['RtAeroCt_[-]']    = CT
+        ch['RtAeroCq_[-]']    = CQ
+        ch['RtAeroCp_[-]']    = CP
+
+        ch['RtVAvgxh_[m/s]']  = self.RtVAvg[I,0]
+        ch['RtVAvgyh_[m/s]']  = self.RtVAvg[I,1]
+        ch['RtVAvgzh_[m/s]']  = self.RtVAvg[I,2]
+        ch['RtArea_[m^2]']    = self.RtArea[I]
+        ch['RtSkew_[deg]']    = self.chi0[I]
         for iB in np.arange(self.nB):
-            df['B'+str(iB+1)+'Azimuth_[deg]']  = np.mod(self.SkewAzimuth[:,iB],360)
+            ch['B'+str(iB+1)+'Azimuth_[deg]']  = np.mod(self.SkewAzimuth[I,iB],360)
 
-        Vflw_s = self.Vwnd_s-self.Vstr_s
+        Vflw_s = self.Vwnd_s[I]-self.Vstr_s[I]
 
         # AeroDyn x-y is "section coord" s
         # AeroDyn n-t is "airfoil coord" a
         # AeroDyn doesn't have polar coord..
+        # NOTE: AeroDyn "n-t", is almost like xa but y is switched
+        spanChannels = [
+            ('Fx_[N/m]'   ,  self.F_s   [I,:,:,0]),
+            ('Fy_[N/m]'   , -self.F_s   [I,:,:,1]), # NOTE: weird sign
+            ('Vx_[m/s]'   ,  Vflw_s     [:,:,:,0]),
+            ('Vy_[m/s]'   ,  Vflw_s     [:,:,:,1]),
+            ('VDisx_[m/s]',  self.Vwnd_s[I,:,:,0]),
+            ('VDisy_[m/s]',  self.Vwnd_s[I,:,:,1]),
+            ('STVx_[m/s]' ,  self.Vstr_s[I,:,:,0]),
+            ('STVy_[m/s]' ,  self.Vstr_s[I,:,:,1]),
+            ('STVz_[m/s]' ,  self.Vstr_s[I,:,:,2]),
+            ('Vrel_[m/s]' ,  self.Vrel  [I]),
+            ('TnInd_[-]'  ,  self.TnInd [I]),
+            ('AxInd_[-]'  ,  self.AxInd [I]),
+            ('Phi_[deg]'  ,  self.phi   [I]),
+            ('Vindx_[m/s]',  self.Vind_s[I,:,:,0]),
+            ('Vindy_[m/s]',  self.Vind_s[I,:,:,1]),
+            ('Alpha_[deg]',  self.alpha [I]),
+            ('Fn_[N/m]'   ,  self.F_a   [I,:,:,0]),
+            ('Ft_[N/m]'   , -self.F_a   [I,:,:,1]),
+            ('Cl_[-]'     ,  self.Cl    [I]),
+            ('Cd_[-]'     ,  self.Cd    [I]),
+            ]
         for iB in np.arange(self.nB):
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fx_[N/m]'] = self.F_s[:,iB,ir,0]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fy_[N/m]'] =-self.F_s[:,iB,ir,1] # NOTE: weird sign
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vx_[m/s]'] =      Vflw_s[:,iB,ir,0]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vy_[m/s]'] =      Vflw_s[:,iB,ir,1]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'VDisx_[m/s]'] = self.Vwnd_s[:,iB,ir,0]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'VDisy_[m/s]'] = self.Vwnd_s[:,iB,ir,1]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVx_[m/s]'] = self.Vstr_s[:,iB,ir,0]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVy_[m/s]'] = self.Vstr_s[:,iB,ir,1]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVz_[m/s]'] = self.Vstr_s[:,iB,ir,2]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vrel_[m/s]'] = self.Vrel[:,iB,ir]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'TnInd_[-]'] = self.TnInd[:,iB,ir]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'AxInd_[-]'] = self.AxInd[:,iB,ir]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Phi_[deg]'] = self.phi[:,iB,ir]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vindx_[m/s]'] = self.Vind_s[:,iB,ir,0]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vindy_[m/s]'] = self.Vind_s[:,iB,ir,1]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Alpha_[deg]'] = self.alpha[:,iB,ir]
-        # AeroDyn "n-t", is almost like xa but y is switched
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fn_[N/m]'] = self.F_a[:,iB,ir,0]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Ft_[N/m]'] =-self.F_a[:,iB,ir,1]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Cl_[-]'] = self.Cl[:,iB,ir]
-            for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Cd_[-]'] = self.Cd[:,iB,ir]
-        return df
+            for sVar, v in spanChannels:
+                for ir in np.arange(nr):
+                    ch['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+sVar] = v[:,iB,ir]
+        return ch
+
+    def toDataFrame(self):
+        """ Export time series to a pandas dataframe
+        Column names are set to match OpenFAST outputs
+        If an output sink is used, the dataframe is returned by the sink.
+        """
+        if self.outSink is not None:
+            return self.outSink.toDataFrame()
+        #if not hasattr(self,'CP'):
+        self.calcOutput()
+        return pd.DataFrame(self._outputChannels(self.time))
+
+    def _outIndex(self, it):
+        """ Index in the storage where the outputs of time step `it` are written 
+        Time steps that are not stored are written in the slot of the next stored time step.
+        """
+        if self.outSink is None:
+            return it
+        return int(np.ceil(it/self.outDecimation)) - self._outOffset
+
+    def _outUpdate(self, it, t):
+        """ Pass the storage to the output sink when it is full or at the last time step"""
+        if self.outSink is None:
+            return
+        if np.mod(it, self.outDecimation)==0:
+            self._outTime[self._outNRec-self._outOffset] = t
+            self._outNRec += 1
+        bLast = it==len(self.time)-1
+        if self._outNRec-self._outOffset==len(self._outTime):
+            self._outFlush()
+        if bLast:
+            self._outClose()
+
+    def _outFlush(self):
+        """ Pass the stored time steps that were not yet passed to the output sink """
+        n = self._outNRec-self._outOffset
+        if n==0:
+            return
+        ch = self._outputChannels(self._outTime[:n], n)
+        if not self._outOpened:
+            self._outColumns = _selectChannels(list(ch.keys()), self.outChannels)
+            self.outSink.open(self._outColumns)
+            self._outOpened = True
+        self.outSink.write(np.column_stack([ch[c] for c in self._outColumns]))
+        self._outOffset = self._outNRec
+
+    def _outClose(self):
+        """ Pass the remaining stored time steps to the output sink and close it (once).
+        Called at the last time step, or when the time loop is interrupted. """
+        if self.outSink is None or self._outClosed:
+            return
+        self._outClosed = True
+        self._outFlush()
+        if self._outOpened:
+            self.outSink.close()
 
     def toDataFrameRadial(self, it=-1):
         df = pd.DataFrame()
@@ -379,13 +450,16 @@ class AeroBEM:
             R_ntr2g, R_bld2r, # "polar grid to global" for each blade
             pos_gl, Vstr_gl, R_s2g, R_a2g,            # Kinematics of nodes
             Vwnd_gl, # Wind at each positions in global
-            firstCallEquilibrium=False
+            firstCallEquilibrium=False,
+            xd1=None
             ):
         """ 
         xBEM0: BEM states at t-1
+        xd1  : optional preallocated states (e.g. the states of the step before t-1), 
+               updated in place and returned, to avoid allocations at each time step
         """
-        xd1   = copy.deepcopy(xd0)
-        xd1.t = t
+        xd1    = xd0.copy(out=xd1)
+        xd1.t  = t
         xd1.it = xd0.it+1 # Increase time step 
         # Safety
         if xd0.t is not None:
@@ -395,22 +469,20 @@ class AeroBEM:
         # Time step storage for vectorization
         nB, nr, _ = pos_gl.shape
         p = self # alias
-        ### Loop on blades
+        R_p2g = np.asarray(R_ntr2g) # nB x 3 x 3, "polar grid to global" for each blade
+        # Transformations for all blades and nodes, vectors of shape nB x nr x 3
+        p2g = lambda V: np.einsum('bij,brj->bri', R_p2g, V) # polar to global
+        g2p = lambda V: np.einsum('bji,brj->bri', R_p2g, V) # global to polar
+        a2g = lambda V: np.einsum('brij,brj->bri', R_a2g, V) # airfoil to global
+        g2a = lambda V: np.einsum('brji,brj->bri', R_a2g, V) # global to airfoil
+        g2s = lambda V: np.einsum('brji,brj->bri', R_s2g, V) # global to section
         # --------------------------------------------------------------------------------
         # --- Step 0: geometry 
         # --------------------------------------------------------------------------------
         # --- Compute rotor radius, hub radius, and section radii
-        r = np.zeros((nB,nr))
-        Rs=[0]*nB
-        for iB in np.arange(nB):
-            R_p2g = R_ntr2g[iB]
-            # radial position (in polar grid) of first and last node taken
-            Rs[iB] = (R_p2g.T).dot(pos_gl[iB,-1,:]-origin_pos_gl)[2]
-            rhub = (R_p2g.T).dot(pos_gl[iB,0,:]-origin_pos_gl)[2]
-            # loop on elements
-            for ie in np.arange(nr):
-                r[iB,ie] = (R_p2g.T).dot(pos_gl[iB,ie,:]-origin_pos_gl)[2] # radial position in polar grid
-        R = np.max(Rs)
+        r    = g2p(pos_gl-origin_pos_gl)[:,:,2] # radial position in polar grid
+        R    = np.max(r[:,-1])
+        rhub = r[-1,0] # NOTE: hub radius of the last blade, as done by the original loop over blades
         # --- Rotor speed for power
         omega_r = R_r2g.T.dot(omega_gl) # rotational speed in rotor coordinate system
         Omega = omega_r[0] # rotation speed of shaft (along x)
@@ -423,26 +495,13 @@ class AeroBEM:
             # --------------------------------------------------------------------------------
             # --- Step 1: velocity components
             # --------------------------------------------------------------------------------
-            Vrel_a  = np.zeros((nB,nr,3))
-            Vrel_p  = np.zeros((nB,nr,3))
-            Vstr_p  = np.zeros((nB,nr,3))
-            Vwnd_p  = np.zeros((nB,nr,3))
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    # Velocity in global
-                    Vwnd_g = Vwnd_gl[iB,ie]
-                    # NOTE: inductions from previous time step, in polar grid (more realistic than global)
-                    #Vind_g = xd0.Vind_g[iB,ie] # dynamic inductions at previous time step
-                    Vind_g = (R_p2g).dot(xd0.Vind_p[iB,ie]) # dynamic inductions at previous time step
-                    Vstr_g = Vstr_gl[iB,ie]
-                    Vrel_g = Vwnd_g+Vind_g-Vstr_g
-                    # Airfoil coordinates
-                    Vrel_a[iB,ie] = (R_a2g[iB,ie].T).dot(Vrel_g)
-                    # Polar coordinates
-                    Vstr_p[iB,ie] = (R_p2g.T).dot(Vstr_g) # Structural velocity in polar coordinates
-                    Vrel_p[iB,ie] = (R_p2g.T).dot(Vrel_g)
-                    Vwnd_p[iB,ie] = (R_p2g.T).dot(Vwnd_g) # Wind Velocity in polar coordinates
+            # NOTE: inductions from previous time step, in polar grid (more realistic than global)
+            Vind_g = p2g(xd0.Vind_p) # dynamic inductions at previous time step
+            Vrel_g = Vwnd_gl+Vind_g-Vstr_gl
+            Vrel_a = g2a(Vrel_g)  # Airfoil coordinates
+            Vstr_p = g2p(Vstr_gl) # Structural velocity in polar coordinates
+            Vrel_p = g2p(Vrel_g)
+            Vwnd_p = g2p(Vwnd_gl) # Wind Velocity in polar coordinates
             Vflw_p  = Vwnd_p-Vstr_p # Relative flow velocity, including wind and structural motion
             Vflw_g  = Vwnd_gl-Vstr_gl # Relative flow velocity, including wind and structural motion
 
@@ -471,22 +530,22 @@ class AeroBEM:
             # --------------------------------------------------------------------------------
             # --- Step 4: Aerodynamic Coefficients
             # --------------------------------------------------------------------------------
-            ClCdCm = np.array([p.fPolars[ie](alpha[iB,ie]) for iB in np.arange(nB) for ie in np.arange(nr)]).reshape((nB,nr,3))
+            if isinstance(p.fPolars, PolarTable):
+                ClCdCm = p.fPolars(alpha)
+            else:
+                ClCdCm = np.stack([p.fPolars[ie](alpha[:,ie]) for ie in np.arange(nr)], axis=1) # nB x nr x 3
             Cl=ClCdCm[:,:,0]
             Cd=ClCdCm[:,:,1]
             # Project to airfoil coordinates
-            C_xa       ,C_ya        = Cl*cos(alpha)+ Cd*sin(alpha  )   ,  -Cl*sin(alpha)+ Cd*cos(alpha)
-            C_xa_noDrag,C_ya_noDrag = Cl*cos(alpha)                    ,  -Cl*sin(alpha)
+            C_a        = np.zeros((nB,nr,3))
+            C_a_noDrag = np.zeros((nB,nr,3))
+            C_a[:,:,0]       , C_a[:,:,1]        = Cl*cos(alpha)+ Cd*sin(alpha  )   ,  -Cl*sin(alpha)+ Cd*cos(alpha)
+            C_a_noDrag[:,:,0], C_a_noDrag[:,:,1] = Cl*cos(alpha)                    ,  -Cl*sin(alpha)
+            C_xa, C_ya = C_a[:,:,0], C_a[:,:,1]
             # Project to polar coordinates
-            C_p        = np.zeros((nB,nr,3))
-            C_g        = np.zeros((nB,nr,3))
-            C_p_noDrag = np.zeros((nB,nr,3))
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    C_g        [iB,ie]=R_a2g[iB,ie].dot(np.array([C_xa       [iB,ie], C_ya       [iB,ie], 0]))
-                    C_p        [iB,ie]=(R_p2g.T).dot(C_g[iB,ie])
-                    C_p_noDrag [iB,ie]=(R_p2g.T).dot(R_a2g[iB,ie]).dot(np.array([C_xa_noDrag[iB,ie], C_ya_noDrag[iB,ie], 0]))
+            C_g        = a2g(C_a)
+            C_p        = g2p(C_g)
+            C_p_noDrag = g2p(a2g(C_a_noDrag))
             # Cn and Ct 
             if (p.bAIDrag):
                 cnForAI = C_p[:,:,0]
@@ -521,15 +580,13 @@ class AeroBEM:
                 print('>> BEM crashing')
 
             # Storing last values, for relaxation
-            xd1.a=a.copy()
+            xd1.a[:]=a
             # Quasi steady inductions, polar and global coordinates
-            xd1.Vind_qs_p = np.zeros((nB,nr,3))
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    # NOTE: Vind is negative along n and t!
-                    xd1.Vind_qs_p[iB,ie] = np.array([-a[iB,ie]*Vflw_p[iB,ie,0],  aprime[iB,ie]*Vflw_p[iB,ie,1], 0])
-                    xd1.Vind_qs_g[iB,ie] = R_p2g.dot(xd1.Vind_qs_p[iB,ie]) # global
+            # NOTE: Vind is negative along n and t!
+            xd1.Vind_qs_p[:,:,0] = -a*Vflw_p[:,:,0]
+            xd1.Vind_qs_p[:,:,1] = aprime*Vflw_p[:,:,1]
+            xd1.Vind_qs_p[:,:,2] = 0
+            xd1.Vind_qs_g[:]     = p2g(xd1.Vind_qs_p) # global
 
             if firstCallEquilibrium:
                 # We update the previous states induction
@@ -539,7 +596,6 @@ class AeroBEM:
         if firstCallEquilibrium:
             # Initialize dynamic wake variables
             xd0.Vind_qs_p  = xd1.Vind_qs_p.copy()
-            xd1.Vind_qs_p  = xd1.Vind_qs_p.copy()
             xd0.Vind_int_p = xd1.Vind_qs_p.copy()
             xd0.Vind_dyn_p = xd1.Vind_qs_p.copy()
         # --------------------------------------------------------------------------------
@@ -551,28 +607,25 @@ class AeroBEM:
             tau1 = 1.1 / (1 - 1.3 *a_avg)*R/V_avg
             tau1=4
             tau2 = (0.39 - 0.26 * (r/R)**2) * tau1
-            tau2 = np.tile(tau2[:,:,None],3)
+            tau2 = tau2[:,:,None]
             # Oye's dynamic inflow model, discrete time integration
             H              = xd1.Vind_qs_p + 0.6 * tau1 * (xd1.Vind_qs_p - xd0.Vind_qs_p) /dt
-            xd1.Vind_int_p = H + (xd0.Vind_int_p - H) * exp(-dt/tau1) # intermediate velocity
-            xd1.Vind_dyn_p = xd1.Vind_int_p + (xd0.Vind_dyn_p - xd1.Vind_int_p) * exp(-dt/tau2)
+            xd1.Vind_int_p[:] = H + (xd0.Vind_int_p - H) * exp(-dt/tau1) # intermediate velocity
+            xd1.Vind_dyn_p[:] = xd1.Vind_int_p + (xd0.Vind_dyn_p - xd1.Vind_int_p) * exp(-dt/tau2)
             # In global
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    xd1.Vind_dyn_g[iB,ie] = R_p2g.dot(xd1.Vind_dyn_p[iB,ie]) # global
+            xd1.Vind_dyn_g[:] = p2g(xd1.Vind_dyn_p) # global
         else:
-            xd1.Vind_dyn_g = xd1.Vind_qs_g.copy()
-            xd1.Vind_dyn_p = xd1.Vind_qs_p.copy()
+            xd1.Vind_dyn_g[:] = xd1.Vind_qs_g
+            xd1.Vind_dyn_p[:] = xd1.Vind_qs_p
 
         # --------------------------------------------------------------------------------}
         # --- Disk averaged quantities
         # --------------------------------------------------------------------------------{
         # Average wind in global, and rotor coord
-        Vwnd_avg_g = np.mean(np.mean(Vwnd_gl[:,:,:],axis=0),axis=0)
+        Vwnd_avg_g = np.mean(Vwnd_gl, axis=(0,1))
         Vwnd_avg_r = (R_r2g.T).dot(Vwnd_avg_g)
         # Average relative wind (Wnd-Str)
-        Vflw_avg_g = np.mean(np.mean(Vflw_g[:,:,:],axis=0),axis=0)
+        Vflw_avg_g = np.mean(Vflw_g, axis=(0,1))
         x_hat_disk = R_r2g[:,0]
         # Coordinate system with "y" in the cross wind direction for skew model
         V_dot_x  = np.dot(Vflw_avg_g, x_hat_disk)
@@ -585,15 +638,11 @@ class AeroBEM:
             y_hat_disk = V_ytmp / V_ynorm
             z_hat_disk = np.cross(Vflw_avg_g, x_hat_disk ) / V_ynorm
         # Fake "Azimuth angle" used for skew model
-        SkewAzimuth=np.zeros(nB)
-        for iB in np.arange(nB):
-            z_hat = R_ntr2g[iB][:,2]
-            tmp_sz_y = -1.0*np.dot(z_hat,y_hat_disk)
-            tmp_sz   =      np.dot(z_hat,z_hat_disk)
-            if np.abs(tmp_sz_y)<1e-8 and np.abs(tmp_sz)<1e-8:
-                SkewAzimuth[iB]=0
-            else:
-                SkewAzimuth[iB] = arctan2( tmp_sz_y, tmp_sz )
+        z_hat    = R_p2g[:,:,2] # nB x 3
+        tmp_sz_y = -1.0*z_hat.dot(y_hat_disk)
+        tmp_sz   =      z_hat.dot(z_hat_disk)
+        SkewAzimuth = arctan2( tmp_sz_y, tmp_sz )
+        SkewAzimuth[np.logical_and(np.abs(tmp_sz_y)<1e-8, np.abs(tmp_sz)<1e-8)] = 0
         # Skew angle without induction
         Vw_r = (R_r2g.T).dot(Vflw_avg_g)
         Vw_rn     = Vw_r[0] # normal to disk
@@ -604,14 +653,12 @@ class AeroBEM:
         # ---  Yaw model, repartition of the induced velocity
         # --------------------------------------------------------------------------------
         if p.bYawModel:
-           #xd1.Vind_g = xd1.Vind_dyn_g.copy()
-           #xd1.Vind_p = xd1.Vind_dyn_p.copy()
            #psi0 = np.arctan( Vwnd_avg_g[2]/Vwnd_avg_r[1])  # TODO
            # Sections that are about 0.7%R
            Ir= np.logical_and(r[0]>=0.5*R, r[0] <=0.8*R)
            if len(Ir)==0:
                Ir=r[0]>0
-           Vind_avg_g = np.mean(np.mean(xd1.Vind_dyn_g[:,Ir,:],axis=0),axis=0)
+           Vind_avg_g = np.mean(xd1.Vind_dyn_g[:,Ir,:], axis=(0,1))
            Vind_avg_r = (R_r2g.T).dot(Vind_avg_g)
            # Skew angle with induction
            V_r      = Vwnd_avg_r + Vind_avg_r
@@ -622,24 +669,19 @@ class AeroBEM:
            if np.abs(chi)>pi/2:
                print('>>> chi too large')
            yawCorrFactor = 15*np.pi/32 # close to 3/2
-           for iB in np.arange(nB):
-               R_p2g = R_ntr2g[iB]
-               for ie in np.arange(nr):
-                   xd1.Vind_p[iB,ie] = xd1.Vind_dyn_p[iB,ie]
-                   xd1.Vind_p[iB,ie,0] = xd1.Vind_dyn_p[iB,ie,0] * (1 + yawCorrFactor*r[iB,ie]/R * np.tan(chi/2)*np.sin(SkewAzimuth[iB])) #* np.cos(psiB0[iB]+psi - psi0))
-                   xd1.Vind_g[iB,ie] = R_p2g.dot(xd1.Vind_p[iB,ie]) # global
-                   # AeroDyn:
-                   #chi = (0.6_ReKi*a + 1.0_ReKi)*chi0
-                   #a = a * (1.0 +  yawCorrFactor * yawCorr_tan * (tipRatio) * sin(azimuth))
-
-
+           xd1.Vind_p[:] = xd1.Vind_dyn_p
+           xd1.Vind_p[:,:,0] = xd1.Vind_dyn_p[:,:,0] * (1 + yawCorrFactor*r/R * np.tan(chi/2)*np.sin(SkewAzimuth[:,None])) #* np.cos(psiB0[iB]+psi - psi0))
+           xd1.Vind_g[:] = p2g(xd1.Vind_p) # global
+           # AeroDyn:
+           #chi = (0.6_ReKi*a + 1.0_ReKi)*chi0
+           #a = a * (1.0 +  yawCorrFactor * yawCorr_tan * (tipRatio) * sin(azimuth))
         else:
-           xd1.Vind_g = xd1.Vind_dyn_g.copy()
-           xd1.Vind_p = xd1.Vind_dyn_p.copy()
+           xd1.Vind_g[:] = xd1.Vind_dyn_g
+           xd1.Vind_p[:] = xd1.Vind_dyn_p
         # --------------------------------------------------------------------------------
         # --- Step 6: Outputs
         # --------------------------------------------------------------------------------
-        it = xd1.it # time step
+        it = self._outIndex(xd1.it) # time step index in storage
         # --- Coefficients
         self.Cl[it]   = Cl
         self.Cd[it]   = Cd
@@ -679,29 +721,14 @@ class AeroBEM:
         self.Gamma[it]  = 0.5*Re*Cl*p.kinVisc*10**6 # Circulation [m^2/s]
         self.psi[it]  = psi*180/pi
         self.RtArea[it]  = pi*R**2
-
-        for iB in np.arange(nB):
-            R_p2g = R_ntr2g[iB]
-            for ie in np.arange(nr):
-                Vind_g = xd1.Vind_g[iB,ie] # dynamic inductions at current time step
-                Vind_s = (R_s2g[iB,ie].T).dot(Vind_g) # Induced velocity in section coordinates
-                #Vind_a = (R_a2g[iB,ie].T).dot(Vind_g) # Induced velocity in airfoil coordinates
-                Vind_p = (R_p2g       .T).dot(Vind_g) # Induced velocity in polar coordinates
-                self.Vind_p[it,iB,ie,:] =Vind_p
-                self.Vind_s[it,iB,ie,:] =Vind_s
-                ## Wind
-                Vwnd_g = Vwnd_gl[iB,ie]
-                Vwnd_s = (R_s2g[iB,ie].T).dot(Vwnd_g) # Wind Velocity in section coordinates
-                #Vwnd_a = (R_a2g[iB,ie].T).dot(Vwnd_gl) # Wind Velocity in airfoil coordinates
-                self.Vwnd_s[it,iB,ie,:]=Vwnd_s
-                ## Structural velocity
-                Vstr_g = Vstr_gl[iB,ie]
-                #Vstr_a = (R_a2g[iB,ie].T).dot(Vstr_g) # Structural velocity in airfoil coordinates
-                self.Vstr_s[it,iB,ie,:]=(R_s2g[iB,ie].T).dot(Vstr_g)
-                # --- Loads
-                F_g = q_dyn[iB,ie] * C_g[iB,ie]
-                self.F_s[it,iB,ie] = (R_s2g[iB,ie].T).dot(F_g)
-
+        # Induced velocity (dynamic inductions at current time step), in section and polar coordinates
+        self.Vind_s[it] = g2s(xd1.Vind_g)
+        self.Vind_p[it] = g2p(xd1.Vind_g)
+        # Wind and structural velocity in section coordinates
+        self.Vwnd_s[it] = g2s(Vwnd_gl)
+        self.Vstr_s[it] = g2s(Vstr_gl)
+        # --- Loads
+        self.F_s[it]    = g2s(q_dyn[:,:,None] * C_g)
 
         # Blade integrated loads
         self.BladeThrust[it,:] = np.trapz(self.Fn[it,:]  , r) # Normal to rotor plane
@@ -709,6 +736,7 @@ class AeroBEM:
         self.Thrust[it] = np.sum(self.BladeThrust[it,:])    # Normal to rotor plane
         self.Torque[it] = np.sum(self.BladeTorque[it,:])
         self.Power[it]  = Omega*self.Torque[it]
+        self._outUpdate(xd1.it, t)
             # TODO TODO
             #self.BladeEdge   = np.zeros((nt,nB))
             #self.BladeFlap   = np.zeros((nt,nB))
@@ -765,24 +793,107 @@ class AeroBEM:
 
         # --- Perform time loop
         dt=time[1]-time[0]
-        xdBEM = self.getInitStates()
+        xdBEM     = self.getInitStates()
+        xdBEM_buf = self.getInitStates() # Buffer for the states at the next time step
         self.timeStepInit(time[0],time[-1],dt) 
-        for it,t in enumerate(self.time):
-            motion.update(t)
-            u,v,w = windFunction(motion.pos_gl[:,:,0], motion.pos_gl[:,:,1], motion.pos_gl[:,:,2], t)  
-            Vwnd_g = np.moveaxis(np.array([u,v,w]),0,-1) # nB x nr x 3
-            xdBEM = self.timeStep(t, dt, xdBEM, motion.psi, motion.psi_B0,
-                    motion.origin_pos_gl, motion.omega_gl, motion.R_b2g, 
-                    motion.R_ntr2g, motion.R_bld2b,
-                    motion.pos_gl, motion.vel_gl, motion.R_s2g, motion.R_a2g,
-                    Vwnd_g,
-                    firstCallEquilibrium= it==0 and firstCallEquilibrium
-                    )
-            #if np.mod(t,1)<dt/2:
-            #    print(t)
+        try:
+            for it,t in enumerate(self.time):
+                motion.update(t)
+                u,v,w = windFunction(motion.pos_gl[:,:,0], motion.pos_gl[:,:,1], motion.pos_gl[:,:,2], t)  
+                Vwnd_g = np.moveaxis(np.array([u,v,w]),0,-1) # nB x nr x 3
+                xdBEM_new = self.timeStep(t, dt, xdBEM, motion.psi, motion.psi_B0,
+                        motion.origin_pos_gl, motion.omega_gl, motion.R_b2g, 
+                        motion.R_ntr2g, motion.R_bld2b,
+                        motion.pos_gl, motion.vel_gl, motion.R_s2g, motion.R_a2g,
+                        Vwnd_g,
+                        firstCallEquilibrium= it==0 and firstCallEquilibrium,
+                        xd1=xdBEM_buf
+                        )
+                xdBEM_buf, xdBEM = xdBEM, xdBEM_new
+                #if np.mod(t,1)<dt/2:
+                #    print(t)
+        finally:
+            # Time steps already computed are passed to the sink, even if the loop is interrupted
+            self._outClose()
         df = self.toDataFrame()
         return df
 
+# --------------------------------------------------------------------------------}
+# --- Output sinks for long simulations 
+# --------------------------------------------------------------------------------{
+def _selectChannels(columns, channels):
+    """ Select columns matching the list of channels. Wildcards are matched against the channel names without units """
+    if channels is None:
+        return columns
+    from fnmatch import fnmatch
+    return [c for c in columns if c in channels or any([fnmatch(c.split('_[')[0], pat) for pat in channels])]
+
+class RingBufferOutputs:
+    """ 
+    Output sink keeping the last `n` stored time steps in memory (all if n is None)
+    """
+    def __init__(self, n=None):
+        self.n = n
+
+    def open(self, columns):
+        self.columns = columns
+        self.chunks  = []
+        self.nStored = 0
+
+    def write(self, data):
+        self.chunks.append(data.copy())
+        self.nStored += data.shape[0]
+        if self.n is not None:
+            # Keep the last n rows, in one array
+            M = np.concatenate(self.chunks)[-self.n:]
+            self.chunks = [M]
+
+    def close(self):
+        pass
+
+    def toDataFrame(self):
+        return pd.DataFrame(data=np.concatenate(self.chunks), columns=self.columns)
+
+class ChunkFileOutputs:
+    """ 
+    Output sink writing each chunk of stored time steps to a numpy file `basename_XXXX.npz`
+    """
+    def __init__(self, basename, dtype=np.float64):
+        self.basename = basename
+        self.dtype    = dtype
+
+    def open(self, columns):
+        self.columns   = columns
+        self.filenames = []
+
+    def write(self, data):
+        filename = '{}_{:04d}.npz'.format(self.basename, len(self.filenames))
+        np.savez(filename, data=data.astype(self.dtype), columns=np.asarray(self.columns))
+        self.filenames.append(filename)
+
+    def close(self):
+        pass
+
+    def toDataFrame(self, columns=None):
+        return ChunkFileOutputs.read(self.filenames, columns=columns)
+
+    @staticmethod
+    def read(filenames, columns=None):
+        """ Read and concatenate chunk files, optionally only selected columns """
+        if isinstance(filenames, str):
+            import glob
+            filenames = sorted(glob.glob(filenames+'_[0-9][0-9][0-9][0-9].npz'))
+        data = []
+        for filename in filenames:
+            with np.load(filename) as f:
+                allcols = list(f['columns'])
+                M = f['data']
+            if columns is not None:
+                M = M[:,[allcols.index(c) for c in columns]]
+            data.append(M)
+        return pd.DataFrame(data=np.concatenate(data), columns=allcols if columns is None else columns)
+
+
 # --------------------------------------------------------------------------------}
 # --- Helper class to prescribe a motion
 # --------------------------------------------------------------------------------{
@@ -888,12 +999,11 @@ class PrescribedRotorMotion():
         # Update of positions
         for iB in np.arange(self.nB):
             self.R_ntr2g[iB] = R_b2g.dot(self.R_ntr2b[iB])
-            for ir in np.arange(len(self.r)):
-                s_OP =  R_b2g.dot(self.pos0[iB,ir,:])
-                self.pos_gl[iB,ir,:] = P_gl   + s_OP
-                self.vel_gl[iB,ir,:] = vel_gl + np.cross(omega_gl, s_OP)
-                self.R_s2g[iB,ir,:,:] = R_b2g.dot(self.R_s02b[iB,ir,:])
-                self.R_a2g[iB,ir,:,:] = R_b2g.dot(self.R_a02b[iB,ir,:])
+        s_OP =  np.einsum('ij,brj->bri', R_b2g, self.pos0)
+        self.pos_gl[:] = P_gl   + s_OP
+        self.vel_gl[:] = vel_gl + np.cross(omega_gl, s_OP)
+        self.R_s2g[:]  = np.einsum('ij,brjk->brik', R_b2g, self.R_s02b)
+        self.R_a2g[:]  = np.einsum('ij,brjk->brik', R_b2g, self.R_a02b)
 
     def update(self, t):
         if self.sType=='constantRPM':
@@ -5,6 +5,7 @@ import os
   - Polar: class to represent a polar (computes steady/unsteady parameters, corrections etc.)
   - blend: function to blend two polars
   - thicknessinterp_from_one_set: interpolate polars at different thickeness based on one set of polars 
+  - PolarTable: lookup table of the polars of all blade stations on a shared alpha grid
 """
 
 
@@ -1042,6 +1043,104 @@ def thicknessinterp_from_one_set(thickness, polarList, polarThickness):
     return polars
 
 
+class PolarTable(object):
+    """
+    Lookup table of the polars of all blade stations, resampled once on a shared uniform alpha grid.
+    The coefficients are stored in one contiguous array `data` of shape (nr x nalpha x 3) (Cl, Cd, Cm),
+    and lookups are done by direct indexing and linear interpolation, for all stations at once.
+    The table can be used in place of the list of polar interpolants of the BEM codes.
+
+    Example:
+        table = PolarTable(polars, dAlpha=0.1) # polars: list of nr arrays [alpha(deg), Cl, Cd, Cm]
+        ClCdCm = table(alpha)                 # alpha [rad] of shape (..., nr), ClCdCm of shape (..., nr, 3)
+    """
+    def __init__(self, polars, dAlpha=0.1, radians=False, bounds_error=True):
+        """
+        polars : list of nr polars, either arrays with columns [alpha, Cl, Cd, (Cm)] or `Polar` objects
+        dAlpha : resolution of the uniform alpha grid [deg]
+        radians: True if the alpha column of the input polars is in radians
+        bounds_error: if True, a ValueError is raised when alpha is outside of the range of the polar of a station
+                      (as done by the interpolants of the BEM codes, scipy interp1d). 
+                      If False, the boundary values of the polar are used.
+        """
+        alphas, coeffs = [], []
+        for p in polars:
+            if hasattr(p,'cl'):
+                cm = p.cm if np.size(p.cm)==np.size(p.alpha) else np.zeros(np.size(p.alpha))
+                M = np.column_stack((p.alpha, p.cl, p.cd, cm))
+                bRad = p._radians
+            else:
+                M = np.asarray(p)
+                bRad = radians
+            if not bRad:
+                M = M.copy()
+                M[:,0] = M[:,0]*np.pi/180
+            C = np.zeros((M.shape[0],3))
+            nc = min(M.shape[1]-1,3)
+            C[:,:nc] = M[:,1:nc+1]
+            alphas.append(M[:,0])
+            coeffs.append(C)
+        # Alpha range of each polar, the grid covers all of them
+        self.alphaMin = np.array([a[0]  for a in alphas])
+        self.alphaMax = np.array([a[-1] for a in alphas])
+        self.bounds_error = bounds_error
+        alpha_min = np.min(self.alphaMin)
+        alpha_max = np.max(self.alphaMax)
+        if alpha_max<=alpha_min:
+            raise Exception('PolarTable: the polars do not have a range of angle of attack')
+        dAlpha = dAlpha*np.pi/180
+        nAlpha = int(np.ceil((alpha_max-alpha_min)/dAlpha))+1
+        self.alpha  = np.linspace(alpha_min, alpha_max, nAlpha) # [rad]
+        self.dAlpha = self.alpha[1]-self.alpha[0]
+        self.data   = np.zeros((len(alphas), nAlpha, 3))
+        for ir, (a, C) in enumerate(zip(alphas, coeffs)):
+            for j in range(3):
+                self.data[ir,:,j] = np.interp(self.alpha, a, C[:,j])
+
+    def __repr__(self):
+        s='<{} object>:\n'.format(type(self).__name__)
+        s+=' - data  : shape {} (nr x nalpha x [Cl,Cd,Cm])\n'.format(self.data.shape)
+        s+=' - alpha : [{:.3f} ... {:.3f}] rad, dAlpha={:.5f} rad\n'.format(self.alpha[0], self.alpha[-1], self.dAlpha)
+        return s
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __call__(self, alpha, ir=None):
+        """
+        Returns Cl, Cd, Cm at the angles of attack alpha [rad], as an array of shape alpha.shape+(3,)
+        If ir is None, the last dimension of alpha is assumed to be the radial dimension (length nr).
+        Otherwise, ir are the station indices, broadcastable with alpha.
+        Values beyond the alpha range of the polar of a station raise a ValueError, 
+        or are set to the boundary values if `bounds_error` is False.
+        """
+        alpha = np.asarray(alpha)
+        if ir is None:
+            ir = np.arange(self.data.shape[0])
+        if self.bounds_error:
+            self._checkBounds(alpha, ir)
+        x  = np.clip((alpha - self.alpha[0])/self.dAlpha, 0, len(self.alpha)-1)
+        i0 = np.minimum(x.astype(int), len(self.alpha)-2)
+        w  = (x - i0)[...,None]
+        C0 = self.data[ir, i0]
+        C1 = self.data[ir, i0+1]
+        return C0 + w*(C1-C0)
+
+    def _checkBounds(self, alpha, ir):
+        """ Raise a ValueError if alpha is outside of the range of the polar of a station """
+        aMin = self.alphaMin[ir]
+        aMax = self.alphaMax[ir]
+        bBelow = alpha<aMin
+        bAbove = alpha>aMax
+        if np.any(bBelow) or np.any(bAbove):
+            b = bBelow if np.any(bBelow) else bAbove
+            a, ia = np.broadcast_arrays(alpha, ir)
+            i = np.argmax(b.ravel())
+            irb = ia.ravel()[i]
+            raise ValueError('PolarTable: alpha={:.3f} deg is {} the range of the polar of station {:d} ([{:.3f}, {:.3f}] deg)'.format(
+                a.ravel()[i]*180/np.pi, 'below' if np.any(bBelow) else 'above', irb, self.alphaMin[irb]*180/np.pi, self.alphaMax[irb]*180/np.pi))
+
+
 def _alpha_window_in_bounds(alpha,window):
     """ Ensures that the window of alpha values is within the bounds of alpha
     Example: alpha in [-30,30], window=[-20,20] => window=[-20,20]
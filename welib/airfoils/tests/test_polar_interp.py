@@ -45,3 +45,45 @@ class TestPolarInterp(unittest.TestCase):
         np.testing.assert_equal(P3.cd,P2.cl*0+1.5)
         np.testing.assert_equal(P3.cm,P2.cl*0+1.5)
 
+
+    def test_polar_table(self):
+        # --- Table lookup matches linear interpolation of each polar
+        P1=Polar.fromfile(os.path.join(MyDir,'../data/FFA-W3-241-Re12M.dat'))
+        M1=np.column_stack((P1.alpha, P1.cl, P1.cd, P1.cm))
+        M2=M1.copy()
+        M2[:,1:]+=0.5
+        table = PolarTable([M1,M2], dAlpha=0.05)
+        self.assertEqual(table.data.shape[0], 2)
+        alpha = np.linspace(-20,20,50)*np.pi/180
+        alpha = np.column_stack((alpha,alpha)) # nalpha x nr
+        C = table(alpha)
+        self.assertEqual(C.shape, (50,2,3))
+        np.testing.assert_almost_equal(C[:,0,0], P1.cl_interp(alpha[:,0]*180/np.pi), 2)
+        np.testing.assert_almost_equal(C[:,1,1], P1.cd_interp(alpha[:,0]*180/np.pi)+0.5, 2)
+        # --- Station indices provided
+        C = table(alpha[:,0], ir=1)
+        np.testing.assert_almost_equal(C[:,2], P1.cm_interp(alpha[:,0]*180/np.pi)+0.5, 2)
+        # --- Grid values are exact
+        C = table(np.column_stack((table.alpha,table.alpha)))
+        np.testing.assert_almost_equal(C[:,0,:], table.data[0], 12)
+        np.testing.assert_almost_equal(C[:,1,:], table.data[1], 12)
+
+    def test_polar_table_bounds(self):
+        # --- Values outside of the range of the polar of a station raise an error, like interp1d
+        from scipy.interpolate import interp1d
+        P1=Polar.fromfile(os.path.join(MyDir,'../data/FFA-W3-241-Re12M.dat'))
+        M1=np.column_stack((P1.alpha, P1.cl, P1.cd, P1.cm))
+        M2=M1[np.abs(M1[:,0])<=30]
+        table = PolarTable([M1,M2], dAlpha=0.05)
+        alpha = np.array([[10, 20], [40, 20]])*np.pi/180 # nalpha x nr
+        np.testing.assert_almost_equal(table(alpha[0])[:,0], [P1.cl_interp(10), P1.cl_interp(20)], 2)
+        np.testing.assert_almost_equal(table(alpha[1,0], ir=0)[0], P1.cl_interp(40), 2)
+        with self.assertRaises(ValueError):
+            interp1d(M2[:,0]*np.pi/180, M2[:,1:], axis=0)(alpha[1,0])
+        with self.assertRaises(ValueError):
+            table(alpha[1,[1,0]])
+        with self.assertRaises(ValueError):
+            table(-np.pi, ir=1)
+        # --- Boundary values otherwise
+        table = PolarTable([M1,M2], dAlpha=0.05, bounds_error=False)
+        np.testing.assert_almost_equal(table(alpha[1,[1,0]])[1], M2[-1,1:], 10)
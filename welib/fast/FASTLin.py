@@ -2,13 +2,22 @@ import numpy as np
 import pickle
 import glob
 import os
-import weio # TODO use welib.weio
 import pandas as pd
+from welib.weio.fast_linearization_file import FASTLinearizationFile, readCached
+
+_MATRICES = ['A','B','C','D','M']
 
 
 class FASTPeriodicOP(object):
     """ Class for a set of *.lin files, all assumed to be for the same periodic operating point"""
-    def __init__(self,prefix,nLin=None):
+    def __init__(self,prefix,nLin=None, matrices=None, dtype=None, cache=False, cacheDir=None):
+        """ 
+        matrices: list of matrices to be read (e.g. ['A','B']), None: all, see FASTLinearizationFile
+        dtype   : type of the matrices (e.g. 'float32'), None: float64
+        cache   : if True, the parsed content of each .lin file is stored in a binary file, reused as long 
+                  as the .lin file is unchanged (see `readCached`)
+        cacheDir: directory of the binary files, None: next to the .lin files
+        """
         if nLin is None:
             linfiles= glob.glob(prefix + '.*.lin') # TODO we want a more rigorous regexp
             self.nLinTimes = len(linfiles)
@@ -28,14 +37,12 @@ class FASTPeriodicOP(object):
             print(linfilename)
             if not os.path.exists(linfilename):
                 print('Linearization file missing: ',linfilename)
-            linfile=weio.read(linfilename)
+            if cache:
+                linfile=readCached(linfilename, cacheDir=cacheDir, matrices=matrices, dtype=dtype)
+            else:
+                linfile=FASTLinearizationFile(linfilename, matrices=matrices, dtype=dtype)
             df=linfile.toDataFrame()
             self.Data.append(linfile)
-            #self.A=lin['A']
-            #B=linfile['B']
-            #u=linfile['u']
-            #self.C=lin['C']
-            #self.D=lin['D']
             if linfile['WindSpeed'] is not None:
                 self.vWS.append(linfile['WindSpeed'])
             else:
@@ -62,11 +69,33 @@ class FASTPeriodicOP(object):
 
 
 
+def _cacheInfo(linfiles, matrices, dtype, nLin):
+    """ Inputs stored with the linearization store, to check that a cache file matches the request """
+    return {
+        '_linfiles': np.array(sorted([os.path.abspath(f) for f in linfiles]), dtype=str),
+        '_matrices': np.array(sorted(matrices) if matrices is not None else ['all'], dtype=str),
+        '_dtype'   : np.array(str(np.dtype(dtype)) if dtype is not None else 'float64', dtype=str),
+        '_nLin'    : np.array(nLin if nLin is not None else -1),
+    }
+
+
 class FASTLin(object):
-    """ Class for linearization data for different operating points (typically Campbell) """
-    def __init__(self, linfiles=[], folder='./', prefix='', nLin=None):
+    """ Class for linearization data for different operating points (typically Campbell) 
+
+    The matrices of all operating points and linearization times (e.g. azimuth) are stacked in 
+    arrays of shape (nOP x nLinTimes x n x m), see `stack`, on which the statistics are computed.
+    This "store" can be saved to, and loaded from, a binary file (see `cacheFile`, `saveStore`).
+    """
+    def __init__(self, linfiles=[], folder='./', prefix='', nLin=None, matrices=None, dtype=None, cacheFile=None, linCache=False):
         """ 
         Init with a list of linfiles, or a folder and prefix
+          - matrices: list of matrices to be read (e.g. ['A','B']), None: all 
+          - dtype   : type of the matrices (e.g. 'float32'), None: float64
+          - cacheFile: binary file (.npz) where the store is saved, and read from as long as it is newer than the lin files
+                       and it was generated with the same list of lin files, `matrices`, `dtype` and `nLin`.
+                       NOTE: when the store is read from the cache file, `OP_Data` is None (the lin files are not read),
+                       only the matrices present in the store are available.
+          - linCache: if True, the parsed content of each lin file is cached in a binary file (see `FASTPeriodicOP`)
         """
 
         if not isinstance(linfiles, list):
@@ -80,30 +109,65 @@ class FASTLin(object):
             linfiles= list(glob.glob(folder + prefix + '*.*.lin')) # TODO we want a more rigorous regexp
             linfiles.sort()
 
+        self.OP_Data = None
+        self._store  = {}
+        cacheInfo = _cacheInfo(linfiles, matrices, dtype, nLin)
+        if cacheFile is not None and os.path.exists(cacheFile):
+            tCache = os.path.getmtime(cacheFile)
+            if all([os.path.getmtime(f)<=tCache for f in linfiles]):
+                self.loadStore(cacheFile)
+                if all([k in self._store and np.array_equal(self._store[k], v) for k,v in cacheInfo.items()]):
+                    print('Reading linearization store: {}'.format(cacheFile))
+                    return
+                print('Linearization store {} does not match the requested inputs, rebuilding it'.format(cacheFile))
+                self._store = {}
+
         Sim_Prefix=np.unique(['.'.join(f.split('.')[:-2]) for f in linfiles])
         nSim      = len(Sim_Prefix)
         # --- Read period operating points
         print('Reading linearizations for {} operating points'.format(nSim))
-        self.OP_Data=[FASTPeriodicOP(pref,nLin=nLin) for pref in Sim_Prefix]
+        self.OP_Data=[FASTPeriodicOP(pref,nLin=nLin, matrices=matrices, dtype=dtype, cache=linCache) for pref in Sim_Prefix]
         # --- Sort by wind speed
-        Isort = np.argsort(self.WS)
+        Isort = np.argsort([op.WS for op in self.OP_Data])
         self.OP_Data  = [self.OP_Data[i] for i in Isort]
 
-        if self.MaxNLinTimes>1:
-            IBad = [i for i in np.arange(nSim) if self.nLinTimes[i]<self.MaxNLinTimes and self.OP_Data[i].WS>0]
+        nLinTimes = np.array([op.nLinTimes for op in self.OP_Data])
+        if np.max(nLinTimes)>1:
+            IBad = [i for i in np.arange(nSim) if nLinTimes[i]<np.max(nLinTimes) and self.OP_Data[i].WS>0]
             if len(IBad)>0: 
                 print('>>> The following simulations have insufficient number of data points:')
                 for i in IBad:
                     print(self.OP_Data[i].prefix, self.OP_Data[i].nLinTimes)
             self.OP_Data = [self.OP_Data[i] for i in np.arange(nSim) if i not in IBad]
 
+        # --- Operating point data, stored as arrays
+        OP = self.OP_Data
+        nMax = max([op.nLinTimes for op in OP])
+        self._store['WS']        = np.array([op.WS for op in OP])
+        self._store['Pitch']     = np.array([op.Pitch for op in OP])
+        self._store['RotSpeed']  = np.array([op.RotSpeed for op in OP])
+        self._store['nLinTimes'] = np.array([op.nLinTimes for op in OP])
+        self._store['Azimuth']   = np.array([[op.vAzim[i % op.nLinTimes] for i in range(nMax)] for op in OP], dtype=float)
+        self._store['x']         = np.array([op.x.values[0] for op in OP])
+        self._store['u']         = np.array([op.u.values[0] for op in OP])
+        self._store['y']         = np.array([op.y.values[0] for op in OP])
+        self._store['xdescr']    = np.asarray(OP[0].x.columns.values, dtype=str)
+        self._store['udescr']    = np.asarray(OP[0].u.columns.values, dtype=str)
+        self._store['ydescr']    = np.asarray(OP[0].y.columns.values, dtype=str)
+        if OP[0].EDdescr is not None:
+            self._store['EDdescr'] = np.asarray(OP[0].EDdescr, dtype=str)
+
+        if cacheFile is not None:
+            self._store.update(cacheInfo)
+            self.saveStore(cacheFile)
+
     @property
     def WS(self):
-        return np.array([sim.WS for sim in self.OP_Data])
+        return self._store['WS']
 
     @property
     def nLinTimes(self):
-        return np.array([sim.nLinTimes for sim in self.OP_Data])
+        return self._store['nLinTimes']
 
     @property
     def MaxNLinTimes(self):
@@ -111,63 +175,62 @@ class FASTLin(object):
 
     @property
     def nOP(self):
-        return len(self.OP_Data)
+        return len(self.WS)
 
     @property
     def xdescr(self):
-        return self.OP_Data[0].x.columns.values
+        return self._store['xdescr']
     @property
     def ydescr(self):
-        return self.OP_Data[0].y.columns.values
+        return self._store['ydescr']
     @property
     def EDdescr(self):
-        return self.OP_Data[0].EDdescr
+        return self._store.get('EDdescr', None)
     @property
     def udescr(self):
-        return self.OP_Data[0].u.columns.values
+        return self._store['udescr']
     @property
     def xop_mean(self):
-        return np.mean(np.abs(np.array([op.x.values for op in self.OP_Data])),axis=0)
-    @property
-    def uop_mean(self):
-        return np.mean(np.abs(np.array([op.u.values for op in self.OP_Data])),axis=0)
+        return np.mean(np.abs(self._store['x']),axis=0).reshape(1,-1)
     @property
     def uop_mean(self):
-        return np.mean(np.abs(np.array([op.u.values for op in self.OP_Data])),axis=0)
+        return np.mean(np.abs(self._store['u']),axis=0).reshape(1,-1)
 
     @property
     def yop_mean(self):
-        return np.mean(np.abs(np.array([op.y.values for op in self.OP_Data])),axis=0)
+        return np.mean(np.abs(self._store['y']),axis=0).reshape(1,-1)
 
-    def stats(self,matName,WS=None):
+    def stack(self, matName):
+        """ 
+        Returns the matrix `matName` (e.g. 'A') for all operating points and linearization times,
+        as an array of shape (nOP x nLinTimes x n x m).
+        Operating points with one linearization time are repeated along the second dimension.
+        """
+        if matName not in self._store:
+            if self.OP_Data is None or matName not in self.OP_Data[0].Data[0].keys():
+                raise Exception('Matrix {} is not present in the linearization store'.format(matName))
+            nMax = self.MaxNLinTimes
+            M0 = self.OP_Data[0].Data[0][matName]
+            M_all = np.zeros((self.nOP, nMax)+M0.shape, dtype=M0.dtype)
+            for iop, op in enumerate(self.OP_Data):
+                for iTimes in np.arange(nMax):
+                    M_all[iop,iTimes] = op.Data[iTimes % op.nLinTimes][matName]
+            self._store[matName] = M_all
+        return self._store[matName]
+
+    def _selectWS(self, WS=None):
+        """ Indices of the operating points selected by their wind speed """
         if WS is None:
-            WS = self.WS
-            nOP=self.nOP
-        else:
-            nOP=len(WS)
-        print('Returning stats for WS:',WS)
-        M_mean=[]
-
-        shape= self.OP_Data[0].Data[0][matName].shape
-
-        M_all       = np.zeros( (nOP, self.MaxNLinTimes, shape[0],shape[1]))
-        M_mean_perWS= np.zeros( (nOP, shape[0],shape[1]))
-        M_std_perWS = np.zeros( (nOP, shape[0],shape[1]))
-
-        # loop on operating points (e.g. WS)
-        ii=0
-        for iop, op in enumerate(self.OP_Data):
-            if op.WS in WS:
-                # Loop on linearization times (e.g. Azimuth)
-                for iTimes in np.arange(self.MaxNLinTimes):
-                    if op.nLinTimes==1:
-                        M_all[ii,iTimes,:,:]=op.Data[0][matName]
-                    else:
-                        M_all[ii,iTimes,:,:]=op.Data[iTimes][matName]
-
-                M_mean_perWS[ii,:,:] = np.mean(M_all[ii,:,:,:],axis=0)
-                M_std_perWS [ii,:,:]  = np.std(M_all[ii,:,:,:],axis=0)
-                ii+=1
+            return np.arange(self.nOP)
+        return np.where(np.isin(self.WS, WS))[0]
+
+    def stats(self,matName,WS=None):
+        IOP = self._selectWS(WS)
+        print('Returning stats for WS:',self.WS[IOP])
+
+        M_all        = self.stack(matName)[IOP]
+        M_mean_perWS = np.mean(M_all, axis=1)
+        M_std_perWS  = np.std (M_all, axis=1)
 
         M_mean    = np.mean( M_mean_perWS, axis=0 )
         M_stdWS   = np.std ( M_mean_perWS, axis=0 ) # How much elements vary with wind speed
@@ -175,14 +238,14 @@ class FASTLin(object):
 
         return M_mean, M_mean_perWS, M_stdAzim, M_stdWS, M_all
 
+    def azimuthAverage(self, matName, WS=None):
+        """ Average of a matrix over the linearization times (e.g. azimuth) for each operating point (nOP x n x m)"""
+        return np.mean(self.stack(matName)[self._selectWS(WS)], axis=1)
 
-    def average(self, WS=None):
-        A_mean = self.stats('A',WS=WS)[0]
-        B_mean = self.stats('B',WS=WS)[0]
-        C_mean = self.stats('C',WS=WS)[0]
-        D_mean = self.stats('D',WS=WS)[0]
-        #self.M_mean = self.stats('M',WS=WS)[0]
-        return A_mean, B_mean, C_mean, D_mean
+    def average(self, WS=None, matNames=['A','B','C','D']):
+        """ Average of the matrices over the linearization times and operating points """
+        IOP = self._selectWS(WS)
+        return tuple([np.mean(np.mean(self.stack(m)[IOP], axis=1), axis=0) for m in matNames])
 
     def average_subset(self, sX_sel, sU_sel, sY_sel, sE_sel=None, WS=None, exportFile=None, baseDict=None):
         """ 
@@ -190,9 +253,6 @@ class FASTLin(object):
         """
         sX, sU, sY, sED = self.xdescr, self.udescr, self.ydescr, self.EDdescr
 
-        # Average
-        A,B,C,D = self.average(WS=WS)
-
         # Indices
         try:
             IDOFX = np.array([list(sX).index(s) for s in sX_sel])
@@ -202,13 +262,16 @@ class FASTLin(object):
         IDOFU = np.array([list(sU).index(s) for s in sU_sel])
         IDOFY = np.array([list(sY).index(s) for s in sY_sel])
         if sE_sel is not None:
-            IDOFE = np.array([list(sE).index(s) for s in sE_sel])
+            IDOFE = np.array([list(sED).index(s) for s in sE_sel])
 
-        # Subset
-        Ar = A[np.ix_(IDOFX,IDOFX)]
-        Br = B[np.ix_(IDOFX,IDOFU)]
-        Cr = C[np.ix_(IDOFY,IDOFX)]
-        Dr = D[np.ix_(IDOFY,IDOFU)]
+        # Subset of the averaged matrices, extracted before averaging
+        IOP = self._selectWS(WS)
+        def avg(matName, I, J):
+            return np.mean(np.mean(self.stack(matName)[IOP][:,:,I[:,None],J[None,:]], axis=1), axis=0)
+        Ar = avg('A', IDOFX, IDOFX)
+        Br = avg('B', IDOFX, IDOFU)
+        Cr = avg('C', IDOFY, IDOFX)
+        Dr = avg('D', IDOFY, IDOFU)
 
         # Outputs
         Ar = pd.DataFrame(data = Ar, index=sX_sel, columns=sX_sel)
@@ -224,8 +287,8 @@ class FASTLin(object):
         outDict['C']=Cr
         outDict['D']=Dr
         if sE_sel is not None:
-            Mr = M[np.ix_(IDOFE,IDOFE)]
-            Mr = pd.DataFrame(data = Mr, index=sED_sel, columns=sED_sel)
+            Mr = avg('M', IDOFE, IDOFE)
+            Mr = pd.DataFrame(data = Mr, index=sE_sel, columns=sE_sel)
             outDict['M']=Mr
 
         if exportFile is not None:
@@ -238,7 +301,20 @@ class FASTLin(object):
         else:
             return Ar, Br, Cr, Dr
 
+    def saveStore(self, filename):
+        """ Save the stacked matrices and operating point data to a binary file (.npz) """
+        if self.OP_Data is not None:
+            for m in _MATRICES:
+                if m in self.OP_Data[0].Data[0].keys():
+                    self.stack(m)
+        with open(filename, 'wb') as f:
+            np.savez(f, **self._store)
+
+    def loadStore(self, filename):
+        """ Load the stacked matrices and operating point data from a binary file (.npz) """
+        with np.load(filename, allow_pickle=False) as data:
+            self._store = {k: data[k] for k in data.files}
+
     def save(self,filename):
         with open(filename,'wb') as f:
             pickle.dump(self,f)
-
@@ -17,10 +17,10 @@ except ImportError:
     import weis.control.mbc.mbc3 as mbc
 
 
-def postproCampbell(out_or_fstfiles, BladeLen=None, TowerLen=None, verbose=True):
+def postproCampbell(out_or_fstfiles, BladeLen=None, TowerLen=None, verbose=True, parallel=False, nCores=None, cache=False):
     """ 
     Postprocess linearization files to extract Campbell diagram (linearization at different Operating points)
-    - Run MBC
+    - Run MBC (operating points optionally in parallel, results optionally cached, see `run_pyMBC`)
     - Postprocess to put into "CampbellData" matlab form
     - Perform mode identification (work in progress)
     - Export to disk
@@ -29,7 +29,7 @@ def postproCampbell(out_or_fstfiles, BladeLen=None, TowerLen=None, verbose=True)
         raise Exception('postproCampbell requires a list of at least one .fst or .out file')
 
     # --- Run MBC for all operating points
-    MBC = run_pyMBC(out_or_fstfiles, verbose)
+    MBC = run_pyMBC(out_or_fstfiles, verbose, parallel=parallel, nCores=nCores, cache=cache)
 
     # --- Attemps to extract Blade Length and TowerLen from first file...
     filebase, ext = os.path.splitext(out_or_fstfiles[0])
@@ -76,32 +76,69 @@ def postproCampbell(out_or_fstfiles, BladeLen=None, TowerLen=None, verbose=True)
     
     return OP, Freq, Damp, UnMapped, ModeData, modeID_file
 
-def run_pyMBC(out_or_fstfiles, verbose=True):
+def run_pyMBC(out_or_fstfiles, verbose=True, parallel=False, nCores=None, cache=False):
     """
     Run MBC transform on set of openfast linear outputs
 
     INPUTS:
       - out_or_fstfiles
+      - parallel: if True, the operating points are processed by a pool of processes (default: serial)
+      - nCores: number of processes. None: number of cpus
+      - cache: if True, the MBC results of each operating point are stored in a binary file
+               (`<filebase>.MBC.pkl`) and reused as long as the .lin files are unchanged
     """
     if verbose:
         print('run_pyMBC:')
-    MBC = [None]*len(out_or_fstfiles)
-    for i_lin, fstfile in enumerate(out_or_fstfiles):
-        filebase, ext = os.path.splitext(fstfile)
-        lin_file_fmt    = '{}.*.lin'.format(filebase)
-        lin_files       = glob.glob(lin_file_fmt)
-        # --- run MBC3 and campbell post_pro on lin files 
-        if len(lin_files)>0:
-            if verbose:
-                print('       Lin. files: {} ({})'.format(lin_file_fmt, len(lin_files)))
-            MBC[i_lin], matData, FAST_linData = mbc.fx_mbc3(lin_files, verbose=False)
-        else:
-            if verbose:
-                print('[WARN] Lin. files: {} ({})'.format(lin_file_fmt, len(lin_files)))
+    args = [(fstfile, cache) for fstfile in out_or_fstfiles]
+    if parallel and len(args)>1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if nCores is None:
+            nCores = multiprocessing.cpu_count()
+        nCores = max(min(nCores, len(args)), 1)
+        with ProcessPoolExecutor(max_workers=nCores) as executor:
+            results = list(executor.map(_runMBC, args))
+    else:
+        results = [_runMBC(a) for a in args]
 
+    MBC = [None]*len(out_or_fstfiles)
+    for i_lin, (MBC[i_lin], lin_file_fmt, nLin, fromCache) in enumerate(results):
+        if verbose:
+            if nLin>0:
+                print('       Lin. files: {} ({}){}'.format(lin_file_fmt, nLin, ' (cached)' if fromCache else ''))
+            else:
+                print('[WARN] Lin. files: {} ({})'.format(lin_file_fmt, nLin))
     return MBC
 
-
+def _runMBC(args):
+    """ Run MBC for one operating point. Returns (MBC, lin_file_fmt, number of lin files, fromCache) """
+    import pickle
+    fstfile, cache = args
+    filebase, ext = os.path.splitext(fstfile)
+    lin_file_fmt    = '{}.*.lin'.format(filebase)
+    lin_files       = glob.glob(lin_file_fmt)
+    if len(lin_files)==0:
+        return None, lin_file_fmt, 0, False
+    # --- Reuse the results if the lin files are unchanged
+    cacheFile = filebase+'.MBC.pkl'
+    signature = [(os.path.basename(f), os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in sorted(lin_files)]
+    if cache and os.path.exists(cacheFile):
+        try:
+            with open(cacheFile, 'rb') as fid:
+                data = pickle.load(fid)
+            if data['signature']==signature:
+                return data['MBC'], lin_file_fmt, len(lin_files), True
+        except Exception:
+            pass # corrupted or incompatible cache, it is rewritten below
+    # --- run MBC3 and campbell post_pro on lin files 
+    MBC, matData, FAST_linData = mbc.fx_mbc3(lin_files, verbose=False)
+    if cache:
+        try:
+            with open(cacheFile, 'wb') as fid:
+                pickle.dump({'signature':signature, 'MBC':MBC}, fid, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            print('[WARN] Unable to write MBC cache file: {}'.format(cacheFile))
+    return MBC, lin_file_fmt, len(lin_files), False
 
 def campbellData2TXT(CD, nFreqOut=15, txtFileName=None):
     """ Write frequencies, damping, and mode contents for each operating points to a string
@@ -35,10 +35,12 @@ def handleRemoveReadonlyWin(func, path, exc_info):
         raise
 
 
-def copyTree(src, dst):
+def copyTree(src, dst, linkMode=None):
     """ 
     Copy a directory to another one, overwritting files if necessary.
     copy_tree from distutils and copytree from shutil fail on Windows (in particular on git files)
+
+    linkMode: None: files are copied, 'hardlink' or 'symlink': files are linked instead of copied
     """
     def forceMergeFlatDir(srcDir, dstDir):
         if not os.path.exists(dstDir):
@@ -49,10 +51,21 @@ def copyTree(src, dst):
             forceCopyFile(srcFile, dstFile)
 
     def forceCopyFile (sfile, dfile):
-        # ---- Handling error due to wrong mod
-        if os.path.isfile(dfile):
-            if not os.access(dfile, os.W_OK):
+        if os.path.lexists(dfile):
+            if linkMode is not None or os.path.islink(dfile) or os.stat(dfile).st_nlink>1:
+                # Links share their content and mode with the template files, they are replaced
+                os.remove(dfile)
+            elif not os.access(dfile, os.W_OK):
+                # ---- Handling error due to wrong mod
                 os.chmod(dfile, stat.S_IWUSR)
+        if linkMode is not None:
+            if linkMode=='hardlink':
+                os.link(sfile, dfile)
+            elif linkMode=='symlink':
+                os.symlink(os.path.abspath(sfile), dfile)
+            else:
+                raise Exception('Unknown link mode {}, use None, `hardlink` or `symlink`'.format(linkMode))
+            return
         #print(sfile, ' > ', dfile)
         shutil.copy2(sfile, dfile)
 
@@ -73,18 +86,130 @@ def copyTree(src, dst):
         if os.path.isdir(s):
             isRecursive = not isAFlatDir(s)
             if isRecursive:
-                copyTree(s, d)
+                copyTree(s, d, linkMode=linkMode)
             else:
                 forceMergeFlatDir(s, d)
 
 
-def templateReplaceGeneral(PARAMS, templateDir=None, outputDir=None, main_file=None, removeAllowed=False, removeRefSubFiles=False, oneSimPerDir=False):
+def _rebaseFileName(org_filename, workDir, strID):
+    split = os.path.splitext(org_filename)
+    new_filename_full = os.path.join(workDir,split[0]+'_'+strID+split[1])
+    new_filename      = os.path.relpath(new_filename_full,workDir).replace('\\','/')
+    return new_filename, new_filename_full
+
+def _splitAddress(sAddress):
+    sp = sAddress.split('|')
+    if len(sp)==1:
+        return sp[0],[]
+    else:
+        return sp[0],sp[1:]
+
+def _getStrID(p) :
+    if '__name__' in p.keys():
+        strID=p['__name__']
+    else:
+        raise Exception('When calling `templateReplace`, provide the key `__name_` in the parameter dictionaries')
+    return strID
+
+def _replaceRecurse(templatename_or_newname, FileKey, ParamKey, ParamValue, Files, strID, workDir, TemplateFiles, rootDir):
+    """ 
+    FileKey: a single key defining which file we are currently modifying e.g. :'AeroFile', 'EDFile','FVWInputFileName'
+    ParamKey: the address key of the parameter to be changed, relative to the current FileKey
+              e.g. 'EDFile|IntMethod' (if FileKey is '') 
+                   'IntMethod' (if FileKey is 'EDFile') 
+    ParamValue: the value to be used
+    Files: dict of files, as returned by weio, keys are "FileKeys" 
+    rootDir: directory where the main file is written
+    """
+    # --- Special handling for the root
+    if FileKey=='':
+        FileKey='Root'
+    # --- Open (or get if already open) file where a parameter needs to be changed
+    if FileKey in Files.keys():
+        # The file was already opened, it's stored
+        f = Files[FileKey]
+        newfilename_full = f.filename
+        newfilename      = os.path.relpath(newfilename_full,workDir).replace('\\','/')
+
+    else:
+        templatefilename              = templatename_or_newname
+        templatefilename_full         = os.path.join(workDir,templatefilename)
+        TemplateFiles.append(templatefilename_full)
+        if FileKey=='Root':
+            # Root files, we start from strID
+            ext = os.path.splitext(templatefilename)[-1]
+            newfilename_full = os.path.join(rootDir,strID+ext)
+            newfilename      = strID+ext
+        else:
+            newfilename, newfilename_full = _rebaseFileName(templatefilename, workDir, strID)
+        # Open the template file for that filekey (parsed once for all cases), it's written to the new file at the end
+        f = fi.readCached(templatefilename_full)
+        f.filename = newfilename_full
+        Files[FileKey]=f # store it
+
+    # --- Changing parameters in that file
+    NewFileKey_or_Key, ChildrenKeys = _splitAddress(ParamKey)
+    if len(ChildrenKeys)==0:
+        # A simple parameter is changed 
+        Key    = NewFileKey_or_Key
+        #print('Setting', FileKey, '|',Key, 'to',ParamValue)
+        if Key=='OutList':
+            OutList=f[Key]
+            f[Key]=addToOutlist(OutList, ParamValue)
+        else:
+            f[Key] = ParamValue
+    else:
+        # Parameters needs to be changed in subfiles (children)
+        NewFileKey                = NewFileKey_or_Key
+        ChildrenKey            = '|'.join(ChildrenKeys)
+        child_templatefilename = f[NewFileKey].strip('"') # old filename that will be used as a template
+        baseparent = os.path.dirname(newfilename)
+        #print('Child templatefilename:',child_templatefilename)
+        #print('Parent base dir       :',baseparent)
+        workDir = os.path.join(workDir, baseparent)
+
+        #  
+        newchildFilename, Files = _replaceRecurse(child_templatefilename, NewFileKey, ChildrenKey, ParamValue, Files, strID, workDir, TemplateFiles, rootDir)
+        #print('Setting', FileKey, '|',NewFileKey, 'to',newchildFilename)
+        f[NewFileKey] = '"'+newchildFilename+'"'
+
+    return newfilename, Files
+
+def _generateCase(args):
+    """ Generate the input files of one case, returns the main file, the files written and the template files used """
+    wd, p, main_file_base = args
+    strID = _getStrID(p)
+    # --- Setting up files for this simulation
+    Files=dict()
+    TemplateFiles=[]
+    for k,v in p.items():
+        if k =='__index__' or k=='__name__':
+            continue
+        new_mainFile, Files = _replaceRecurse(main_file_base, '', k, v, Files, strID, wd, TemplateFiles, wd)
+
+    # --- Writting files
+    mainFile = None
+    written  = []
+    for k,f in Files.items():
+        if k=='Root':
+            mainFile = f.filename
+        # Linked files (see copyTree) are never written to
+        if os.path.islink(f.filename) or (os.path.exists(f.filename) and os.stat(f.filename).st_nlink>1):
+            os.remove(f.filename)
+        f.write()
+        written.append(f.filename)
+    return mainFile, written, TemplateFiles
+
+
+def templateReplaceGeneral(PARAMS, templateDir=None, outputDir=None, main_file=None, removeAllowed=False, removeRefSubFiles=False, oneSimPerDir=False,
+        parallel=False, nCores=None, linkMode=None, manifestFile=None):
     """ Generate inputs files by replacing different parameters from a template file.
     The generated files are placed in the output directory `outputDir` 
     The files are read and written using the library `weio`. 
     The template file is read and its content can be changed like a dictionary.
     Each item of `PARAMS` correspond to a set of parameters that will be replaced
     in the template file to generate one input file.
+    Only the files that are modified are written for each case, the other files are shared with the template.
 
     For "FAST" input files, parameters can be changed recursively.
     
@@ -99,99 +224,15 @@ def templateReplaceGeneral(PARAMS, templateDir=None, outputDir=None, main_file=N
                       before doing the parametric substitution
 
       outputDir  : directory where files will be generated. 
-    """
-    # --- Helper functions
-    def rebase_rel(wd,s,sid):
-        split = os.path.splitext(s)
-        return os.path.join(wd,split[0]+sid+split[1])
-
-    def get_strID(p) :
-        if '__name__' in p.keys():
-            strID=p['__name__']
-        else:
-            raise Exception('When calling `templateReplace`, provide the key `__name_` in the parameter dictionaries')
-        return strID
-
-    def splitAddress(sAddress):
-        sp = sAddress.split('|')
-        if len(sp)==1:
-            return sp[0],[]
-        else:
-            return sp[0],sp[1:]
-
-    def rebaseFileName(org_filename, workDir, strID):
-            new_filename_full = rebase_rel(workDir, org_filename,'_'+strID)
-            new_filename      = os.path.relpath(new_filename_full,workDir).replace('\\','/')
-            return new_filename, new_filename_full
-
-    def replaceRecurse(templatename_or_newname, FileKey, ParamKey, ParamValue, Files, strID, workDir, TemplateFiles):
-        """ 
-        FileKey: a single key defining which file we are currently modifying e.g. :'AeroFile', 'EDFile','FVWInputFileName'
-        ParamKey: the address key of the parameter to be changed, relative to the current FileKey
-                  e.g. 'EDFile|IntMethod' (if FileKey is '') 
-                       'IntMethod' (if FileKey is 'EDFile') 
-        ParamValue: the value to be used
-        Files: dict of files, as returned by weio, keys are "FileKeys" 
-        """
-        # --- Special handling for the root
-        if FileKey=='':
-            FileKey='Root'
-        # --- Open (or get if already open) file where a parameter needs to be changed
-        if FileKey in Files.keys():
-            # The file was already opened, it's stored
-            f = Files[FileKey]
-            newfilename_full = f.filename
-            newfilename      = os.path.relpath(newfilename_full,workDir).replace('\\','/')
-
-        else:
-            templatefilename              = templatename_or_newname
-            templatefilename_full         = os.path.join(workDir,templatefilename)
-            TemplateFiles.append(templatefilename_full)
-            if FileKey=='Root':
-                # Root files, we start from strID
-                ext = os.path.splitext(templatefilename)[-1]
-                newfilename_full = os.path.join(wd,strID+ext)
-                newfilename      = strID+ext
-            else:
-                newfilename, newfilename_full = rebaseFileName(templatefilename, workDir, strID)
-            #print('--------------------------------------------------------------')
-            #print('TemplateFile    :', templatefilename)
-            #print('TemplateFileFull:', templatefilename_full)
-            #print('NewFile         :', newfilename)
-            #print('NewFileFull     :', newfilename_full)
-            shutil.copyfile(templatefilename_full, newfilename_full)
-            f= fi.FASTInputFile(newfilename_full) # open the template file for that filekey 
-            Files[FileKey]=f # store it
-
-        # --- Changing parameters in that file
-        NewFileKey_or_Key, ChildrenKeys = splitAddress(ParamKey)
-        if len(ChildrenKeys)==0:
-            # A simple parameter is changed 
-            Key    = NewFileKey_or_Key
-            #print('Setting', FileKey, '|',Key, 'to',ParamValue)
-            if Key=='OutList':
-                OutList=f[Key]
-                f[Key]=addToOutlist(OutList, ParamValue)
-            else:
-                f[Key] = ParamValue
-        else:
-            # Parameters needs to be changed in subfiles (children)
-            NewFileKey                = NewFileKey_or_Key
-            ChildrenKey            = '|'.join(ChildrenKeys)
-            child_templatefilename = f[NewFileKey].strip('"') # old filename that will be used as a template
-            baseparent = os.path.dirname(newfilename)
-            #print('Child templatefilename:',child_templatefilename)
-            #print('Parent base dir       :',baseparent)
-            workDir = os.path.join(workDir, baseparent)
 
-            #  
-            newchildFilename, Files = replaceRecurse(child_templatefilename, NewFileKey, ChildrenKey, ParamValue, Files, strID, workDir, TemplateFiles)
-            #print('Setting', FileKey, '|',NewFileKey, 'to',newchildFilename)
-            f[NewFileKey] = '"'+newchildFilename+'"'
-
-        return newfilename, Files
+      parallel   : if True, the cases are generated in parallel using `nCores` processes (default: number of cpus)
 
+      linkMode   : None: the template directory is copied, 
+                   'hardlink' or 'symlink': the files of the template directory are linked instead of copied
+                   (useful with `oneSimPerDir`, where the template is copied for each case)
 
+      manifestFile: if provided, a csv file listing the files generated for each case
+    """
     # --- Safety checks
     if templateDir is None and outputDir is None:
         raise Exception('Provide at least a template directory OR an output directory')
@@ -217,7 +258,7 @@ def templateReplaceGeneral(PARAMS, templateDir=None, outputDir=None, main_file=N
         PARAMS=[PARAMS]
 
     if oneSimPerDir:
-        workDirS=[os.path.join(outputDir,get_strID(p)) for p in PARAMS]
+        workDirS=[os.path.join(outputDir,_getStrID(p)) for p in PARAMS]
     else:
         workDirS=[outputDir]*len(PARAMS)
     # --- Creating outputDir - Copying template folder to outputDir if necessary
@@ -227,31 +268,41 @@ def templateReplaceGeneral(PARAMS, templateDir=None, outputDir=None, main_file=N
             removeFASTOuputs(wd)
         if os.path.exists(wd) and removeAllowed:
             shutil.rmtree(wd, ignore_errors=False, onerror=handleRemoveReadonlyWin)
-        copyTree(templateDir, wd)
+        copyTree(templateDir, wd, linkMode=linkMode)
         if removeAllowed:
             removeFASTOuputs(wd)
 
 
-    TemplateFiles=[]
-    files=[]
-    for ip,(wd,p) in enumerate(zip(workDirS,PARAMS)):
+    main_file_base = os.path.basename(main_file)
+    for ip,p in enumerate(PARAMS):
         if '__index__' not in p.keys():
             p['__index__']=ip
+    args = [(wd, p, main_file_base) for wd,p in zip(workDirS,PARAMS)]
+    if parallel and len(PARAMS)>1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if nCores is None:
+            nCores=multiprocessing.cpu_count()
+        nCores = max(min(nCores, len(PARAMS)), 1)
+        with ProcessPoolExecutor(max_workers=nCores) as executor:
+            results = list(executor.map(_generateCase, args, chunksize=max(len(args)//(4*nCores),1)))
+    else:
+        results = [_generateCase(a) for a in args]
 
-        main_file_base = os.path.basename(main_file)
-        strID          = get_strID(p)
-        # --- Setting up files for this simulation
-        Files=dict()
-        for k,v in p.items():
-            if k =='__index__' or k=='__name__':
-                continue
-            new_mainFile, Files = replaceRecurse(main_file_base, '', k, v, Files, strID, wd, TemplateFiles)
-
-        # --- Writting files
-        for k,f in Files.items():
-            if k=='Root':
-                files.append(f.filename)
-            f.write()
+    files=[]
+    TemplateFiles=[]
+    for mainFile, written, templates in results:
+        if mainFile is not None:
+            files.append(mainFile)
+        TemplateFiles += templates
+
+    # --- Manifest
+    if manifestFile is not None:
+        rows = []
+        for p, (mainFile, written, _) in zip(PARAMS, results):
+            for fw in written:
+                rows.append({'Index':p['__index__'], 'Name':p['__name__'], 'MainFile':mainFile, 'File':fw})
+        pd.DataFrame(rows, columns=['Index','Name','MainFile','File']).to_csv(manifestFile, index=False)
 
     # --- Remove extra files at the end
     if removeRefSubFiles:
@@ -267,9 +318,10 @@ def templateReplaceGeneral(PARAMS, templateDir=None, outputDir=None, main_file=N
                 pass
     return files
 
-def templateReplace(PARAMS, templateDir, outputDir=None, main_file=None, removeAllowed=False, removeRefSubFiles=False, oneSimPerDir=False):
+def templateReplace(PARAMS, templateDir, outputDir=None, main_file=None, removeAllowed=False, removeRefSubFiles=False, oneSimPerDir=False, **kwargs):
     """ Replace parameters in a fast folder using a list of dictionaries where the keys are for instance:
         'DT', 'EDFile|GBRatio', 'ServoFile|GenEff'
+    See templateReplaceGeneral for the other options (e.g. parallel, linkMode, manifestFile)
     """
     # --- For backward compatibility, remove "FAST|" from the keys
     for p in PARAMS:
@@ -279,7 +331,7 @@ def templateReplace(PARAMS, templateDir, outputDir=None, main_file=None, removeA
             p[k_new] = p.pop(k_old)
     
     return templateReplaceGeneral(PARAMS, templateDir, outputDir=outputDir, main_file=main_file, 
-            removeAllowed=removeAllowed, removeRefSubFiles=removeRefSubFiles, oneSimPerDir=oneSimPerDir)
+            removeAllowed=removeAllowed, removeRefSubFiles=removeRefSubFiles, oneSimPerDir=oneSimPerDir, **kwargs)
 
 def removeFASTOuputs(workDir):
     # Cleaning folder
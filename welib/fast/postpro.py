@@ -9,6 +9,7 @@ import re
 from welib.weio.fast_input_file import FASTInputFile
 from welib.weio.fast_output_file import FASTOutputFile
 from welib.weio.fast_input_deck import FASTInputDeck
+from welib.tools.stats import bin_DF, azimuthal_average_DF
 # from pyFAST.input_output.fast_input_file import FASTInputFile
 # from pyFAST.input_output.fast_output_file import FASTOutputFile
 # from pyFAST.input_output.fast_input_deck import FASTInputDeck
@@ -251,11 +252,20 @@ def insert_radial_columns(df, vr=None, R=None, IR=None):
     if df.shape[1]==0:
         return None
     nrMax=len(df)
+    (c0,v0), ColsEnd = _radial_columns(nrMax, vr=vr, R=R, IR=IR)
+    df.insert(0, c0, v0)
+    for c,v in ColsEnd:
+        df[c]=v
+    return df
+
+def _radial_columns(nrMax, vr=None, R=None, IR=None):
+    """ Returns the radial columns inserted by `insert_radial_columns`, 
+    as a tuple (name, values) for the first column, and a list of tuples for the last columns """
     ids=np.arange(nrMax)
     if vr is None or R is None:
         # Radial position unknown
         vr_bar = ids/(nrMax-1)
-        df.insert(0, 'i/n_[-]', vr_bar)
+        col0 = ('i/n_[-]', vr_bar)
     else:
         vr_bar=vr/R
         if (nrMax)<=len(vr_bar):
@@ -263,14 +273,14 @@ def insert_radial_columns(df, vr=None, R=None, IR=None):
         elif (nrMax)>len(vr_bar):
             print(vr_bar)
             raise Exception('Inconsitent length between radial stations ({:d}) and max index present in output chanels ({:d})'.format(len(vr_bar),nrMax))
-        df.insert(0, 'r/R_[-]', vr_bar)
-
+        col0 = ('r/R_[-]', vr_bar)
+    ColsEnd=[]
     if IR is not None:
-        df['Node_[#]']=IR[:nrMax]
-    df['i_[#]']=ids+1
+        ColsEnd.append(('Node_[#]', IR[:nrMax]))
+    ColsEnd.append(('i_[#]', ids+1))
     if vr is not None:
-        df['r_[m]'] = vr[:nrMax]
-    return df
+        ColsEnd.append(('r_[m]', vr[:nrMax]))
+    return col0, ColsEnd
 
 def find_matching_columns(Cols, PatternMap):
     ColsInfo=[]
@@ -445,40 +455,170 @@ def spanwiseColAD(Cols):
 
     return find_matching_columns(Cols, ADSpanMap)
 
+class SpanwiseIndex():
+    """ 
+    Index of the spanwise columns (e.g. AB1N001Alpha_[deg]) present in a list of columns.
+    The regular expressions are evaluated only once, and the index maps (module, blade, node, variable)
+    to column positions, such that full time series can be gathered into numpy arrays.
+
+    Example:
+        index = SpanwiseIndex(df.columns)
+        A = index.gather(df.values, 'AD')           # nt x nB x nr x nVar
+        iVar = index.variables('AD').index('Cl_[-]')
+        Cl_B1 = A[:, 0, :, iVar]                    # nt x nr
+    """
+    def __init__(self, Cols):
+        self.columns = list(Cols)
+        self.modules = {}
+        for module, spanwiseCol in [('AD', spanwiseColAD), ('ED', spanwiseColED), ('BD', spanwiseColBD)]:
+            ColsInfo, nrMax = spanwiseCol(self.columns)
+            self.modules[module] = self._buildModule(ColsInfo, nrMax)
+
+    def _buildModule(self, ColsInfo, nrMax):
+        colPos = {c:i for i,c in reversed(list(enumerate(self.columns)))} # first occurrence
+        # Same ordering as `extract_spanwise_data`
+        Isort = sorted(range(len(ColsInfo)), key=lambda ic: ColsInfo[ic]['name'])
+        names = [ColsInfo[ic]['name'] for ic in Isort]
+        I = -np.ones((nrMax, len(names)), dtype=int)
+        for j, ic in enumerate(Isort):
+            for idx, col in zip(ColsInfo[ic]['Idx'], ColsInfo[ic]['cols']):
+                I[idx-1, j] = colPos[col]
+        # Blades and variables
+        blades    = []
+        variables = []
+        BV = []
+        for n in names:
+            m = re.match(r'^B(\d+)(.*)$', n)
+            b, v = (int(m.group(1)), m.group(2)) if m else (1, n)
+            if b not in blades:
+                blades.append(b)
+            if v not in variables:
+                variables.append(v)
+            BV.append((b,v))
+        blades.sort()
+        IBlade = -np.ones((len(blades), nrMax, len(variables)), dtype=int)
+        for j, (b,v) in enumerate(BV):
+            IBlade[blades.index(b), :, variables.index(v)] = I[:, j]
+        return {'names':names, 'I':I, 'blades':blades, 'variables':variables, 'IBlade':IBlade}
+
+    def names(self, module):
+        """ Names of the spanwise variables, e.g. 'B1Alpha_[deg]' (same as the columns of `extract_spanwise_data`)"""
+        return self.modules[module]['names']
+
+    def blades(self, module):
+        return self.modules[module]['blades']
+
+    def variables(self, module):
+        """ Names of the spanwise variables without blade prefix, e.g. 'Alpha_[deg]'"""
+        return self.modules[module]['variables']
+
+    def nr(self, module):
+        return self.modules[module]['I'].shape[0]
+
+    def position(self, module, blade, node, variable):
+        """ Column position for a given blade, node (1-based) and variable, None if not present """
+        mod = self.modules[module]
+        if blade not in mod['blades'] or variable not in mod['variables'] or node<1 or node>self.nr(module):
+            return None
+        i = mod['IBlade'][mod['blades'].index(blade), node-1, mod['variables'].index(variable)]
+        return None if i<0 else i
+
+    @staticmethod
+    def _gather(M, I):
+        M = np.asarray(M)
+        oneRow = M.ndim==1
+        M = np.atleast_2d(M)
+        A = M[:, np.where(I<0, 0, I)].astype(float)
+        A[:, I<0] = np.nan
+        return A[0] if oneRow else A
+
+    def gather(self, M, module):
+        """ Returns an array of shape (nt x nB x nr x nVar) from a matrix M (nt x nColumns), NaN for missing data 
+        (or nB x nr x nVar for a single row)"""
+        return self._gather(M, self.modules[module]['IBlade'])
+
+    def gatherNames(self, M, module):
+        """ Returns an array of shape (nt x nr x nNames) from a matrix M (nt x nColumns), see `names` """
+        return self._gather(M, self.modules[module]['I'])
+
+    def toDataFrame(self, ts, module):
+        """ Same as `extract_spanwise_data` for one row (e.g. a time step)"""
+        if len(self.names(module))==0:
+            return None
+        return pd.DataFrame(data=self.gatherNames(ts, module), columns=self.names(module))
+
+    def radialInterp(self, M, module, variable, r, r_ref, blade=1):
+        """ 
+        Interpolate the time series of a variable at radial positions `r`
+        INPUTS:
+         - M: matrix (nt x nColumns)
+         - r: radial positions where data is to be interpolated (scalar or array)
+         - r_ref: radial positions of the nodal data (ascending)
+        OUTPUTS:
+         - time series (nt) or (nt x len(r)) if r is an array
+        """
+        mod = self.modules[module]
+        if variable not in mod['variables']:
+            raise Exception('Variable {} not found for module {}'.format(variable, module))
+        if blade not in mod['blades']:
+            raise Exception('Blade {} not found for module {}'.format(blade, module))
+        I = mod['IBlade'][mod['blades'].index(blade), :, mod['variables'].index(variable)]
+        r_ref = np.asarray(r_ref)
+        if not np.all(r_ref[:-1] <= r_ref[1:]):
+            raise Exception('This function only works for ascending radial values')
+        rs = np.atleast_1d(r)
+        if np.any(rs<np.min(r_ref)) or np.any(rs>np.max(r_ref)):
+            raise Exception('Extrapolation not supported')
+        iBef = np.clip(np.searchsorted(r_ref, rs, side='right')-1, 0, len(r_ref)-2)
+        fact = (rs-r_ref[iBef])/(r_ref[iBef+1]-r_ref[iBef])
+        A = self._gather(np.atleast_2d(M), I[np.concatenate((iBef, iBef+1))])
+        A = A[:,:len(rs)]*(1-fact) + A[:,len(rs):]*fact
+        return A if np.ndim(r)>0 else A[:,0]
+
 def insert_extra_columns_AD(dfRad, tsAvg, vr=None, rho=None, R=None, nB=None, chord=None):
     # --- Compute additional values (AD15 only)
     if dfRad is None:
         return None
     if dfRad.shape[1]==0:
         return dfRad
+    D = {c:dfRad[c].values for c in dfRad.columns}
+    U0 = tsAvg['Wind1VelX_[m/s]'] if 'Wind1VelX_[m/s]' in tsAvg.keys() else None
+    for k,v in _extra_columns_AD(D, U0, len(dfRad), vr=vr, rho=rho, R=R, nB=nB, chord=chord).items():
+        dfRad[k] = v
+    return dfRad
+
+def _extra_columns_AD(D, U0, nr, vr=None, rho=None, R=None, nB=None, chord=None):
+    """ Compute additional AD values from a dictionary of spanwise data D
+    The values in D are arrays of shape (nr) or (nt x nr), and U0 is a scalar or an array (nt x 1).
+    Returns a dictionary of the new (or modified) values """
     if chord is not None:
         if vr is not None:
-            chord =chord[0:len(dfRad)]
+            chord =chord[0:nr]
+    Extra = {}
+    def get(c):
+        return Extra[c] if c in Extra else D[c]
     for sB in ['B1','B2','B3']:
         try:
             vr_bar=vr/R
-            Fx = dfRad[sB+'Fx_[N/m]']
-            U0 = tsAvg['Wind1VelX_[m/s]']
+            Fx = D[sB+'Fx_[N/m]']
             Ct=nB*Fx/(0.5 * rho * 2 * U0**2 * np.pi * vr)
-            Ct[vr<0.01*R] = 0
-            dfRad[sB+'Ctloc_[-]'] = Ct
-            CT=2*np.trapz(vr_bar*Ct,vr_bar)
-            dfRad[sB+'CtAvg_[-]']= CT*np.ones(vr.shape)
+            Ct = np.where(vr<0.01*R, 0, Ct)
+            Extra[sB+'Ctloc_[-]'] = Ct
+            CT=2*np.trapz(vr_bar*Ct,vr_bar, axis=-1)
+            Extra[sB+'CtAvg_[-]']= np.asarray(CT)[...,None]*np.ones(vr.shape)
         except:
             pass
         try:
-            dfRad[sB+'Gamma_[m^2/s]'] = 1/2 * chord*  dfRad[sB+'Vrel_[m/s]'] * dfRad[sB+'Cl_[-]'] 
+            Extra[sB+'Gamma_[m^2/s]'] = 1/2 * chord*  get(sB+'Vrel_[m/s]') * get(sB+'Cl_[-]') 
         except:
             pass
         try: 
-            if not sB+'Vindx_[m/s]' in dfRad.columns:
-                dfRad[sB+'Vindx_[m/s]']= -dfRad[sB+'AxInd_[-]'].values * dfRad[sB+'Vx_[m/s]'].values 
-                dfRad[sB+'Vindy_[m/s]']=  dfRad[sB+'TnInd_[-]'].values * dfRad[sB+'Vy_[m/s]'].values 
+            if not sB+'Vindx_[m/s]' in D.keys():
+                Extra[sB+'Vindx_[m/s]']= -get(sB+'AxInd_[-]') * get(sB+'Vx_[m/s]') 
+                Extra[sB+'Vindy_[m/s]']=  get(sB+'TnInd_[-]') * get(sB+'Vy_[m/s]') 
         except:
             pass
-    return dfRad
-
-
+    return Extra
 
 def spanwisePostPro(FST_In=None,avgMethod='constantwindow',avgParam=5,out_ext='.outb',df=None):
     """
@@ -550,11 +690,15 @@ def spanwisePostPro(FST_In=None,avgMethod='constantwindow',avgParam=5,out_ext='.
 
 
 
-def spanwisePostProRows(df, FST_In=None):
+def spanwisePostProRows(df, FST_In=None, index=None):
     """ 
     Returns a 3D matrix: n x nSpan x nColumn where df is of size n x nColumn
 
-    NOTE: this is really not optimal. Spanwise columns should be extracted only once..
+    The spanwise columns are extracted only once (see `SpanwiseIndex`), and all the rows are gathered at once.
+    INPUTS:
+      - df: dataframe, e.g. time series or azimuthal averages
+      - FST_In: fast input file (.fst)
+      - index: a SpanwiseIndex for the columns of df, to be reused between calls. None: it is computed
     """
     # --- Extract info (e.g. radial positions) from Fast input file
     # We don't have a .fst input file, so we'll rely on some default values for "r"
@@ -562,9 +706,6 @@ def spanwisePostProRows(df, FST_In=None):
     chord       = None
     # --- Extract radial positions of output channels
     r_AD, r_ED, r_BD, IR_AD, IR_ED, IR_BD, R, r_hub, fst = FASTRadialOutputs(FST_In, OutputCols=df.columns.values)
-    #print('r_AD:', r_AD)
-    #print('r_ED:', r_ED)
-    #print('r_BD:', r_BD)
     if R is None: 
         R=1
     try:
@@ -578,46 +719,36 @@ def spanwisePostProRows(df, FST_In=None):
             rho = fst.AD['AirDens']
         except:
             pass
-    # --- Extract radial data for each azimuthal average
-    M_AD=None
-    M_ED=None
-    M_BD=None
-    Col_AD=None
-    Col_ED=None
-    Col_BD=None
-    v = df.index.values
-
     # --- Getting Column info
-    Cols=df.columns.values
+    if index is None:
+        index = SpanwiseIndex(df.columns.values)
+    M = df.values
+
+    def _rows(module, vr, IR, extraAD=False):
+        if len(index.names(module))==0:
+            return None, None
+        A = index.gatherNames(M, module) # n x nr x nNames
+        D = {c:A[:,:,j] for j,c in enumerate(index.names(module))}
+        if extraAD:
+            U0 = M[:, index.columns.index('Wind1VelX_[m/s]'), None] if 'Wind1VelX_[m/s]' in index.columns else None
+            D.update(_extra_columns_AD(D, U0, A.shape[1], vr=vr, rho=rho, R=R, nB=3, chord=chord))
+        (c0,v0), ColsEnd = _radial_columns(A.shape[1], vr=vr, R=R, IR=IR)
+        Cols = [c0] + list(D.keys()) + [c for c,_ in ColsEnd]
+        D[c0] = v0
+        D.update(ColsEnd)
+        MM = np.stack([np.broadcast_to(D[c], A.shape[:2]) for c in Cols], axis=-1).astype(float)
+        return MM, np.array(Cols, dtype=object)
+
+    # --- Extract radial data for all rows
+    M_AD, Col_AD = None, None
+    M_ED, Col_ED = None, None
+    M_BD, Col_BD = None, None
     if r_AD is not None:
-        ColsInfoAD, nrMaxAD = spanwiseColAD(Cols)
-    if r_ED is not None:
-        ColsInfoED, nrMaxED = spanwiseColED(Cols)
-    if r_BD is not None:
-        ColsInfoBD, nrMaxBD = spanwiseColBD(Cols)
-    for i,val in enumerate(v):
-        if r_AD is not None:
-            dfRad_AD = extract_spanwise_data(ColsInfoAD, nrMaxAD, df=None, ts=df.iloc[i])
-            dfRad_AD = insert_extra_columns_AD(dfRad_AD, df.iloc[i], vr=r_AD, rho=rho, R=R, nB=3, chord=chord)
-            dfRad_AD = insert_radial_columns(dfRad_AD, r_AD, R=R, IR=IR_AD)
-            if i==0:
-                M_AD = np.zeros((len(v), len(dfRad_AD), len(dfRad_AD.columns)))
-                Col_AD=dfRad_AD.columns.values
-            M_AD[i, :, : ] = dfRad_AD.values
-        if r_ED is not None and len(r_ED)>0:
-            dfRad_ED = extract_spanwise_data(ColsInfoED, nrMaxED, df=None, ts=df.iloc[i])
-            dfRad_ED = insert_radial_columns(dfRad_ED, r_ED, R=R, IR=IR_ED)
-            if i==0:
-                M_ED = np.zeros((len(v), len(dfRad_ED), len(dfRad_ED.columns)))
-                Col_ED=dfRad_ED.columns.values
-            M_ED[i, :, : ] = dfRad_ED.values
-        if r_BD is not None and len(r_BD)>0:
-            dfRad_BD = extract_spanwise_data(ColsInfoBD, nrMaxBD, df=None, ts=df.iloc[i])
-            dfRad_BD = insert_radial_columns(dfRad_BD, r_BD, R=R, IR=IR_BD)
-            if i==0:
-                M_BD = np.zeros((len(v), len(dfRad_BD), len(dfRad_BD.columns)))
-                Col_BD=dfRad_BD.columns.values
-            M_BD[i, :, : ] = dfRad_BD.values
+        M_AD, Col_AD = _rows('AD', r_AD, IR_AD, extraAD=True)
+    if r_ED is not None and len(r_ED)>0:
+        M_ED, Col_ED = _rows('ED', r_ED, IR_ED)
+    if r_BD is not None and len(r_BD)>0:
+        M_BD, Col_BD = _rows('BD', r_BD, IR_BD)
     return M_AD, Col_AD, M_ED, Col_ED, M_BD, Col_BD
 
 
@@ -1005,60 +1136,20 @@ def radialInterpTS(df, r, varName, r_ref, blade=1, bldFmt='AB{:d}', ndFmt='N{:03
 
 def bin_mean_DF(df, xbins, colBin ):
     """ 
-    Perform bin averaging of a dataframe
+    Perform bin averaging of a dataframe, see welib.tools.stats.bin_DF and BinAccumulator
     """
-    if colBin not in df.columns.values:
-        raise Exception('The column `{}` does not appear to be in the dataframe'.format(colBin))
-    xmid      = (xbins[:-1]+xbins[1:])/2
-    df['Bin'] = pd.cut(df[colBin], bins=xbins, labels=xmid ) # Adding a column that has bin attribute
-    df2       = df.groupby('Bin').mean()                     # Average by bin
-    # also counting
-    df['Counts'] = 1
-    dfCount=df[['Counts','Bin']].groupby('Bin').sum()
-    df2['Counts'] = dfCount['Counts']
-    # Just in case some bins are missing (will be nan)
-    df2       = df2.reindex(xmid)
-    return df2
-
-def azimuthal_average_DF(df, psiBin=None, colPsi='Azimuth_[deg]', tStart=None, colTime='Time_[s]'):
-    """ 
-    Average a dataframe based on azimuthal value
-    Returns a dataframe with same amount of columns as input, and azimuthal values as index
-    """
-    if psiBin is None: 
-        psiBin = np.arange(0,360+1,10)
-
-    if tStart is not None:
-        if colTime not in df.columns.values:
-            raise Exception('The column `{}` does not appear to be in the dataframe'.format(colTime))
-        df=df[ df[colTime]>tStart].copy()
+    return bin_DF(df, xbins, colBin)
 
-    dfPsi= bin_mean_DF(df, psiBin, colPsi)
-    if np.any(dfPsi['Counts']<1):
-        print('[WARN] some bins have no data! Increase the bin size.')
 
-    return dfPsi
-
-
-def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColSort=None,stats=['mean']):
+def averagingWindow(time, psi=None, rpm=None, avgMethod='periods', avgParam=None):
     """
-    See average PostPro for documentation, same interface, just does it for one dataframe
+    Returns the time window (tStart, tEnd) used for the statistics, see `averagePostPro` for `avgMethod` and `avgParam`
+    INPUTS:
+      - time: time vector
+      - psi: azimuth vector [deg], needed for avgMethod='periods'
+      - rpm: rotational speed vector [rpm], needed for avgMethod='periods_omega'
     """
-    def renameCol(x):
-        for k,v in ColMap.items():
-            if x==v:
-                return k
-        return x
-    # Before doing the colomn map we store the time
-    time = df['Time_[s]'].values
     timenoNA = time[~np.isnan(time)]
-    # Column mapping
-    if ColMap is not None:
-        ColMapMiss = [v for _,v in ColMap.items() if v not in df.columns.values]
-        if len(ColMapMiss)>0:
-            print('[WARN] Signals missing and omitted for ColMap:\n       '+'\n       '.join(ColMapMiss))
-        df.rename(columns=renameCol,inplace=True)
-    ## Defining a window for stats (start time and end time)
     if avgMethod.lower()=='constantwindow':
         tEnd = timenoNA[-1]
         if avgParam is None:
@@ -1067,10 +1158,9 @@ def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColS
             tStart =tEnd-avgParam
     elif avgMethod.lower()=='periods':
         # --- Using azimuth to find periods
-        if 'Azimuth_[deg]' not in df.columns:
+        if psi is None:
             raise Exception('The sensor `Azimuth_[deg]` does not appear to be in the output file. You cannot use the averaging method by `periods`, use `constantwindow` instead.')
         # NOTE: potentially we could average over each period and then average
-        psi=df['Azimuth_[deg]'].values
         _,iBef = _zero_crossings(psi-psi[-10],direction='up')
         if len(iBef)==0:
             _,iBef = _zero_crossings(psi-180,direction='up')
@@ -1095,10 +1185,11 @@ def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColS
                 tStart=time[iBef[-1-avgParam]]
     elif avgMethod.lower()=='periods_omega':
         # --- Using average omega to find periods
-        if 'RotSpeed_[rpm]' not in df.columns:
+        if rpm is None:
             raise Exception('The sensor `RotSpeed_[rpm]` does not appear to be in the output file. You cannot use the averaging method by `periods_omega`, use `periods` or `constantwindow` instead.')
-        Omega=df['RotSpeed_[rpm]'].mean()/60*2*np.pi
+        Omega=np.nanmean(rpm)/60*2*np.pi
         Period = 2*np.pi/Omega 
+        tEnd = timenoNA[-1]
         if avgParam is None:
             nRotations=np.floor(tEnd/Period)
         else:
@@ -1106,6 +1197,90 @@ def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColS
         tStart =tEnd-Period*nRotations
     else:
         raise Exception('Unknown averaging method {}'.format(avgMethod))
+    return tStart, tEnd
+
+
+def statColumns(columns, stats=['mean']):
+    """ Returns the column names of the table returned by `averageDF` for a given list of stats.
+    The mean values keep the original column names, the other statistics are suffixed, e.g. `RotSpeed_[rpm]_std` """
+    return [c if s=='mean' else '{}_{}'.format(c,s) for s in stats for c in columns]
+
+
+def windowStats(M, time=None, stats=['mean']):
+    """ 
+    Compute statistics of the columns of a 2D array, NaN values are ignored (like pandas).
+    INPUTS:
+      - M: array (nt x nColumns) 
+      - time: time vector of the rows of M, needed for the DEL (used for the equivalent number of cycles, 1Hz)
+      - stats: list of statistics among:
+           'mean', 'std', 'min', 'max', 
+           'pXX'    : percentile XX (e.g. 'p5', 'p99.9')
+           'DEL' or 'DELXX': damage equivalent load for a Wohler exponent XX (default: 10)
+    OUTPUTS:
+      - values: array of length len(stats)*nColumns, ordered by stats (see `statColumns`)
+    """
+    M = np.asarray(M, dtype=float)
+    hasNaN = np.isnan(M).any()
+    nt, nc = M.shape
+    values = []
+    with np.errstate(all='ignore'):
+        import warnings
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning) # all-NaN columns
+            for s in stats:
+                sl = s.lower()
+                if nt==0:
+                    v = np.full(nc, np.nan)
+                elif sl=='mean':
+                    v = np.nanmean(M, axis=0) if hasNaN else np.mean(M, axis=0)
+                elif sl=='std':
+                    v = np.nanstd(M, axis=0, ddof=1) if hasNaN else np.std(M, axis=0, ddof=1)
+                elif sl=='min':
+                    v = np.nanmin(M, axis=0) if hasNaN else np.min(M, axis=0)
+                elif sl=='max':
+                    v = np.nanmax(M, axis=0) if hasNaN else np.max(M, axis=0)
+                elif sl.startswith('p'):
+                    q = float(s[1:])
+                    v = np.nanpercentile(M, q, axis=0) if hasNaN else np.percentile(M, q, axis=0)
+                elif sl.startswith('del'):
+                    from welib.tools.fatigue import eq_load
+                    m = float(s[3:]) if len(s)>3 else 10
+                    if time is None:
+                        raise Exception('The time vector is needed to compute the DEL')
+                    T = time[-1]-time[0]
+                    v = np.full(nc, np.nan)
+                    for j in range(nc):
+                        sig = M[:,j]
+                        sig = sig[~np.isnan(sig)]
+                        if len(sig)>1:
+                            v[j] = eq_load(sig, m=[m], neq=T)[0][0]
+                else:
+                    raise NotImplementedError('Statistic {}'.format(s))
+                values.append(v)
+    return np.concatenate(values)
+
+
+def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColSort=None,stats=['mean']):
+    """
+    See average PostPro for documentation, same interface, just does it for one dataframe
+    """
+    def renameCol(x):
+        for k,v in ColMap.items():
+            if x==v:
+                return k
+        return x
+    # Before doing the colomn map we store the time
+    time = df['Time_[s]'].values
+    # Column mapping
+    if ColMap is not None:
+        ColMapMiss = [v for _,v in ColMap.items() if v not in df.columns.values]
+        if len(ColMapMiss)>0:
+            print('[WARN] Signals missing and omitted for ColMap:\n       '+'\n       '.join(ColMapMiss))
+        df.rename(columns=renameCol,inplace=True)
+    ## Defining a window for stats (start time and end time)
+    psi = df['Azimuth_[deg]'].values  if 'Azimuth_[deg]'  in df.columns else None
+    rpm = df['RotSpeed_[rpm]'].values if 'RotSpeed_[rpm]' in df.columns else None
+    tStart, tEnd = averagingWindow(time, psi=psi, rpm=rpm, avgMethod=avgMethod, avgParam=avgParam)
     # Narrowind number of columns here (azimuth needed above)
     if ColKeep is not None:
         ColKeepSafe = [c for c in ColKeep if c in df.columns.values]
@@ -1116,31 +1291,45 @@ def averageDF(df,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColS
     if tStart<time[0]:
         print('[WARN] Simulation time ({}) too short compared to required averaging window ({})!'.format(tEnd-time[0],tStart-tEnd))
     IWindow    = np.where((time>=tStart) & (time<=tEnd) & (~np.isnan(time)))[0]
-    iEnd   = IWindow[-1]
-    iStart = IWindow[0]
-    ## Absolute and relative differences at window extremities
-    DeltaValuesAbs=(df.iloc[iEnd]-df.iloc[iStart]).abs()
-#         DeltaValuesRel=(df.iloc[iEnd]-df.iloc[iStart]).abs()/df.iloc[iEnd]
-    DeltaValuesRel=(df.iloc[IWindow].max()-df.iloc[IWindow].min())/df.iloc[IWindow].mean()
-    #EndValues=df.iloc[iEnd]
-    #if avgMethod.lower()=='periods_omega':
-    #    if DeltaValuesRel['RotSpeed_[rpm]']*100>5:
-    #        print('[WARN] Rotational speed vary more than 5% in averaging window ({}%) for simulation: {}'.format(DeltaValuesRel['RotSpeed_[rpm]']*100,f))
-    ## Stats values during window
-    # MeanValues = df[IWindow].mean()
-    # StdValues  = df[IWindow].std()
-    if 'mean' in stats:
-        MeanValues = pd.DataFrame(df.iloc[IWindow].mean()).transpose()
+    ## Stats values during window, computed on the numpy array of the window
+    if len(IWindow)>0 and IWindow[-1]-IWindow[0]+1==len(IWindow):
+        M = df.values[IWindow[0]:IWindow[-1]+1] # contiguous window, no copy
     else:
-        raise NotImplementedError()
-    return MeanValues
+        M = df.values[IWindow]
+    values = windowStats(M, time=time[IWindow], stats=stats)
+    return pd.DataFrame([values], columns=statColumns(df.columns, stats))
 
 
-
-def averagePostPro(outFiles,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColSort=None,stats=['mean']):
+def _averageFile(args):
+    """ Read one output file (only the needed channels) and compute its statistics.
+    Returns (DataFrame, None) or (None, error message) if the file cannot be read """
+    f, avgMethod, avgParam, ColMap, ColKeep, stats = args
+    try:
+        channels = None
+        if ColKeep is not None:
+            ColMap_ = ColMap if ColMap is not None else {}
+            channels = [ColMap_.get(c, c) for c in ColKeep]
+            channels += [c for c in ColMap_.values() if c not in channels]
+            if avgMethod.lower()=='periods':
+                channels.append('Azimuth_[deg]')
+            elif avgMethod.lower()=='periods_omega':
+                channels.append('RotSpeed_[rpm]')
+        try:
+            df = FASTOutputFile(f, channels=channels).toDataFrame()
+        except Exception:
+            if channels is None:
+                raise
+            df = FASTOutputFile(f).toDataFrame() # some channels are missing, averageDF will report them
+    except Exception as e:
+        return None, '{}: {}'.format(type(e).__name__, e)
+    return averageDF(df, avgMethod=avgMethod, avgParam=avgParam, ColMap=ColMap, ColKeep=ColKeep, stats=stats), None
+
+
+def averagePostPro(outFiles,avgMethod='periods',avgParam=None,ColMap=None,ColKeep=None,ColSort=None,stats=['mean'],
+        parallel=False, nCores=None):
     """ Opens a list of FAST output files, perform average of its signals and return a panda dataframe
-    For now, the scripts only computes the mean within a time window which may be a constant or a time that is a function of the rotational speed (see `avgMethod`).
-    The script only computes the mean for now. Other stats will be added
+    The statistics are computed within a time window which may be a constant or a time that is a function of the rotational speed (see `avgMethod`).
+    Only the channels needed are read (when `ColKeep` is provided), and the files may be processed by a pool of processes (see `parallel`).
 
     `ColMap` :  dictionary where the key is the new column name, and v the old column name.
                 Default: None, output is not sorted
@@ -1159,34 +1348,44 @@ def averagePostPro(outFiles,avgMethod='periods',avgParam=None,ColMap=None,ColKee
                    Default: None, as many period as possible are used
                 - for 'constantwindow': the number of seconds for the window
                    Default: None, full simulation length is used
+    `stats`   : list of statistics, among 'mean', 'std', 'min', 'max', 'pXX' (percentile), 'DELXX' (see `windowStats`).
+                The mean values keep the original column names, other statistics are suffixed (see `statColumns`)
+    `parallel`: if True, the files are processed using a pool of processes (default: False, serial)
+    `nCores`  : number of processes. None: number of cpus
     """
+    args = [(f, avgMethod, avgParam, ColMap, ColKeep, stats) for f in outFiles]
+    if parallel and len(outFiles)>1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if nCores is None:
+            nCores = multiprocessing.cpu_count()
+        nCores    = max(min(nCores, len(outFiles)), 1)
+        chunksize = max(len(outFiles)//(4*nCores), 1)
+        with ProcessPoolExecutor(max_workers=nCores) as executor:
+            results = list(executor.map(_averageFile, args, chunksize=chunksize))
+    else:
+        results = [_averageFile(a) for a in args]
+
     result=None
     invalidFiles =[]
-    # Loop trough files and populate result
-    for i,f in enumerate(outFiles):
-        try:
-            df=FASTOutputFile(f).toDataFrame()
-        except:
+    for i,(f,(dfStats,err)) in enumerate(zip(outFiles, results)):
+        if dfStats is None:
             invalidFiles.append(f)
             continue
-        postpro=averageDF(df, avgMethod=avgMethod, avgParam=avgParam, ColMap=ColMap, ColKeep=ColKeep,ColSort=ColSort,stats=stats)
-        MeanValues=postpro # todo
         if result is None:
             # We create a dataframe here, now that we know the colums
-            columns = MeanValues.columns
-            result = pd.DataFrame(np.nan, index=np.arange(len(outFiles)), columns=columns)
-        result.iloc[i,:] = MeanValues.copy().values
-
-    if ColSort is not None:
-        # Sorting 
-        result.sort_values([ColSort],inplace=True,ascending=True)
-        result.reset_index(drop=True,inplace=True) 
+            result = pd.DataFrame(np.nan, index=np.arange(len(outFiles)), columns=dfStats.columns)
+        result.iloc[i,:] = dfStats.reindex(columns=result.columns).values[0]
 
     if len(invalidFiles)==len(outFiles):
         raise Exception('None of the files can be read (or exist)!')
     elif len(invalidFiles)>0:
         print('[WARN] There were {} missing/invalid files: {}'.format(len(invalidFiles),invalidFiles))
 
+    if ColSort is not None:
+        # Sorting 
+        result.sort_values([ColSort],inplace=True,ascending=True)
+        result.reset_index(drop=True,inplace=True) 
 
     return result 
 
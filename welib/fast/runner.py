@@ -24,60 +24,161 @@ FAST_EXE='openfast'
 # --- Tools for executing FAST
 # --------------------------------------------------------------------------------{
 # --- START cmd.py
-def run_cmds(inputfiles, exe, parallel=True, showOutputs=True, nCores=None, showCommand=True): 
+def run_cmds(inputfiles, exe, parallel=True, showOutputs=True, nCores=None, showCommand=True,
+        timeout=None, retries=0, skipUpToDate=False, outputExts=None, journal=None, showProgress=True,
+        pollInterval=0.05):
     """ Run a set of simple commands of the form `exe input_file`
-    By default, the commands are run in "parallel" (though the method needs to be improved)
+
+    The commands are run using a work queue: `nCores` processes are kept busy, and a new command
+    is started as soon as one finishes.
     The stdout and stderr may be displayed on screen (`showOutputs`) or hidden. 
-    A better handling is yet required.
+
+    INPUTS:
+      - inputfiles: list of input files
+      - exe: executable
+      - parallel: if False, the commands are run one after the other
+      - nCores: number of processes run simultaneously. None: number of cpus, <0: all at once
+      - timeout: maximum duration [s] of a command, after which the process is killed. None: no limit
+      - retries: number of times a failed (or timed out) command is restarted
+      - skipUpToDate: if True, skip the inputs for which an output file (see `outputExts`) is 
+                      newer than the input file.
+      - outputExts: list of output extensions used by `skipUpToDate`. Default: ['.outb', '.out']
+      - journal: path of a status file (one json entry per line). The inputs that were successfully 
+                 run (and not modified since) are skipped. This allows to resume an interrupted batch.
+      - showProgress: if True, display the progress and throughput when a command finishes
+    OUTPUTS:
+      - True if all the commands were successful, False otherwise
     """
+    import time
+    import json
     Failed=[]
     def _report(p):
         if p.returncode==0:
             print('[ OK ] Input    : ',p.input_file)
         else:
             Failed.append(p)
-            print('[FAIL] Input    : ',p.input_file)
+            if p.timedOut:
+                print('[FAIL] Input    : ',p.input_file, '(timeout after {}s)'.format(timeout))
+            else:
+                print('[FAIL] Input    : ',p.input_file)
             print('       Directory: '+os.getcwd())
             print('       Command  : '+p.cmd)
             print('       Use `showOutputs=True` to debug, or run the command above.')
-            #out, err = p.communicate()
-            #print('StdOut:\n'+out)
-            #print('StdErr:\n'+err)
-    ps=[]
-    iProcess=0
+    def _journal(p, status):
+        if journal is None:
+            return
+        entry = {'input':p.input_file_abs, 'status':status, 'returncode':p.returncode,
+                 'attempt':p.attempt, 'duration':round(p.duration,3), 'time':time.time()}
+        with open(journal, 'a') as fid:
+            fid.write(json.dumps(entry)+'\n')
+
+    # --- Selecting the inputs that need to be run
+    if outputExts is None:
+        outputExts = ['.outb', '.out']
+    done = _readJournal(journal) if journal is not None else {}
+    todo=[]
+    for f in inputfiles:
+        f_abs = os.path.abspath(f)
+        if f_abs in done and os.path.exists(f_abs) and os.path.getmtime(f_abs)<=done[f_abs]:
+            print('>>> Skipping completed simulation (journal) for: ',f)
+            continue
+        if skipUpToDate and _isUpToDate(f, outputExts):
+            print('>>> Skipping up-to-date simulation for: ',f)
+            continue
+        todo.append(f)
+    nJobs = len(todo)
+
     if nCores is None:
         nCores=multiprocessing.cpu_count()
     if nCores<0:
-        nCores=len(inputfiles)+1
-    for i,f in enumerate(inputfiles):
-        #print('Process {}/{}: {}'.format(i+1,len(inputfiles),f))
-        ps.append(run_cmd(f, exe, wait=(not parallel), showOutputs=showOutputs, showCommand=showCommand))
-        iProcess += 1
-        # waiting once we've filled the number of cores
-        # TODO: smarter method with proper queue, here processes are run by chunks
-        if parallel:
-            if iProcess==nCores:
-                for p in ps:
+        nCores=nJobs+1
+    if not parallel:
+        nCores=1
+    nCores=max(nCores,1)
+
+    # --- Work queue
+    queue   = collections.deque([(f, 1) for f in todo])
+    running = []
+    nDone   = 0
+    t0      = time.time()
+    while len(queue)>0 or len(running)>0:
+        # Filling the available slots
+        while len(queue)>0 and len(running)<nCores:
+            f, attempt = queue.popleft()
+            p = run_cmd(f, exe, wait=False, showOutputs=showOutputs, showCommand=showCommand)
+            p.attempt  = attempt
+            p.tStart   = time.time()
+            p.timedOut = False
+            running.append(p)
+        # Polling the running processes
+        stillRunning=[]
+        for p in running:
+            if p.poll() is None:
+                if timeout is not None and time.time()-p.tStart>timeout:
+                    p.kill()
                     p.wait()
-                for p in ps:
-                    _report(p)
-                ps=[]
-                iProcess=0
-    # Extra process if not multiptle of nCores (TODO, smarter method)
-    for p in ps:
-        p.wait()
-    for p in ps:
-        _report(p)
+                    p.timedOut=True
+                else:
+                    stillRunning.append(p)
+                    continue
+            p.duration = time.time()-p.tStart
+            success = p.returncode==0 and not p.timedOut
+            if not success and p.attempt<=retries:
+                _journal(p, 'RETRY')
+                print('[RETRY] Input   : {} (attempt {}/{})'.format(p.input_file, p.attempt+1, retries+1))
+                queue.append((p.input_file, p.attempt+1))
+                continue
+            _journal(p, 'OK' if success else ('TIMEOUT' if p.timedOut else 'FAIL'))
+            nDone += 1
+            _report(p)
+            if showProgress:
+                elapsed = time.time()-t0
+                rate = nDone/elapsed if elapsed>0 else np.nan
+                eta  = (nJobs-nDone)/rate if rate>0 else np.nan
+                print('       Progress : {}/{} - elapsed {:.1f}s - {:.2f} sim/min - ETA {:.1f}s'.format(nDone, nJobs, elapsed, rate*60, eta))
+        running = stillRunning
+        if len(running)>0:
+            time.sleep(pollInterval)
+
     # --- Giving a summary
     if len(Failed)==0:
         print('[ OK ] All simulations run successfully.')
         return True
     else:
-        print('[FAIL] {}/{} simulations failed:'.format(len(Failed),len(inputfiles)))
+        print('[FAIL] {}/{} simulations failed:'.format(len(Failed),nJobs))
         for p in Failed:
             print('      ',p.input_file)
         return False
 
+def _isUpToDate(input_file, outputExts):
+    """ Returns True if one of the output files is newer than the input file """
+    base = os.path.splitext(input_file)[0]
+    if not os.path.exists(input_file):
+        return False
+    tIn = os.path.getmtime(input_file)
+    for ext in outputExts:
+        if os.path.exists(base+ext) and os.path.getmtime(base+ext)>=tIn:
+            return True
+    return False
+
+def _readJournal(journal):
+    """ Returns a dictionary {input_file_abs: time} of the inputs successfully run according to the journal """
+    import json
+    done={}
+    if not os.path.exists(journal):
+        return done
+    with open(journal, 'r') as fid:
+        for line in fid:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue # e.g. line truncated by an interruption
+            if entry['status']=='OK':
+                done[entry['input']] = entry['time']
+            else:
+                done.pop(entry['input'], None)
+    return done
+
 def run_cmd(input_file_or_arglist, exe, wait=True, showOutputs=False, showCommand=True):
     """ Run a simple command of the form `exe input_file` or `exe arg1 arg2`  """
     # TODO Better capture STDOUT
@@ -118,7 +219,9 @@ def run_cmd(input_file_or_arglist, exe, wait=True, showOutputs=False, showComman
     return p
 # --- END cmd.py
 
-def run_fastfiles(fastfiles, fastExe=None, parallel=True, showOutputs=True, nCores=None, showCommand=True, reRun=True):
+def run_fastfiles(fastfiles, fastExe=None, parallel=True, showOutputs=True, nCores=None, showCommand=True, reRun=True, **kwargs):
+    """ Run a set of OpenFAST simulations, see `run_cmds` for the additional keyword arguments
+    (e.g. timeout, retries, skipUpToDate, journal) """
     if fastExe is None:
         fastExe=FAST_EXE
     if not reRun:
@@ -133,7 +236,7 @@ def run_fastfiles(fastfiles, fastExe=None, parallel=True, showOutputs=True, nCor
                 newfiles.append(f)
         fastfiles=newfiles
 
-    return run_cmds(fastfiles, fastExe, parallel=parallel, showOutputs=showOutputs, nCores=nCores, showCommand=showCommand)
+    return run_cmds(fastfiles, fastExe, parallel=parallel, showOutputs=showOutputs, nCores=nCores, showCommand=showCommand, **kwargs)
 
 def run_fast(input_file, fastExe=None, wait=True, showOutputs=False, showCommand=True):
     if fastExe is None:
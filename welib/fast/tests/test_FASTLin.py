@@ -0,0 +1,138 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from welib.fast.FASTLin import FASTLin
+from welib.weio.fast_linearization_file import FASTLinearizationFile
+
+MyDir = os.path.dirname(__file__)
+LinFile = os.path.join(MyDir, '../../../data/example_files/linearization.1.lin')
+
+MATRICES = ['A', 'B', 'C', 'D', 'M']
+
+
+def _writeLin(filename, WS, azimuth, scale):
+    """ Write a .lin file based on the example file, with a given wind speed, azimuth, and scaled matrices """
+    with open(LinFile) as f:
+        lines = f.read().splitlines()
+    out = []
+    inMat = False
+    for l in lines:
+        if l.startswith('Wind Speed:'):
+            l = 'Wind Speed:                        {:.4f} m/s'.format(WS)
+        elif l.startswith('Azimuth:'):
+            l = 'Azimuth:                            {:.4f} rad'.format(azimuth)
+        elif inMat and len(l.strip())>0:
+            l = ''.join(['{:14.5E}'.format(float(v)*scale) for v in l.split()])
+        inMat = (inMat and len(l.strip())>0) or l.split(':')[0] in ['A','B','C','D','dUdu','dUdy','ED M']
+        out.append(l)
+    with open(filename, 'w') as f:
+        f.write('\n'.join(out)+'\n')
+
+
+class TestFASTLin(unittest.TestCase):
+
+    def setUp(self):
+        # Operating points: standstill with one linearization time, two OPs with 4 linearization times,
+        # and one OP with missing linearization times (discarded)
+        self.tmpDir = tempfile.mkdtemp()
+        self.files = {}
+        for WS, nLin in [(0,1), (4,4), (8,4), (12,2)]:
+            self.files[WS] = []
+            for i in range(nLin):
+                filename = os.path.join(self.tmpDir, 'ws{:d}.{:d}.lin'.format(WS, i+1))
+                _writeLin(filename, WS, i*np.pi/2, 1+WS/4+i*0.1)
+                self.files[WS].append(filename)
+        self.linfiles = sorted([f for v in self.files.values() for f in v])
+        # Reference, each file read individually
+        self.ref = {WS: [FASTLinearizationFile(f) for f in files] for WS, files in self.files.items()}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_stack(self):
+        FL = FASTLin(folder=self.tmpDir+'/', prefix='ws')
+        np.testing.assert_array_equal(FL.WS, [0, 4, 8])
+        np.testing.assert_array_equal(FL.nLinTimes, [1, 4, 4])
+        for m in MATRICES:
+            M = FL.stack(m)
+            self.assertEqual(M.shape, (3, 4)+self.ref[0][0][m].shape)
+            for iop, WS in enumerate([0, 4, 8]):
+                for it in range(4):
+                    # Operating points with fewer linearization times are repeated
+                    np.testing.assert_array_equal(M[iop, it], self.ref[WS][it % len(self.ref[WS])][m])
+        np.testing.assert_almost_equal(FL._store['Azimuth'][1], np.arange(4)*np.pi/2, 4)
+        np.testing.assert_array_equal(FL._store['Azimuth'][0], [0]*4)
+
+    def test_average(self):
+        FL = FASTLin(self.linfiles)
+        for m in MATRICES:
+            Mop = FL.azimuthAverage(m)
+            for iop, WS in enumerate([0, 4, 8]):
+                np.testing.assert_almost_equal(Mop[iop], np.mean([F[m] for F in self.ref[WS]], axis=0), 12)
+            np.testing.assert_almost_equal(FL.azimuthAverage(m, WS=[8]), Mop[2:], 12)
+        A, B, C, D = FL.average()
+        np.testing.assert_almost_equal(A, np.mean([np.mean([F['A'] for F in self.ref[WS]], axis=0) for WS in [0,4,8]], axis=0), 12)
+        A, B, C, D = FL.average(WS=[4, 8])
+        np.testing.assert_almost_equal(D, np.mean([np.mean([F['D'] for F in self.ref[WS]], axis=0) for WS in [4,8]], axis=0), 12)
+        M_mean, M_mean_perWS, M_stdAzim, M_stdWS, M_all = FL.stats('B', WS=[4,8])
+        np.testing.assert_almost_equal(M_mean, B, 12)
+        self.assertEqual(M_all.shape, (2, 4)+B.shape)
+
+    def test_average_subset(self):
+        FL = FASTLin(self.linfiles)
+        sX, sU, sY, sE = list(FL.xdescr[[2,0]]), list(FL.udescr[[1]]), list(FL.ydescr[[4,0,1]]), list(FL.EDdescr[[3,5]])
+        exportFile = os.path.join(self.tmpDir, 'subset.pkl')
+        Ar, Br, Cr, Dr, Mr = FL.average_subset(sX, sU, sY, sE_sel=sE, WS=[4,8], exportFile=exportFile)
+        A, B, C, D, M = FL.average(WS=[4,8], matNames=MATRICES)
+        np.testing.assert_almost_equal(Ar.values, A[np.ix_([2,0],[2,0])], 12)
+        np.testing.assert_almost_equal(Br.values, B[np.ix_([2,0],[1])], 12)
+        np.testing.assert_almost_equal(Cr.values, C[np.ix_([4,0,1],[2,0])], 12)
+        np.testing.assert_almost_equal(Dr.values, D[np.ix_([4,0,1],[1])], 12)
+        np.testing.assert_almost_equal(Mr.values, M[np.ix_([3,5],[3,5])], 12)
+        self.assertEqual(list(Mr.index), sE)
+        self.assertEqual(list(Cr.index), sY)
+        self.assertEqual(list(Cr.columns), sX)
+        self.assertTrue(os.path.exists(exportFile))
+        self.assertEqual(len(FL.average_subset(sX, sU, sY)), 4)
+
+    def test_matrices(self):
+        FL = FASTLin(self.linfiles, matrices=['A'], dtype='float32')
+        self.assertEqual(FL.stack('A').dtype, np.float32)
+        with self.assertRaisesRegex(Exception, 'not present'):
+            FL.stack('B')
+
+    def test_cacheFile(self):
+        cacheFile = os.path.join(self.tmpDir, 'store.npz')
+        FL0 = FASTLin(self.linfiles, cacheFile=cacheFile)
+        self.assertTrue(FL0.OP_Data is not None)
+        # Store read from cache
+        FL = FASTLin(self.linfiles, cacheFile=cacheFile)
+        self.assertTrue(FL.OP_Data is None)
+        for m in MATRICES:
+            np.testing.assert_array_equal(FL.stack(m), FL0.stack(m))
+        np.testing.assert_array_equal(FL.WS, FL0.WS)
+        np.testing.assert_array_equal(FL.xdescr, FL0.xdescr)
+        np.testing.assert_array_equal(FL.average()[0], FL0.average()[0])
+        with self.assertRaisesRegex(Exception, 'not present'):
+            FL.stack('dUdu')
+        # Different options or files: the store is rebuilt
+        FL = FASTLin(self.linfiles, matrices=['A','B'], cacheFile=cacheFile)
+        self.assertTrue(FL.OP_Data is not None)
+        FL = FASTLin(self.linfiles, matrices=['A','B'], dtype='float32', cacheFile=cacheFile)
+        self.assertTrue(FL.OP_Data is not None)
+        self.assertEqual(FASTLin(self.linfiles, matrices=['A','B'], dtype='float32', cacheFile=cacheFile).stack('A').dtype, np.float32)
+        FL = FASTLin([f for f in self.linfiles if 'ws8' not in f], matrices=['A','B'], dtype='float32', cacheFile=cacheFile)
+        self.assertTrue(FL.OP_Data is not None)
+        np.testing.assert_array_equal(FL.WS, [0, 4])
+        # Lin file newer than the cache
+        FL = FASTLin(self.linfiles, cacheFile=cacheFile)
+        self.assertTrue(FASTLin(self.linfiles, cacheFile=cacheFile).OP_Data is None)
+        t = os.path.getmtime(cacheFile)
+        os.utime(self.files[4][0], (t+10, t+10))
+        self.assertTrue(FASTLin(self.linfiles, cacheFile=cacheFile).OP_Data is not None)
+
+
+if __name__ == '__main__':
+    unittest.main()
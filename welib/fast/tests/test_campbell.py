@@ -0,0 +1,73 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+try:
+    import welib.fast.campbell as campbell
+except ImportError:
+    campbell = None # MBC library (pyFAST or weis) not available
+
+MyDir = os.path.dirname(__file__)
+LinFile = os.path.join(MyDir, '../../../data/example_files/linearization.1.lin')
+
+
+def _fx_mbc3(lin_files, verbose=False):
+    return {'files': sorted([os.path.basename(f) for f in lin_files])}, None, None
+
+
+@unittest.skipIf(campbell is None, 'MBC library not available')
+class TestCampbell(unittest.TestCase):
+
+    def setUp(self):
+        # Two operating points, with 2 and 1 linearization files
+        self.tmpDir = tempfile.mkdtemp()
+        for f in ['op1.1.lin', 'op1.2.lin', 'op2.1.lin']:
+            shutil.copyfile(LinFile, os.path.join(self.tmpDir, f))
+        self.fstfiles = [os.path.join(self.tmpDir, 'op1.fst'), os.path.join(self.tmpDir, 'op2.fst')]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_cache(self):
+        with mock.patch.object(campbell.mbc, 'fx_mbc3', side_effect=_fx_mbc3) as fx:
+            # No cache
+            MBC = campbell.run_pyMBC(self.fstfiles, verbose=False)
+            self.assertEqual(fx.call_count, 2)
+            self.assertEqual(MBC[0]['files'], ['op1.1.lin', 'op1.2.lin'])
+            self.assertFalse(os.path.exists(os.path.join(self.tmpDir, 'op1.MBC.pkl')))
+            # Cache written, then reused
+            MBC = campbell.run_pyMBC(self.fstfiles, verbose=False, cache=True)
+            self.assertEqual(fx.call_count, 4)
+            self.assertTrue(os.path.exists(os.path.join(self.tmpDir, 'op1.MBC.pkl')))
+            res = campbell._runMBC((self.fstfiles[0], True))
+            self.assertEqual(fx.call_count, 4)
+            self.assertEqual(res[0], MBC[0])
+            self.assertTrue(res[3]) # from cache
+            # Pool of processes, results from the cache
+            MBC2 = campbell.run_pyMBC(self.fstfiles, verbose=False, cache=True, parallel=True, nCores=2)
+            self.assertEqual(MBC2, MBC)
+            self.assertEqual(fx.call_count, 4)
+            # Modified or new lin file: the operating point is recomputed
+            f = os.path.join(self.tmpDir, 'op1.2.lin')
+            st = os.stat(f)
+            os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns+10**9))
+            shutil.copyfile(LinFile, os.path.join(self.tmpDir, 'op2.2.lin'))
+            MBC = campbell.run_pyMBC(self.fstfiles, verbose=False, cache=True)
+            self.assertEqual(fx.call_count, 6)
+            self.assertEqual(MBC[1]['files'], ['op2.1.lin', 'op2.2.lin'])
+            # Corrupted cache file
+            with open(os.path.join(self.tmpDir, 'op2.MBC.pkl'), 'wb') as fid:
+                fid.write(b'corrupted')
+            MBC = campbell.run_pyMBC(self.fstfiles, verbose=False, cache=True)
+            self.assertEqual(fx.call_count, 7)
+            self.assertEqual(MBC[1]['files'], ['op2.1.lin', 'op2.2.lin'])
+
+    def test_missing(self):
+        with mock.patch.object(campbell.mbc, 'fx_mbc3', side_effect=_fx_mbc3):
+            MBC = campbell.run_pyMBC([os.path.join(self.tmpDir, 'op3.fst')], verbose=False, cache=True)
+        self.assertEqual(MBC, [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
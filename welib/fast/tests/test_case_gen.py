@@ -0,0 +1,117 @@
+import unittest
+import os
+import glob
+import shutil
+import stat
+import tempfile
+from unittest import mock
+import pandas as pd
+from welib.fast.case_gen import templateReplace
+from welib.weio.fast_input_file import FASTInputFile
+
+MyDir = os.path.dirname(__file__)
+DataDir = os.path.join(MyDir, '../../../data/NREL5MW')
+
+
+class TestCaseGen(unittest.TestCase):
+
+    def setUp(self):
+        # Minimal template: main file, ElastoDyn file and tower file
+        self.tmpDir = tempfile.mkdtemp()
+        self.templateDir = os.path.join(self.tmpDir, 'template')
+        os.makedirs(os.path.join(self.templateDir, 'data'))
+        shutil.copyfile(os.path.join(DataDir, 'Main_Onshore_OF2.fst'), os.path.join(self.templateDir, 'Main.fst'))
+        for f in ['NREL5MW_ED_Onshore.dat', 'NREL5MW_ED_Tower_Onshore.dat']:
+            shutil.copyfile(os.path.join(DataDir, 'data', f), os.path.join(self.templateDir, 'data', f))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def _params(self):
+        PARAMS = []
+        for i, rpm in enumerate([5, 7, 9]):
+            PARAMS.append({'__name__':'c{:d}'.format(i), 'DT':0.01*(i+1), 'EDFile|RotSpeed':rpm, 'EDFile|TwrFile|TwrFADmp(1)':i})
+        return PARAMS
+
+    def _templateContent(self):
+        content = {}
+        for f in glob.glob(os.path.join(self.templateDir, '**', '*.*'), recursive=True):
+            with open(f, 'r') as fid:
+                content[os.path.relpath(f, self.templateDir)] = fid.read()
+        return content
+
+    def test_parallel(self):
+        outSerial   = os.path.join(self.tmpDir, 'serial')
+        outParallel = os.path.join(self.tmpDir, 'parallel')
+        files1 = templateReplace(self._params(), self.templateDir, outputDir=outSerial  , main_file='Main.fst')
+        files2 = templateReplace(self._params(), self.templateDir, outputDir=outParallel, main_file='Main.fst', parallel=True, nCores=2)
+        self.assertEqual([os.path.relpath(f, outSerial) for f in files1], [os.path.relpath(f, outParallel) for f in files2])
+        generated = sorted([os.path.relpath(f, outSerial) for f in glob.glob(os.path.join(outSerial, '**', '*.*'), recursive=True)])
+        self.assertEqual(generated, sorted([os.path.relpath(f, outParallel) for f in glob.glob(os.path.join(outParallel, '**', '*.*'), recursive=True)]))
+        self.assertEqual(len(generated), 3+3*3)
+        for f in generated:
+            with open(os.path.join(outSerial, f)) as f1, open(os.path.join(outParallel, f)) as f2:
+                self.assertEqual(f1.read(), f2.read())
+        ED = FASTInputFile(os.path.join(outParallel, 'data', 'NREL5MW_ED_Onshore_c2.dat'))
+        self.assertEqual(ED['RotSpeed'], 9)
+        self.assertEqual(ED['TwrFile'], '"NREL5MW_ED_Tower_Onshore_c2.dat"')
+
+    def test_linkMode(self):
+        # The template contains files with the names of the generated files, e.g. from a previous run
+        shutil.copyfile(os.path.join(self.templateDir, 'Main.fst'), os.path.join(self.templateDir, 'c0.fst'))
+        shutil.copyfile(os.path.join(self.templateDir, 'data', 'NREL5MW_ED_Onshore.dat'), os.path.join(self.templateDir, 'data', 'NREL5MW_ED_Onshore_c0.dat'))
+        ref = self._templateContent()
+        for linkMode in ['hardlink', 'symlink']:
+            outputDir = os.path.join(self.tmpDir, linkMode)
+            files = templateReplace(self._params(), self.templateDir, outputDir=outputDir, main_file='Main.fst', oneSimPerDir=True, linkMode=linkMode)
+            self.assertEqual(ref, self._templateContent())
+            wd = os.path.dirname(files[0])
+            self.assertEqual(FASTInputFile(os.path.join(wd, 'data', 'NREL5MW_ED_Onshore_c0.dat'))['RotSpeed'], 5)
+            self.assertEqual(FASTInputFile(files[0])['DT'], 0.01)
+            # Unmodified files are links to the template
+            f = os.path.join(wd, 'Main.fst')
+            if linkMode=='symlink':
+                self.assertTrue(os.path.islink(f))
+            else:
+                self.assertTrue(os.stat(f).st_nlink>1)
+            self.assertFalse(os.path.islink(files[0]))
+
+    def test_linkModeReadOnly(self):
+        # Read-only template file, output directory generated twice
+        f = os.path.join(self.templateDir, 'data', 'NREL5MW_ED_Tower_Onshore.dat')
+        os.chmod(f, stat.S_IRUSR)
+        outputDir = os.path.join(self.tmpDir, 'out')
+        def access(path, mode):
+            # Permission bits only (os.access is always True for the root user)
+            return bool(os.stat(path).st_mode & stat.S_IWUSR)
+        try:
+            with mock.patch('welib.fast.case_gen.os.access', side_effect=access):
+                for i in range(2):
+                    templateReplace(self._params(), self.templateDir, outputDir=outputDir, main_file='Main.fst', linkMode='hardlink')
+                    self.assertEqual(stat.S_IMODE(os.stat(f).st_mode), stat.S_IRUSR)
+                for i in range(2):
+                    templateReplace(self._params(), self.templateDir, outputDir=outputDir, main_file='Main.fst')
+                    self.assertEqual(stat.S_IMODE(os.stat(f).st_mode), stat.S_IRUSR)
+        finally:
+            os.chmod(f, stat.S_IRUSR | stat.S_IWUSR)
+
+    def test_manifest(self):
+        outputDir = os.path.join(self.tmpDir, 'out')
+        manifestFile = os.path.join(self.tmpDir, 'manifest.csv')
+        PARAMS = self._params()
+        files = templateReplace(PARAMS, self.templateDir, outputDir=outputDir, main_file='Main.fst', manifestFile=manifestFile)
+        df = pd.read_csv(manifestFile)
+        self.assertEqual(list(df.columns), ['Index','Name','MainFile','File'])
+        self.assertEqual(len(df), 3*len(PARAMS))
+        for i, p in enumerate(PARAMS):
+            dfc = df[df['Index']==i]
+            self.assertTrue(all(dfc['Name']==p['__name__']))
+            self.assertTrue(all(dfc['MainFile']==files[i]))
+            written = sorted([os.path.relpath(f, outputDir) for f in dfc['File']])
+            expected = sorted([p['__name__']+'.fst', os.path.join('data', 'NREL5MW_ED_Onshore_'+p['__name__']+'.dat'), os.path.join('data', 'NREL5MW_ED_Tower_Onshore_'+p['__name__']+'.dat')])
+            self.assertEqual(written, expected)
+            self.assertTrue(all([os.path.exists(f) for f in dfc['File']]))
+
+
+if __name__ == '__main__':
+    unittest.main()
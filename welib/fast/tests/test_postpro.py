@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+import pandas as pd
+from welib.fast.postpro import averageDF, SpanwiseIndex, extract_spanwise_data, spanwiseColAD
+
+class TestPostPro(unittest.TestCase):
+
+    def _df(self):
+        time = np.arange(0,100,0.1)
+        psi  = np.mod(time*36, 360) # one revolution every 10s
+        np.random.seed(0)
+        return pd.DataFrame({'Time_[s]':time, 'Azimuth_[deg]':psi, 'RotSpeed_[rpm]':6+0*time, 'GenPwr_[kW]':1000+np.random.randn(len(time))})
+
+    def test_averageDF_stats(self):
+        df = self._df()
+        res = averageDF(df.copy(), avgMethod='constantwindow', avgParam=20, stats=['mean','std','min','max','p90'])
+        dfw = df[df['Time_[s]']>=df['Time_[s]'].values[-1]-20]
+        for c in df.columns:
+            np.testing.assert_almost_equal(res[c].values[0]       , dfw[c].mean())
+            np.testing.assert_almost_equal(res[c+'_std'].values[0], dfw[c].std())
+            np.testing.assert_almost_equal(res[c+'_min'].values[0], dfw[c].min())
+            np.testing.assert_almost_equal(res[c+'_max'].values[0], dfw[c].max())
+            np.testing.assert_almost_equal(res[c+'_p90'].values[0], dfw[c].quantile(0.9))
+
+    def test_averageDF_periods(self):
+        df = self._df()
+        res = averageDF(df.copy(), avgMethod='periods', avgParam=2, ColKeep=['GenPwr_[kW]'], stats=['mean','DEL4'])
+        self.assertEqual(list(res.columns), ['GenPwr_[kW]', 'GenPwr_[kW]_DEL4'])
+        self.assertTrue(res['GenPwr_[kW]_DEL4'].values[0]>0)
+
+    def test_spanwiseIndex(self):
+        cols = ['Time_[s]'] + ['AB{:d}N{:03d}{}'.format(b,n,v) for b in [1,2] for v in ['Cl_[-]','Alpha_[deg]'] for n in [1,2,3]]
+        M = np.random.randn(10, len(cols))
+        index = SpanwiseIndex(cols)
+        self.assertEqual(index.blades('AD'), [1,2])
+        self.assertEqual(index.variables('AD'), ['Alpha_[deg]','Cl_[-]'])
+        self.assertEqual(index.position('AD', 2, 3, 'Cl_[-]'), cols.index('AB2N003Cl_[-]'))
+        A = index.gather(M, 'AD')
+        self.assertEqual(A.shape, (10,2,3,2))
+        np.testing.assert_equal(A[:,1,2,1], M[:,cols.index('AB2N003Cl_[-]')])
+        # Same as extract_spanwise_data
+        ts = pd.Series(M[4], index=cols)
+        ColsInfo, nrMax = spanwiseColAD(cols)
+        dfRad = extract_spanwise_data(ColsInfo, nrMax, ts=ts)
+        pd.testing.assert_frame_equal(dfRad, index.toDataFrame(M[4], 'AD'))
+        # Radial interpolation
+        r_ref = np.array([0.,1.,3.])
+        Cl = index.radialInterp(M, 'AD', 'Cl_[-]', [0.5,2], r_ref, blade=1)
+        np.testing.assert_almost_equal(Cl[:,0], (M[:,cols.index('AB1N001Cl_[-]')]+M[:,cols.index('AB1N002Cl_[-]')])/2)
+        np.testing.assert_almost_equal(Cl[:,1], (M[:,cols.index('AB1N002Cl_[-]')]+M[:,cols.index('AB1N003Cl_[-]')])/2)
+
+if __name__ == '__main__':
+    unittest.main()
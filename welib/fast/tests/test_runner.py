@@ -0,0 +1,76 @@
+import unittest
+import os
+import stat
+import time
+import shutil
+import tempfile
+from welib.fast.runner import run_cmds, run_fastfiles
+
+# Dummy executable standing in for OpenFAST: fails, hangs or writes an output file depending on the input name
+DUMMY_EXE = """#!/bin/sh
+case "$1" in
+  *fail*) exit 1;;
+  *slow*) sleep 10;;
+  *flaky*) if [ -f "$1.tried" ]; then : ; else touch "$1.tried"; exit 1; fi;;
+esac
+echo "$1" >> "$(dirname "$1")/calls.txt"
+touch "${1%.*}.out"
+"""
+
+@unittest.skipIf(os.name=='nt', 'Dummy executable is a shell script')
+class TestRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.exe = os.path.join(self.dir, 'dummyfast')
+        with open(self.exe, 'w') as f:
+            f.write(DUMMY_EXE)
+        os.chmod(self.exe, os.stat(self.exe).st_mode | stat.S_IEXEC)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _inputs(self, names):
+        files = [os.path.join(self.dir, n+'.fst') for n in names]
+        for f in files:
+            open(f, 'w').close()
+        return files
+
+    def _calls(self):
+        calls = os.path.join(self.dir, 'calls.txt')
+        if not os.path.exists(calls):
+            return []
+        with open(calls) as f:
+            return f.read().split()
+
+    def test_queue(self):
+        files = self._inputs(['a','b','c','d','e'])
+        ok = run_cmds(files, self.exe, nCores=2, showOutputs=False, showCommand=False, showProgress=False)
+        self.assertTrue(ok)
+        self.assertEqual(sorted(self._calls()), sorted(files))
+
+    def test_timeout_retries(self):
+        files = self._inputs(['slow','flaky','fail'])
+        t0 = time.time()
+        ok = run_cmds(files, self.exe, nCores=3, timeout=0.5, retries=1, showOutputs=False, showCommand=False, showProgress=False)
+        self.assertFalse(ok)
+        self.assertLess(time.time()-t0, 5)
+        self.assertEqual(self._calls(), [files[1]]) # flaky succeeded on second attempt
+
+    def test_skip_and_journal(self):
+        files = self._inputs(['a','fail','b'])
+        journal = os.path.join(self.dir, 'journal.txt')
+        run_cmds(files, self.exe, nCores=2, journal=journal, showOutputs=False, showCommand=False, showProgress=False)
+        self.assertEqual(len(self._calls()), 2)
+        # Resuming: only the failed input is run again
+        os.remove(os.path.join(self.dir, 'calls.txt'))
+        ok = run_cmds(files, self.exe, journal=journal, showOutputs=False, showCommand=False, showProgress=False)
+        self.assertFalse(ok)
+        self.assertEqual(self._calls(), [])
+        # Outputs newer than inputs
+        ok = run_fastfiles(files[::2], self.exe, skipUpToDate=True, showOutputs=False, showCommand=False)
+        self.assertTrue(ok)
+        self.assertEqual(self._calls(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
 """ 3rd edition of IEC standard 61400-1 """
+import numpy as np
+
 def fVref(WT_class='I'):
     if WT_class== 'I':
           Vref = 50.0
@@ -96,6 +98,23 @@ def VonKarmanSpectrum(f, zhub, uhub, Model='ETM', IEC_class='A'):
     return spec
 
 
+def Coherence(f, r, uhub, zhub, IECedition=3):
+    r"""IEC exponential coherence model of the longitudinal component (IEC 61400-1 ed.3, Annex B)
+    
+    .. math::
+          Coh(r,f) = \exp\left(-12 \sqrt{(f r/V_{hub})^2 + (0.12 r/L_c)^2}\right)
+
+    Where :math:`L_c = 8.1 \Lambda_1`. 
+    NOTE: this is the coherence magnitude, the magnitude squared coherence is Coh**2.
+
+    INPUTS:
+     - f: frequency [Hz]
+     - r: separation distance [m] (broadcasted with f)
+    """
+    Lc = 8.1 * Lambda(zhub, IECedition)
+    return np.exp(-12 * np.sqrt((f * r / uhub)**2 + (0.12 * r / Lc)**2))
+
+
 if __name__=='__main__':
     import numpy as np
     import matplotlib.pyplot as plt
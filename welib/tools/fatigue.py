@@ -23,6 +23,11 @@ The methods uses the rainflow counting routines (See documentation in top of met
 or
 - 'rainflow_astm' (based on the c-implementation by Adam Nieslony found at the MATLAB Central File Exchange
                    http://www.mathworks.com/matlabcentral/fileexchange/3026)
+
+'rainflow_batch' counts the half cycles of many channels (columns of a 2D array) in one call.
+
+The extrema are extracted with a vectorized numpy pre-pass, and the counting loops are compiled
+with numba when it is available (pure python otherwise). Both give identical cycles.
 '''
 from __future__ import division
 from __future__ import print_function
@@ -32,9 +37,33 @@ from future import standard_library
 import warnings
 standard_library.install_aliases()
 import numpy as np
+try:
+    import numba
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+
+__all__  = ['rainflow_astm', 'rainflow_windap','rainflow_batch','eq_load','eq_load_and_cycles','cycle_matrix','cycle_matrix2','CycleHistograms','weibullWeights','RainflowCounter']
 
 
-__all__  = ['rainflow_astm', 'rainflow_windap','eq_load','eq_load_and_cycles','cycle_matrix','cycle_matrix2']
+def _jit(func):
+    """ Compile a counting core with numba if available, otherwise keep the python function """
+    if _HAS_NUMBA:
+        return numba.njit(cache=True)(func)
+    return func
+
+def _coreInput(x):
+    """ Input of a counting core: contiguous array for numba, list for python (faster indexing) """
+    if _HAS_NUMBA:
+        return np.ascontiguousarray(x)
+    return x.tolist()
+
+def _coreBuffer(n):
+    """ Work/output buffer of a counting core: array for numba, list for python """
+    if _HAS_NUMBA:
+        return np.zeros(n)
+    return [0.0] * n
 
 
 def check_signal(signal):
@@ -100,21 +129,19 @@ def rainflow_windap(signal, levels=255., thresshold=(255 / 50)):
         signal = signal / gain
         signal = np.round(signal).astype(int)
 
-
-        # If possible the module is compiled using cython otherwise the python implementation is used
-
-
         #Convert to list of local minima/maxima where difference > thresshold
         sig_ext = peak_trough(signal, thresshold)
 
-
         #rainflow count
-        ampl_mean = pair_range_amplitude_mean(sig_ext)
+        return _windap_cycles(sig_ext, gain, offset, thresshold)
 
-        ampl_mean = np.array(ampl_mean)
-        ampl_mean = np.round(ampl_mean / thresshold) * gain * thresshold
-        ampl_mean[:, 1] += offset
-        return ampl_mean.T
+
+def _windap_cycles(sig_ext, gain, offset, thresshold):
+    """ Rainflow count of a discretized peak-trough sequence, scaled back to signal units """
+    ampl_mean = np.vstack(_pair_range_amplitude_mean(sig_ext))
+    ampl_mean = np.round(ampl_mean / thresshold) * gain * thresshold
+    ampl_mean[1] += offset
+    return ampl_mean
 
 
 
@@ -151,16 +178,94 @@ def rainflow_astm(signal):
     # type <double> is reuqired by <find_extreme> and <rainflow>
     signal = signal.astype(np.double)
 
-    # Import find extremes and rainflow.
-    # If possible the module is compiled using cython otherwise the python implementation is used
-
     # Remove points which is not local minimum/maximum
     sig_ext = find_extremes(signal)
 
     # rainflow count
-    ampl_mean = np.array(rainflowcount(sig_ext))
+    return np.vstack(_rainflowcount(sig_ext))
+
 
-    return np.array(ampl_mean).T
+def rainflow_batch(signals, rainflow_func=rainflow_windap, **kwargs):
+    """Rainflow counting of multiple channels
+
+    Calculate the amplitude and mean values of half cycles of each column of `signals`.
+    For `rainflow_windap` and `rainflow_astm`, the discretization and the extrema
+    extraction are done for all channels at once. The cycles are identical to the ones
+    obtained by calling `rainflow_func` on each column.
+
+    Parameters
+    ----------
+    signals : array-like, shape (n, nChannels)
+        The raw signals, one channel per column (e.g. `df.values`)
+    rainflow_func : {rainflow_windap, rainflow_astm}, optional
+        The rainflow counting function to use (default is rainflow_windap).
+        Other functions are called column by column.
+    kwargs : dict
+        Options passed to the rainflow function (e.g. `levels`, `thresshold`)
+
+    Returns
+    -------
+    ampl_means : list of array-like or None
+        For each channel, array of shape (2, nHalfCycles) with the amplitudes and mean values
+        of the half cycles. None for channels without variation.
+
+    Examples
+    --------
+    >>> signals = np.column_stack((np.sin(np.linspace(0,10,100)), np.cos(np.linspace(0,20,100))))
+    >>> (ampl1, mean1), (ampl2, mean2) = rainflow_batch(signals)
+    """
+    signals = np.asarray(signals)
+    if signals.ndim == 1:
+        signals = signals.reshape(-1, 1)
+    elif signals.ndim != 2:
+        raise TypeError('signals must be 1D or 2D, not: ' + str(signals.ndim))
+    nt, nc = signals.shape
+    signals = signals.astype(np.double)
+    with warnings.catch_warnings(), np.errstate(invalid='ignore'):
+        warnings.simplefilter("ignore")
+        # same validity check as check_signal (nan min/max are considered as variation)
+        valid = ~(np.min(signals, axis=0) == np.max(signals, axis=0)) & (nt > 1)
+
+    if rainflow_func is rainflow_windap:
+        levels     = kwargs.get('levels', 255.)
+        thresshold = kwargs.get('thresshold', 255 / 50)
+        with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+            warnings.simplefilter("ignore")
+            valid &= ~np.all(np.isnan(signals), axis=0)
+            offset = np.nanmin(signals, axis=0)
+            signals -= offset
+            vmax = np.nanmax(signals, axis=0)
+            valid &= vmax > 0
+            gain = np.where(valid, vmax / levels, 1)
+            signals[:, ~valid] = 0
+            signals = np.round(signals / gain).astype(int)
+        if thresshold > 0:
+            extremes, varies = _extremes_mask(signals)
+        ampl_means = []
+        for j in range(nc):
+            if not valid[j]:
+                ampl_means.append(None)
+                continue
+            x = signals[:, j]
+            if thresshold > 0 and varies[j]:
+                x = x[extremes[:, j]] # peak-trough is unaffected by non-extrema (see peak_trough)
+            sig_ext = _peak_trough(x, thresshold)
+            ampl_means.append(_windap_cycles(sig_ext, gain[j], offset[j], thresshold))
+        return ampl_means
+
+    elif rainflow_func is rainflow_astm:
+        extremes, varies = _extremes_mask(signals)
+        ampl_means = []
+        for j in range(nc):
+            if not valid[j]:
+                ampl_means.append(None)
+                continue
+            sig_ext = signals[extremes[:, j], j] if varies[j] else np.array([0.])
+            ampl_means.append(np.vstack(_rainflowcount(sig_ext)))
+        return ampl_means
+
+    else:
+        return [rainflow_func(signals[:, j], **kwargs) if valid[j] else None for j in range(nc)]
 
 
 def eq_load(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=1, rainflow_func=rainflow_windap):
@@ -237,6 +342,11 @@ def eq_load_and_cycles(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=[10 ** 6
         Edges of the amplitude bins
     """
     cycles, ampl_bin_mean, ampl_bin_edges, _, _ = cycle_matrix(signals, no_bins, 1, rainflow_func)
+    return _eq_loads(cycles, ampl_bin_mean, ampl_bin_edges, m, neq)
+
+
+def _eq_loads(cycles, ampl_bin_mean, ampl_bin_edges, m, neq):
+    """ Equivalent loads from a cycle matrix with one mean bin, see eq_load_and_cycles """
     if 0:  #to be similar to windap
         ampl_bin_mean = (ampl_bin_edges[:-1] + ampl_bin_edges[1:]) / 2
     cycles, ampl_bin_mean = cycles.flatten(), ampl_bin_mean.flatten()
@@ -291,6 +401,11 @@ def cycle_matrix(signals, ampl_bins=10, mean_bins=10, rainflow_func=rainflow_win
     else:
         ampls, means = rainflow_func(signals[:])
         weights = np.ones_like(ampls)
+    return _cycle_matrix(ampls, means, weights, ampl_bins, mean_bins)
+
+
+def _cycle_matrix(ampls, means, weights, ampl_bins, mean_bins):
+    """ Cycle matrix of weighted half cycles, see cycle_matrix """
     if isinstance(ampl_bins, int):
         ampl_bins = np.linspace(0, 1, num=ampl_bins + 1) * ampls[weights>0].max()
     cycles, ampl_edges, mean_edges = np.histogram2d(ampls, means, [ampl_bins, mean_bins], weights=weights)
@@ -348,6 +463,393 @@ def cycle_matrix2(signal, nrb_amp, nrb_mean, rainflow_func=rainflow_windap):
 
     return cycles, ampl_edges, mean_edges
 
+# --------------------------------------------------------------------------------}
+# --- Lifetime equivalent loads
+# --------------------------------------------------------------------------------{
+def weibullWeights(WS, A, k, WSbins=None, lifetime=None, duration=None):
+    """Weights of simulations based on a Weibull distribution of their mean wind speed
+
+    The probability of each wind speed bin is shared between the simulations of the bin.
+
+    Parameters
+    ----------
+    WS : array-like
+        Mean wind speed of each simulation
+    A, k : float
+        Weibull scale and shape parameters
+    WSbins : array-like, optional
+        Edges of the wind speed bins. Default: bins centered on the unique values of WS
+    lifetime, duration : float, optional
+        If provided, the weights are scaled by lifetime/duration (e.g. 20 years and 600s in seconds),
+        such that they represent the number of occurences of each simulation over the lifetime.
+
+    Returns
+    -------
+    weights : array-like, same length as WS
+    """
+    WS = np.asarray(WS, dtype=float)
+    if WSbins is None:
+        WSu = np.unique(WS)
+        if len(WSu) == 1:
+            WSbins = np.array([0, np.inf])
+        else:
+            mid = (WSu[1:] + WSu[:-1]) / 2
+            WSbins = np.concatenate(([WSu[0] - (mid[0] - WSu[0])], mid, [WSu[-1] + (WSu[-1] - mid[-1])]))
+    WSbins = np.asarray(WSbins, dtype=float)
+    cdf = 1 - np.exp(-(np.clip(WSbins, 0, None) / A) ** k)
+    P = np.diff(cdf)
+    iBin = np.searchsorted(WSbins, WS, side='right') - 1
+    inside = (iBin >= 0) & (iBin < len(P))
+    nPerBin = np.bincount(iBin[inside], minlength=len(P))
+    weights = np.zeros(len(WS))
+    weights[inside] = P[iBin[inside]] / nPerBin[iBin[inside]]
+    if lifetime is not None:
+        if duration is None:
+            raise Exception('`duration` is needed to scale the weights with `lifetime`')
+        weights *= lifetime / duration
+    return weights
+
+
+class CycleHistograms():
+    """
+    Mergeable rainflow cycle histograms (amplitude x mean) of multiple channels, one per file/simulation.
+
+    The bin edges are fixed per channel such that the histograms of different files can be combined.
+    Each bin stores the number of half cycles and the sum of their amplitudes, such that
+    equivalent loads are computed with the bin-mean amplitude, as done in `eq_load`.
+    Amplitudes and means outside of the edges are stored in the first/last bins.
+
+    Once the files are counted, lifetime equivalent loads can be computed for different weights,
+    Wohler exponents and equivalent numbers without counting the cycles again.
+
+    Example:
+        H = CycleHistograms(amplMax=[2e4, 1e5], channels=['RootMyb1_[kN-m]', 'TwrBsMyt_[kN-m]'])
+        for filename, df in zip(filenames, dfs):
+            H.add(df[H.channels].values, key=filename)
+        weights = weibullWeights(WS, A=10, k=2, lifetime=20*365.25*24*3600, duration=600)
+        DEL = H.DEL(m=[3, 4, 10], neq=1e7, weights=weights) # shape (1, 3, 2)
+        H.save('histograms.npz')
+    """
+    def __init__(self, amplMax=None, nAmpl=46, meanEdges=None, channels=None, amplEdges=None, rainflow_func=rainflow_windap, **kwargs):
+        """
+        INPUTS:
+          - amplMax: array of maximum amplitude for each channel. The amplitude bins are [0, amplMax] 
+                     divided in nAmpl bins
+          - nAmpl: number of amplitude bins
+          - meanEdges: edges of the mean bins, array (nMean+1) or (nChannels x nMean+1).
+                     Default: one bin
+          - channels: list of channel names (optional)
+          - amplEdges: edges of the amplitude bins, array (nAmpl+1) or (nChannels x nAmpl+1),
+                       alternative to amplMax
+          - rainflow_func: rainflow counting function (see `rainflow_batch`)
+          - kwargs: options of the rainflow function
+        """
+        if amplEdges is None:
+            if amplMax is None:
+                raise Exception('Provide `amplMax` or `amplEdges`')
+            amplMax = np.atleast_1d(np.asarray(amplMax, dtype=float))
+            amplEdges = np.linspace(0, 1, num=nAmpl + 1)[None, :] * amplMax[:, None]
+        amplEdges = np.atleast_2d(np.asarray(amplEdges, dtype=float))
+        nCh = len(channels) if channels is not None else amplEdges.shape[0]
+        if meanEdges is None:
+            meanEdges = [-np.inf, np.inf]
+        meanEdges = np.atleast_2d(np.asarray(meanEdges, dtype=float))
+        self.amplEdges = np.broadcast_to(amplEdges, (nCh, amplEdges.shape[1])).copy()
+        self.meanEdges = np.broadcast_to(meanEdges, (nCh, meanEdges.shape[1])).copy()
+        self.channels  = list(channels) if channels is not None else ['Ch{}'.format(i) for i in range(nCh)]
+        self.rainflow_func = rainflow_func
+        self.kwargs = kwargs
+        self.keys      = []
+        self._counts   = [] # list of (nChannels x nAmpl x nMean) half cycles
+        self._amplSums = [] # list of (nChannels x nAmpl x nMean) sum of half cycle amplitudes
+
+    @property
+    def nChannels(self):
+        return self.amplEdges.shape[0]
+
+    @property
+    def shape(self):
+        """ (nFiles, nChannels, nAmpl, nMean) """
+        return (len(self.keys), self.nChannels, self.amplEdges.shape[1] - 1, self.meanEdges.shape[1] - 1)
+
+    @property
+    def counts(self):
+        """ Number of half cycles, array (nFiles x nChannels x nAmpl x nMean) """
+        return np.asarray(self._counts).reshape(self.shape)
+
+    @property
+    def amplSums(self):
+        """ Sum of half cycle amplitudes, array (nFiles x nChannels x nAmpl x nMean) """
+        return np.asarray(self._amplSums).reshape(self.shape)
+
+    def add(self, signals, key=None):
+        """ 
+        Count the cycles of the channels of one file and store their histograms
+
+        INPUTS:
+          - signals: array (nt x nChannels), or dataframe with the channels as columns
+          - key: identifier of the file (e.g. filename)
+        """
+        if hasattr(signals, 'columns'):
+            signals = signals[self.channels].values
+        signals = np.asarray(signals)
+        if signals.ndim == 1:
+            signals = signals.reshape(-1, 1)
+        if signals.shape[1] != self.nChannels:
+            raise Exception('Number of channels ({}) different from the number of histograms ({})'.format(signals.shape[1], self.nChannels))
+        ampl_means = rainflow_batch(signals, self.rainflow_func, **self.kwargs)
+        self.addCycles([am[0] if am is not None else [] for am in ampl_means],
+                       [am[1] if am is not None else [] for am in ampl_means], key=key)
+
+    def addCycles(self, ampls, means, key=None):
+        """ 
+        Store the histograms of half cycles already counted (e.g. with rainflow_batch)
+
+        INPUTS:
+          - ampls, means: list (one per channel) of arrays of half cycle amplitudes and means
+          - key: identifier of the file
+        """
+        _, nCh, nA, nM = self.shape
+        counts   = np.zeros((nCh, nA, nM))
+        amplSums = np.zeros((nCh, nA, nM))
+        for j in range(nCh):
+            a = np.asarray(ampls[j], dtype=float)
+            if len(a) == 0:
+                continue
+            iA = np.clip(np.searchsorted(self.amplEdges[j], a, side='right') - 1, 0, nA - 1)
+            iM = np.clip(np.searchsorted(self.meanEdges[j], np.asarray(means[j], dtype=float), side='right') - 1, 0, nM - 1)
+            iBin = iA * nM + iM
+            counts[j]   = np.bincount(iBin, minlength=nA * nM).reshape(nA, nM)
+            amplSums[j] = np.bincount(iBin, weights=a, minlength=nA * nM).reshape(nA, nM)
+        self._counts.append(counts)
+        self._amplSums.append(amplSums)
+        self.keys.append(key if key is not None else len(self.keys))
+
+    def merge(self, other):
+        """ Append the histograms of another CycleHistograms with the same bins """
+        if not (np.array_equal(self.amplEdges, other.amplEdges) and np.array_equal(self.meanEdges, other.meanEdges)):
+            raise Exception('Cannot merge histograms with different bin edges')
+        self.keys      += list(other.keys)
+        self._counts   += list(other.counts)
+        self._amplSums += list(other.amplSums)
+        return self
+
+    def combine(self, weights=None):
+        """ 
+        Weighted sum of the histograms of all files
+
+        INPUTS:
+          - weights: array (nFiles), weights of each file (e.g. from weibullWeights). Default: 1
+        OUTPUTS:
+          - counts: number of full cycles, array (nChannels x nAmpl x nMean)
+          - amplSums: sum of half cycle amplitudes, array (nChannels x nAmpl x nMean)
+        """
+        counts, amplSums = self.counts, self.amplSums
+        if weights is None:
+            weights = np.ones(counts.shape[0])
+        weights = np.asarray(weights, dtype=float)
+        if len(weights) != counts.shape[0]:
+            raise Exception('Number of weights ({}) different from number of files ({})'.format(len(weights), counts.shape[0]))
+        counts   = np.tensordot(weights, counts, axes=1)
+        amplSums = np.tensordot(weights, amplSums, axes=1)
+        return counts / 2, amplSums  # to get full cycles
+
+    def DEL(self, m=[3, 4, 6, 8, 10, 12], neq=1, weights=None):
+        """ 
+        Damage equivalent loads of all channels for all Wohler exponents, from the combined histograms
+
+        INPUTS:
+          - m: Wohler exponent(s)
+          - neq: equivalent number(s) of load cycles (e.g. lifetime in seconds for 1Hz DEL)
+          - weights: array (nFiles), weights of each file (see `combine`)
+        OUTPUTS:
+          - DEL: array (len(neq) x len(m) x nChannels)
+        """
+        counts, amplSums = self.combine(weights)
+        cycles    = counts.sum(axis=2)                      # nChannels x nAmpl
+        with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+            warnings.simplefilter("ignore")
+            ampl_bin_mean = amplSums.sum(axis=2) / (2 * cycles) # mean amplitude of the bins
+            m   = np.atleast_1d(np.asarray(m, dtype=float))[:, None, None]
+            neq = np.atleast_1d(np.asarray(neq, dtype=float))[:, None, None, None]
+            damage = np.nansum(cycles[None, :, :] * ampl_bin_mean[None, :, :] ** m, axis=2) # nm x nChannels
+            return (damage[None, :, :] / neq[:, :, :, 0]) ** (1. / m[None, :, :, 0])
+
+    def save(self, filename):
+        """ Save the histograms to a npz file """
+        with open(filename, 'wb') as f:
+            np.savez(f, amplEdges=self.amplEdges, meanEdges=self.meanEdges, channels=np.asarray(self.channels),
+                     keys=np.asarray([str(k) for k in self.keys]), counts=self.counts, amplSums=self.amplSums)
+
+    @staticmethod
+    def load(filename, rainflow_func=rainflow_windap, **kwargs):
+        """ Load histograms saved with `save` """
+        with np.load(filename) as d:
+            H = CycleHistograms(amplEdges=d['amplEdges'], meanEdges=d['meanEdges'], channels=list(d['channels']), rainflow_func=rainflow_func, **kwargs)
+            H.keys      = list(d['keys'])
+            H._counts   = list(d['counts'])
+            H._amplSums = list(d['amplSums'])
+        return H
+
+# --------------------------------------------------------------------------------}
+# --- Streaming rainflow counting
+# --------------------------------------------------------------------------------{
+class RainflowCounter():
+    """
+    Streaming (online) rainflow counting, for signals processed chunk by chunk.
+
+    The counting follows rainflow_windap (peak-trough with thresshold, followed by pair-range counting),
+    but the signal is discretized with fixed levels between `vmin` and `vmax` instead of its global 
+    min and max. Only the state of the peak-trough detection and the residual (unclosed half cycles)
+    are kept between chunks. The closed half cycles are accumulated in a matrix of (amplitude, mean) levels,
+    so that the memory is independent of the signal length.
+
+    If `vmin` and `vmax` are the min and max of the full signal, the half cycles are the same as the ones
+    of rainflow_windap(signal, levels, thresshold).
+
+    Example:
+        rf = RainflowCounter(vmin=-1e4, vmax=1e4)
+        for chunk in chunks:
+            rf.add(chunk)
+        ampl, mean, count = rf.halfCycles()
+        DEL = rf.eq_load(m=[3, 10], neq=rf.nSamples*dt)
+    """
+    def __init__(self, vmin, vmax, levels=255, thresshold=(255 / 50)):
+        """
+        INPUTS:
+          - vmin, vmax: range of the signal. Samples outside of the range are clipped (see `nClipped`)
+          - levels: number of discretization levels
+          - thresshold: cycles smaller than this number of levels are ignored
+        """
+        if not vmax > vmin:
+            raise Exception('`vmax` should be larger than `vmin`')
+        self.vmin       = vmin
+        self.vmax       = vmax
+        self.levels     = int(levels)
+        self.thresshold = thresshold
+        self.gain       = (vmax - vmin) / levels
+        self.reset()
+
+    def reset(self):
+        """ Discard all the samples and cycles counted """
+        self.nSamples = 0
+        self.nClipped = 0
+        # Half cycles: ampl level x (sum of the two levels = 2*mean level)
+        self._counts  = np.zeros((self.levels + 1, 2 * self.levels + 1), dtype=np.int64)
+        # Peak-trough state (see peak_trough), None before the first sample
+        self._goto    = None
+        self._peak    = 0
+        self._trough  = 0
+        # Pair-range residual (see pair_range_amplitude_mean)
+        self._stack   = []
+
+    def add(self, chunk):
+        """ Add samples of the signal. NaN values are ignored """
+        x = np.asarray(chunk, dtype=np.double).ravel()
+        x = x[~np.isnan(x)]
+        if len(x) == 0:
+            return
+        self.nSamples += len(x)
+        x = np.round((x - self.vmin) / self.gain)
+        clipped = (x < 0) | (x > self.levels)
+        if np.any(clipped):
+            self.nClipped += int(np.sum(clipped))
+            x = np.clip(x, 0, self.levels)
+        x = x.astype(int)
+        if self.thresshold > 0 and len(x) > 2:
+            mask, varies = _extremes_mask(x.reshape(-1, 1))
+            if varies[0]:
+                x = x[mask[:, 0]]
+        R = self.thresshold
+        goto, peak, trough = self._goto, self._peak, self._trough
+        x = x.tolist()
+        if goto is None:
+            goto, peak, trough = 'begin', x[0], x[0]
+            x = x[1:]
+        for xi in x:
+            if goto == 'begin':
+                if xi > peak:
+                    peak = xi
+                    if peak - trough >= R:
+                        self._push(self._stack, self._counts, trough)
+                        goto = 'max'
+                elif xi < trough:
+                    trough = xi
+                    if peak - trough >= R:
+                        self._push(self._stack, self._counts, peak)
+                        goto = 'min'
+            elif goto == 'min':
+                if xi < trough:
+                    trough = xi
+                elif xi - trough >= R:
+                    self._push(self._stack, self._counts, trough)
+                    peak = xi
+                    goto = 'max'
+            else:
+                if xi > peak:
+                    peak = xi
+                elif peak - xi >= R:
+                    self._push(self._stack, self._counts, peak)
+                    trough = xi
+                    goto = 'min'
+        self._goto, self._peak, self._trough = goto, peak, trough
+
+    @staticmethod
+    def _push(S, counts, x):
+        """ Push a peak/trough on the pair-range stack S and store the closed half cycles """
+        S.append(x)
+        while len(S) >= 4:
+            if (S[-3] > S[-4] and S[-2] >= S[-4] and S[-1] >= S[-3]) or \
+               (S[-3] < S[-4] and S[-2] <= S[-4] and S[-1] <= S[-3]):
+                # Extract two intermediate half cycles
+                counts[abs(S[-3] - S[-2]), S[-3] + S[-2]] += 2
+                S[-3] = S[-1]
+                del S[-2:]
+            else:
+                break
+
+    def _residualCounts(self):
+        """ Half cycles of the residual, assuming the signal ends at the last sample """
+        counts = np.zeros_like(self._counts)
+        if self._goto in (None, 'begin'):
+            # No peak-trough larger than the thresshold yet
+            return counts
+        S = list(self._stack)
+        self._push(S, counts, self._peak if self._goto == 'max' else self._trough)
+        for a, b in zip(S[:-1], S[1:]):
+            counts[abs(b - a), a + b] += 1
+        return counts
+
+    def halfCycles(self, residual=True):
+        """ 
+        Half cycles counted so far
+
+        INPUTS:
+          - residual: if True, the unclosed half cycles of the residual are included, as done at
+                      the end of a signal by rainflow_windap
+        OUTPUTS:
+          - ampl, mean: amplitudes and mean values of the distinct half cycles (signal units)
+          - count: number of half cycles for each (ampl, mean)
+        """
+        counts = self._counts + self._residualCounts() if residual else self._counts
+        iAmpl, iSum = np.nonzero(counts)
+        thresshold, gain = self.thresshold, self.gain
+        ampl = np.round(iAmpl / thresshold) * gain * thresshold
+        mean = np.round(iSum / 2 / thresshold) * gain * thresshold + self.vmin
+        return ampl, mean, counts[iAmpl, iSum]
+
+    def cycle_matrix(self, ampl_bins=10, mean_bins=10, residual=True):
+        """ Markow load cycle matrix of the half cycles counted so far, see `cycle_matrix` """
+        ampl, mean, count = self.halfCycles(residual=residual)
+        return _cycle_matrix(ampl, mean, count.astype(np.float64), ampl_bins, mean_bins)
+
+    def eq_load(self, m=[3, 4, 6, 8, 10, 12], neq=1, no_bins=46, residual=True):
+        """ Equivalent loads of the half cycles counted so far, see `eq_load` """
+        if self.nSamples == 0:
+            return [[np.nan] * len(np.atleast_1d(m))] * len(np.atleast_1d(neq))
+        cycles, ampl_bin_mean, ampl_bin_edges, _, _ = self.cycle_matrix(no_bins, 1, residual=residual)
+        return _eq_loads(cycles, ampl_bin_mean, ampl_bin_edges, m, neq)[0]
+
 # --------------------------------------------------------------------------------}
 # --- Rainflowcount_astm.py
 # --------------------------------------------------------------------------------{
@@ -364,35 +866,37 @@ from cy_rainflowcount import find_extremes,rainflow
 ext = find_extremes(np.array([-2,0,1,0,-3,0,5,0,-1,0,3,0,-4,0,4,0,-2]).astype(np.double))
 print rainflow(ext)
 '''
-def find_extremes(signal):  #cpdef find_extremes(np.ndarray[double,ndim=1] signal):
-    """return indexes of local minima and maxima plus first and last element of signal"""
-
-    #cdef int pi, i
-    # sign of gradient
-    sign_grad = np.int8(np.sign(np.diff(signal)))
-
-    # remove plateaus(sign_grad==0) by sign_grad[plateau_index]=sign_grad[plateau_index-1]
-    plateau_indexes, = np.where(sign_grad == 0)
-    if len(plateau_indexes) > 0 and plateau_indexes[0] == 0:
-        # first element is a plateau
-        if len(plateau_indexes) == len(sign_grad):
-                # All values are equal to crossing level!
-                return np.array([0])
+def _extremes_mask(signals):
+    """Mask of local minima and maxima plus first and last element of each column of `signals`
 
-        # set first element = first element which is not a plateau and delete plateau index
-        i = 0
-        while sign_grad[i] == 0:
-            i += 1
-        sign_grad[0] = sign_grad[i]
+    Plateaus take the gradient sign of the previous (or, at the start, the first) non-plateau point,
+    as done in find_extremes.
 
-        plateau_indexes = np.delete(plateau_indexes, 0)
+    Returns
+    -------
+    mask : boolean array, same shape as `signals`
+    varies : boolean array, True for the columns that are not constant
+    """
+    sign_grad = np.sign(np.diff(signals, axis=0)).astype(np.int8)
+    nonzero = sign_grad != 0
+    # remove plateaus(sign_grad==0) by forward filling the last non-plateau sign (first one at the start)
+    first = np.argmax(nonzero, axis=0)
+    index = np.where(nonzero, np.arange(sign_grad.shape[0])[:, None], first[None, :])
+    index = np.maximum.accumulate(index, axis=0)
+    sign_grad = np.take_along_axis(sign_grad, index, axis=0)
 
-    for pi in plateau_indexes.tolist():
-        sign_grad[pi] = sign_grad[pi - 1]
+    mask = np.ones(signals.shape, dtype=bool)
+    mask[1:-1] = sign_grad[1:] * sign_grad[:-1] < 0
+    return mask, np.any(nonzero, axis=0)
 
-    extremes, = np.where(np.r_[1, (sign_grad[1:] * sign_grad[:-1] < 0), 1])
 
-    return signal[extremes]
+def find_extremes(signal):  #cpdef find_extremes(np.ndarray[double,ndim=1] signal):
+    """return indexes of local minima and maxima plus first and last element of signal"""
+    mask, varies = _extremes_mask(signal.reshape(-1, 1))
+    if not varies[0]:
+        # All values are equal to crossing level!
+        return np.array([0])
+    return signal[mask[:, 0]]
 
 
 def rainflowcount(sig):  #cpdef rainflowcount(np.ndarray[double,ndim=1] sig):
@@ -420,39 +924,60 @@ def rainflowcount(sig):  #cpdef rainflowcount(np.ndarray[double,ndim=1] sig):
 
 
     """
-
-    #cdef int sig_ptr, index
-    #cdef double ampl
-    a = []
-    sig_ptr = 0
-    ampl_mean = []
-    for _ in range(len(sig)):
-        a.append(sig[sig_ptr])
-        sig_ptr += 1
-        while len(a) > 2 and abs(a[-3] - a[-2]) <= abs(a[-2] - a[-1]):
-            ampl = abs(a[-3] - a[-2])
-            mean = (a[-3] + a[-2]) / 2;
-            if len(a) == 3:
-                del a[0]
+    ampl, mean = _rainflowcount(sig)
+    return list(zip(ampl.tolist(), mean.tolist()))
+
+
+def _rainflowcount(sig):
+    """ Same as rainflowcount, returns arrays of amplitudes and means """
+    n = len(sig)
+    ampl, mean = _coreBuffer(2 * n), _coreBuffer(2 * n)
+    nCycles = _rainflowcount_core(_coreInput(np.asarray(sig, dtype=np.double)), _coreBuffer(n), ampl, mean)
+    return np.asarray(ampl[:nCycles], dtype=np.double), np.asarray(mean[:nCycles], dtype=np.double)
+
+
+@_jit
+def _rainflowcount_core(sig, a, ampl_out, mean_out):
+    """ Counting loop of rainflowcount, `a` is the stack of residual points, a[:j+1] is used """
+    j = -1
+    nCycles = 0
+    for i in range(len(sig)):
+        j += 1
+        a[j] = sig[i]
+        while j >= 2 and abs(a[j - 2] - a[j - 1]) <= abs(a[j - 1] - a[j]):
+            ampl = abs(a[j - 2] - a[j - 1])
+            mean = (a[j - 2] + a[j - 1]) / 2
+            if j == 2:
+                # remove first point
+                a[0] = a[1]
+                a[1] = a[2]
+                j = 1
                 if ampl > 0:
-                    ampl_mean.append((ampl, mean))
-            elif len(a) > 3:
-                del a[-3:-1]
+                    ampl_out[nCycles] = ampl
+                    mean_out[nCycles] = mean
+                    nCycles += 1
+            else:
+                # remove the two points before the last one
+                a[j - 2] = a[j]
+                j -= 2
                 if ampl > 0:
-                    ampl_mean.append((ampl, mean))
-                    ampl_mean.append((ampl, mean))
-    for index in range(len(a) - 1):
+                    ampl_out[nCycles] = ampl
+                    mean_out[nCycles] = mean
+                    ampl_out[nCycles + 1] = ampl
+                    mean_out[nCycles + 1] = mean
+                    nCycles += 2
+    for index in range(j):
         ampl = abs(a[index] - a[index + 1])
-        mean = (a[index] + a[index + 1]) / 2;
+        mean = (a[index] + a[index + 1]) / 2
         if ampl > 0:
-            ampl_mean.append((ampl, mean))
-    return ampl_mean
+            ampl_out[nCycles] = ampl
+            mean_out[nCycles] = mean
+            nCycles += 1
+    return nCycles
 
 # --------------------------------------------------------------------------------}
 # --- Peak_trough.py
 # --------------------------------------------------------------------------------{
-# @cython.locals(BEGIN=cython.int, MINZO=cython.int, MAXZO=cython.int, ENDZO=cython.int, \
-#                R=cython.int, L=cython.int, i=cython.int, p=cython.int, f=cython.int)
 def peak_trough(x, R):  #cpdef np.ndarray[long,ndim=1] peak_trough(np.ndarray[long,ndim=1] x, int R):
     """
     Returns list of local maxima/minima.
@@ -462,16 +987,41 @@ def peak_trough(x, R):  #cpdef np.ndarray[long,ndim=1] peak_trough(np.ndarray[lo
 
     This routine is implemented directly as described in
     "Recommended Practices for Wind Turbine Testing - 3. Fatigue Loads", 2. edition 1990, Appendix A
+
+    For R>0, the points that are not local extrema are removed beforehand (vectorized), since
+    within a monotonic segment only the last point can change the result.
     """
+    if R > 0 and len(x) > 2:
+        mask, varies = _extremes_mask(x.reshape(-1, 1))
+        if varies[0]:
+            x = x[mask[:, 0]]
+    return _peak_trough(x, R)
+
+
+def _peak_trough(x, R):
+    """ Same as peak_trough, without pre-pass """
+    S = _coreBuffer(len(x) + 1)
+    n = _peak_trough_core(_coreInput(x), R, S)
+    return np.asarray(S[1:n + 1], dtype=np.double).astype(int)
 
+
+# @cython.locals(BEGIN=cython.int, MINZO=cython.int, MAXZO=cython.int, ENDZO=cython.int, \
+#                R=cython.int, L=cython.int, i=cython.int, p=cython.int, f=cython.int)
+@_jit
+def _peak_trough_core(x, R, S):
+    """ State machine of peak_trough, fills S (length len(x)+1) and returns the index of the last point """
     BEGIN = 0
     MINZO = 1
     MAXZO = 2
     ENDZO = 3
-    S = np.zeros(x.shape[0] + 1, dtype=int)
 
-    L = x.shape[0]
+    L = len(x)
     goto = BEGIN
+    trough = x[0]
+    peak = x[0]
+    i = 0
+    p = 1
+    f = 0
 
     while 1:
         if goto == BEGIN:
@@ -535,8 +1085,7 @@ def peak_trough(x, R):  #cpdef np.ndarray[long,ndim=1] peak_trough(np.ndarray[lo
                             trough = x[i]
                             goto = MINZO
                             continue
-        elif goto == ENDZO:
-
+        else:
             n = p + 1
             if abs(f) == 1:
                 if f == 1:
@@ -545,8 +1094,7 @@ def peak_trough(x, R):  #cpdef np.ndarray[long,ndim=1] peak_trough(np.ndarray[lo
                     S[n] = trough
             else:
                 S[n] = (trough + peak) / 2
-            S = S[1:n + 1]
-            return S
+            return n
 
 
 # --------------------------------------------------------------------------------}
@@ -690,13 +1238,25 @@ def pair_range_amplitude_mean(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x
     "Recommended Practices for Wind Turbine Testing - 3. Fatigue Loads", 2. edition 1990, Appendix A
     except that a list of half-cycle-amplitudes are returned instead of a from_level-to_level-matrix
     """
+    ampl, mean = _pair_range_amplitude_mean(x)
+    return list(zip(ampl.tolist(), mean.tolist()))
 
-    x = x - np.min(x)
-    k = np.max(x)
+
+def _pair_range_amplitude_mean(x):
+    """ Same as pair_range_amplitude_mean, returns arrays of amplitudes and means """
+    x = np.asarray(x)
+    x = (x - np.min(x)).astype(np.double)
     n = x.shape[0]
-    S = np.zeros(n + 1)
-    ampl_mean = []
-    A = np.zeros((k + 1, k + 1))
+    ampl, mean = _coreBuffer(n + 1), _coreBuffer(n + 1)
+    nCycles = _pair_range_amplitude_mean_core(_coreInput(x), _coreBuffer(n + 1), ampl, mean)
+    return np.asarray(ampl[:nCycles], dtype=np.double), np.asarray(mean[:nCycles], dtype=np.double)
+
+
+@_jit
+def _pair_range_amplitude_mean_core(x, S, ampl_out, mean_out):
+    """ Counting loop of pair_range_amplitude_mean, S has length len(x)+1 """
+    n = len(x)
+    nCycles = 0
     S[1] = x[0]
     ptr = 1
     p = 1
@@ -707,7 +1267,7 @@ def pair_range_amplitude_mean(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x
         p += 1
         q += 1
 
-                # read
+        # read
         S[p] = x[ptr]
         ptr += 1
 
@@ -720,8 +1280,11 @@ def pair_range_amplitude_mean(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x
                 # Extract two intermediate half cycles
                 ampl = abs(S[p - 2] - S[p - 1])
                 mean = (S[p - 2] + S[p - 1]) / 2
-                ampl_mean.append((ampl, mean))
-                ampl_mean.append((ampl, mean))
+                ampl_out[nCycles] = ampl
+                mean_out[nCycles] = mean
+                ampl_out[nCycles + 1] = ampl
+                mean_out[nCycles + 1] = mean
+                nCycles += 2
 
                 S[p - 2] = S[p]
 
@@ -729,9 +1292,7 @@ def pair_range_amplitude_mean(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x
             else:
                 break
 
-        if f == 0:
-            pass
-        else:
+        if f == 1:
             break
     # phase 2
     q = 0
@@ -740,10 +1301,10 @@ def pair_range_amplitude_mean(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x
         if p == q:
             break
         else:
-            ampl = abs(S[q + 1] - S[q])
-            mean = (S[q + 1] + S[q]) / 2
-            ampl_mean.append((ampl, mean))
-    return ampl_mean
+            ampl_out[nCycles] = abs(S[q + 1] - S[q])
+            mean_out[nCycles] = (S[q + 1] + S[q]) / 2
+            nCycles += 1
+    return nCycles
 
 
 
@@ -828,6 +1389,53 @@ class TestFatigue(unittest.TestCase):
                                                                                        [ 0., 0., 0., 0.],
                                                                                        [ 0., 0., 2., 1.]]))
 
+    def test_rainflow_batch(self):
+        # Batch counting should give the same cycles as channel by channel counting
+        time = np.linspace(0, 20*np.pi, 2000)
+        signal1 = np.sin(time) + 0.3*np.cos(7*time)
+        signal2 = np.round(3*np.sin(0.5*time)) # with plateaus
+        signals = np.column_stack((signal1, signal2, np.ones_like(time)))
+        for rainflow_func in [rainflow_windap, rainflow_astm]:
+            ampl_means = rainflow_batch(signals, rainflow_func)
+            np.testing.assert_array_equal(ampl_means[0], rainflow_func(signal1))
+            np.testing.assert_array_equal(ampl_means[1], rainflow_func(signal2))
+            self.assertTrue(ampl_means[2] is None)
+
+        # Extrema pre-pass
+        np.testing.assert_array_equal(find_extremes(np.array([0., 1, 1, 2, 2, 1, 0, 0, 1])), [0, 2, 0, 1])
+        np.testing.assert_array_equal(peak_trough(np.array([0, 1, 1, 5, 5, 4, 0, 0, 3]), 2), [0, 5, 0, 3])
+
+    def test_cycle_histograms(self):
+        # Lifetime equivalent loads from stored histograms should match eq_load
+        time = np.linspace(0, 20*np.pi, 2000)
+        signal1 = np.sin(time) + 0.3*np.cos(7*time) + 5
+        signal2 = 0.5*signal1
+        m, neq = [3, 4, 10], [1, 100]
+        H = CycleHistograms(amplMax=[rainflow_windap(signal1)[0].max()])
+        H.add(signal1, key='sim1')
+        H.add(signal2, key='sim2')
+        np.testing.assert_allclose(H.DEL(m, neq, weights=[1, 0])[:,:,0], eq_load(signal1, m=m, neq=neq))
+        np.testing.assert_allclose(H.DEL(m, neq, weights=[0.3, 0.7])[:,:,0], eq_load([(0.3, signal1), (0.7, signal2)], m=m, neq=neq))
+        # Weibull weights: probability of each bin shared between its simulations
+        w = weibullWeights([4, 4, 6], A=10, k=2, WSbins=[3, 5, 7])
+        P = np.exp(-(np.array([3, 5])/10)**2) - np.exp(-(np.array([5, 7])/10)**2)
+        np.testing.assert_allclose(w, [P[0]/2, P[0]/2, P[1]])
+
+    def test_rainflow_counter(self):
+        # Streaming counting with the signal range as levels should match rainflow_windap
+        time = np.linspace(0, 20*np.pi, 2000)
+        signal = np.sin(time) + 0.3*np.cos(7*time) + 0.1*np.sin(31*time)
+        rf = RainflowCounter(signal.min(), signal.max())
+        for chunk in np.array_split(signal, 7):
+            rf.add(chunk)
+        ampl, mean, count = rf.halfCycles()
+        ampl_ref, mean_ref = rainflow_windap(signal)
+        np.testing.assert_array_equal(np.histogram2d(np.repeat(ampl, count), np.repeat(mean, count), [6, 4])[0],
+                                      np.histogram2d(ampl_ref, mean_ref, [6, 4])[0])
+        self.assertEqual(np.sum(count), len(ampl_ref))
+        np.testing.assert_allclose(rf.eq_load(m=[3, 10], neq=[1, 100]), eq_load(signal, m=[3, 10], neq=[1, 100]))
+        self.assertEqual(rf.nSamples, len(signal))
+
     def test_eq_load_basic(self):
         import numpy.testing
         signal1 = np.array([-2.0, 0.0, 1.0, 0.0, -3.0, 0.0, 5.0, 0.0, -1.0, 0.0, 3.0, 0.0, -4.0, 0.0, 4.0, 0.0, -2.0])
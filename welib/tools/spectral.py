@@ -21,9 +21,13 @@ from __future__ import division, print_function, absolute_import
 
 import numpy as np
 from six import string_types
+try:
+    from scipy.fft import rfft as _rfft # supports multiple workers
+except ImportError:
+    _rfft = None
 
 __all__  = ['fft_wrap','welch', 'psd', 'fft_amplitude']
-__all__ += ['pwelch', 'csd', 'coherence']
+__all__ += ['pwelch', 'csd', 'coherence', 'pwelch_multi', 'coherence_field']
 __all__ += ['fnextpow2']
 __all__ += ['hann','hamming','boxcar','general_hamming','get_window']
 __all__ += ['TestSpectral']
@@ -475,10 +479,38 @@ def welch(x, fs=1.0, window='hann', nperseg=None, noverlap=None, nfft=None,
     if detrend==True:
         detrend='constant'
 
-    freqs, Pxx = csd(x, x, fs, window, nperseg, noverlap, nfft, detrend, return_onesided, scaling, axis)
-    return freqs, Pxx.real
+    freqs, Pxx, Info = csd(x, x, fs, window, nperseg, noverlap, nfft, detrend, return_onesided, scaling, axis)
+    return freqs, Pxx.real, Info
 
 #>>>>
+def _pwelch_defaults(nt, window, noverlap, nperseg, detrend):
+    """ Default options of pwelch (matlab like), for signals of length nt. Returns window, nperseg, detrend """
+    import math
+    def fnextpow2(x):
+        return 2**math.ceil( math.log(x)*0.99999999999/math.log(2));
+
+    # MANU >>> CHANGE OF DEFAULT OPTIONS
+    # MANU - If a length is provided use symmetric hamming window
+    if type(window)==int:
+        window=hamming(window, True) 
+    # MANU - do not use 256 as default
+    if isinstance(window, string_types) or isinstance(window, tuple):
+        if nperseg is None:
+            if noverlap is None:
+                overlap_frac=0.5
+            elif noverlap == 0:
+                overlap_frac=0
+            else:
+                raise NotImplementedError('TODO noverlap set but not nperseg')
+            #nperseg = 256  # then change to default
+            nperseg=fnextpow2(math.sqrt(nt/(1-overlap_frac)));
+
+    # MANU accepting true as detrend
+    if detrend==True:
+        detrend='constant'
+    return window, nperseg, detrend
+
+
 def pwelch(x, window='hamming', noverlap=None, nfft=None, fs=1.0, nperseg=None, 
           detrend=False, return_onesided=True, scaling='density',
           axis=-1):
@@ -574,29 +606,7 @@ def pwelch(x, window='hamming', noverlap=None, nfft=None, fs=1.0, nperseg=None,
            Biometrika, vol. 37, pp. 1-16, 1950.
 
     """
-    import math
-    def fnextpow2(x):
-        return 2**math.ceil( math.log(x)*0.99999999999/math.log(2));
-
-    # MANU >>> CHANGE OF DEFAULT OPTIONS
-    # MANU - If a length is provided use symmetric hamming window
-    if type(window)==int:
-        window=hamming(window, True) 
-    # MANU - do not use 256 as default
-    if isinstance(window, string_types) or isinstance(window, tuple):
-        if nperseg is None:
-            if noverlap is None:
-                overlap_frac=0.5
-            elif noverlap == 0:
-                overlap_frac=0
-            else:
-                raise NotImplementedError('TODO noverlap set but not nperseg')
-            #nperseg = 256  # then change to default
-            nperseg=fnextpow2(math.sqrt(x.shape[-1]/(1-overlap_frac)));
-
-    # MANU accepting true as detrend
-    if detrend==True:
-        detrend='constant'
+    window, nperseg, detrend = _pwelch_defaults(x.shape[-1], window, noverlap, nperseg, detrend)
 
     freqs, Pxx, Info = csd(x, x, fs, window, nperseg, noverlap, nfft, detrend,
                      return_onesided, scaling, axis)
@@ -646,6 +656,291 @@ def coherence(x, y, fs=1.0, window='hann', nperseg=None, noverlap=None,
     return freqs, Cxy, Infoxx
 
 
+def pwelch_multi(X, window='hamming', noverlap=None, nfft=None, fs=1.0, nperseg=None,
+                 detrend=False, scaling='density', cross=False, workers=None, blockSize=None):
+    r"""
+    Power spectral densities of multiple channels, and optionally their cross spectral densities,
+    using Welch's method. Same interface and defaults as `pwelch`.
+
+    The signals are segmented once (strided view), the window and the detrending fit are computed once,
+    and batched FFTs are performed on (nBlock x nseg x nperseg) arrays, with blocks of channels
+    sized to fit in cache (a single batch over all the channels is memory bound).
+
+    Parameters
+    ----------
+    X : array_like
+        Time series of the channels, (nt x nch)
+    cross : bool, optional
+        If True, the cross spectral densities between all channels are returned.
+        NOTE: the matrix has nf x nch x nch complex values.
+    workers : int, optional
+        Number of workers of the FFT (requires scipy.fft, ignored otherwise)
+    blockSize : int, optional
+        Number of channels per batched FFT. Default: about 2MB of data per block (times workers)
+    See `pwelch` for the other parameters.
+
+    Returns
+    -------
+    f : ndarray
+        Array of sample frequencies.
+    Pxx : ndarray
+        Power spectral densities, (nf x nch). Pxx[:,i] is the same as pwelch(X[:,i])
+    Pxy : ndarray or None
+        If `cross`, cross spectral densities (nf x nch x nch), Pxy[:,i,j] is the same as csd(X[:,i], X[:,j])
+    Info : object
+        Information on the segmentation (see `pwelch`)
+    """
+    X = np.asarray(X)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+    elif X.ndim != 2:
+        raise ValueError('X must be 1D or 2D')
+    if np.iscomplexobj(X):
+        raise Exception('NOT IMPLEMENTED')
+    nt, nch = X.shape
+
+    win, nperseg, noverlap, nfft, detrend, freqs, sided = _welch_multi_setup(nt, window, noverlap, nfft, fs, nperseg, detrend, scaling)
+
+    # Batched FFTs of the segments, by blocks of channels
+    if cross:
+        F = None
+    Pxx = np.empty((len(freqs), nch))
+    for i0, i1, Fb in _segments_fft(X, win, nperseg, noverlap, nfft, detrend, workers=workers, blockSize=blockSize):
+        nseg = Fb.shape[1]
+        if cross:
+            if F is None:
+                F = np.empty((nch,)+Fb.shape[1:], dtype=Fb.dtype)
+            F[i0:i1] = Fb
+        else:
+            Pxx[:, i0:i1] = (Fb.real**2 + Fb.imag**2).mean(axis=1).T * sided[:, None]
+
+    if cross:
+        # Cross spectral densities, averaged over segments
+        Fh  = np.ascontiguousarray(F.transpose(2, 0, 1)) # nf x nch x nseg
+        del F
+        Pxy = np.matmul(Fh.conj(), Fh.transpose(0, 2, 1)) * (sided/nseg)[:, None, None]
+        Pxx[:] = np.real(np.diagonal(Pxy, axis1=1, axis2=2))
+    else:
+        Pxy = None
+
+    class InfoClass():
+        pass
+    Info = InfoClass();
+    Info.df=freqs[1]-freqs[0]
+    Info.fMax=freqs[-1]
+    Info.LFreq=len(freqs)
+    Info.LSeg=nperseg
+    Info.LWin=len(win)
+    Info.LOvlp=noverlap
+    Info.nFFT=nfft
+    Info.nseg=nseg
+    return freqs, Pxx, Pxy, Info
+
+
+def coherence_field(u, y, z, fs=1.0, window='hamming', nperseg=None, noverlap=None, nfft=None,
+                    detrend='constant', rBins=None, direction='all', squared=True, workers=None, chunkSize=None):
+    r"""
+    Coherence as function of the separation distance, averaged over all the pairs of points of a 
+    turbulence field (e.g. TurbSim or Mann box), using Welch's method.
+
+    The FFTs of the segments of every point are computed once (see `pwelch_multi`). The cross spectra 
+    of the pairs are then obtained by batched matrix products over the frequencies, by chunks of points
+    to bound the memory, and the pair coherences are averaged in bins of separation distance.
+
+    Parameters
+    ----------
+    u : array_like
+        Field (nt x ny x nz), e.g. TurbSimFile()['u'][0], or MannBoxFile()['field'] (with fs=U/dx)
+    y, z : array_like
+        Coordinates of the grid points (ny) and (nz)
+    rBins : array_like, optional
+        Edges of the separation distance bins. Default: bins centered on multiples of the grid spacing
+    direction : {'all', 'y', 'z'}, optional
+        Pairs considered: all pairs, or only the pairs separated along y (same z) or along z (same y)
+    squared : bool, optional
+        If True, magnitude squared coherence (as `coherence`), otherwise coherence magnitude
+        (e.g. to compare with the IEC model, see welib.standards.IEC.Coherence)
+    workers : int, optional
+        Number of workers of the FFT (requires scipy.fft, ignored otherwise)
+    chunkSize : int, optional
+        Number of points for which the cross spectra are computed at once.
+        Default: about 64MB of cross spectra
+    See `pwelch` for the other parameters.
+
+    Returns
+    -------
+    f : ndarray
+        Array of sample frequencies (nf)
+    r : ndarray
+        Mean separation distance of the pairs in each bin (nr)
+    Coh : ndarray
+        Coherence averaged over the pairs of each bin (nf x nr). NaN for empty bins.
+    counts : ndarray
+        Number of pairs in each bin (nr)
+
+    Examples
+    --------
+        ts = TurbSimFile('Turb.bts')
+        f, r, Coh, counts = coherence_field(ts['u'][0], ts['y'], ts['z'], fs=1/ts['dt'], direction='y', squared=False)
+    """
+    u = np.asarray(u)
+    if u.ndim != 3:
+        raise ValueError('u must be a 3D field (nt x ny x nz)')
+    nt, ny, nz = u.shape
+    nP = ny * nz
+    Y, Z = np.meshgrid(np.asarray(y, dtype=float), np.asarray(z, dtype=float), indexing='ij')
+    Y, Z = Y.ravel(), Z.ravel()
+
+    # --- Distance bins
+    if rBins is None:
+        dr = [np.min(np.diff(np.unique(v))) for v in (Y, Z) if len(np.unique(v)) > 1]
+        if len(dr) == 0:
+            raise Exception('The field needs at least two points')
+        dr = min(dr)
+        rMax = np.sqrt((Y.max() - Y.min())**2 + (Z.max() - Z.min())**2)
+        rBins = (np.arange(int(np.ceil(rMax/dr)) + 1) + 0.5) * dr
+    rBins = np.asarray(rBins, dtype=float)
+    nr = len(rBins) - 1
+
+    # --- FFT of the segments of all points
+    win, nperseg, noverlap, nfft, detrend, freqs, sided = _welch_multi_setup(nt, window, noverlap, nfft, fs, nperseg, detrend, 'density')
+    nf = len(freqs)
+    X = u.reshape(nt, nP)
+    Fh = None
+    for i0, i1, Fb in _segments_fft(X, win, nperseg, noverlap, nfft, detrend, workers=workers):
+        if Fh is None:
+            Fh = np.empty((nf, nP, Fb.shape[1]), dtype=Fb.dtype) # nf x nP x nseg
+        Fh[:, i0:i1, :] = Fb.transpose(2, 0, 1)
+    # Auto spectra (the scaling cancels out in the coherence)
+    Pxx = np.einsum('fps,fps->fp', Fh.real, Fh.real) + np.einsum('fps,fps->fp', Fh.imag, Fh.imag) # nf x nP
+
+    # --- Cross spectra of the pairs i<j, by chunks of points i
+    if chunkSize is None:
+        chunkSize = max(2**26 // (nf * nP * 16), 1)
+    sums  = np.zeros((nf, nr))
+    rSums = np.zeros(nr)
+    counts = np.zeros(nr, dtype=int)
+    for i0 in range(0, nP, chunkSize):
+        i1 = min(i0 + chunkSize, nP)
+        # Pairs (i, j) with i in i0:i1 and j in i0:nP
+        I = np.arange(i0, i1)[:, None]
+        J = np.arange(i0, nP)[None, :]
+        r = np.sqrt((Y[I] - Y[J])**2 + (Z[I] - Z[J])**2)
+        valid = J > I
+        if direction == 'y':
+            valid &= Z[I] == Z[J]
+        elif direction == 'z':
+            valid &= Y[I] == Y[J]
+        elif direction != 'all':
+            raise ValueError("direction must be one of 'all', 'y', 'z'")
+        iBin = np.searchsorted(rBins, r, side='right') - 1
+        valid &= (iBin >= 0) & (iBin < nr) & (r <= rBins[-1])
+        if not np.any(valid):
+            continue
+        sel   = np.flatnonzero(valid)
+        order = np.argsort(iBin.ravel()[sel], kind='stable')
+        sel   = sel[order]
+        bins, starts, n = np.unique(iBin.ravel()[sel], return_index=True, return_counts=True)
+
+        iP, jP = np.divmod(sel, nP - i0)
+
+        Pxy = np.matmul(Fh[:, i0:i1, :].conj(), Fh[:, i0:, :].transpose(0, 2, 1)) # nf x nI x nJ
+        Pxy = Pxy.reshape(nf, -1)[:, sel]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            coh = (Pxy.real**2 + Pxy.imag**2) / (Pxx[:, i0 + iP] * Pxx[:, i0 + jP])
+        if not squared:
+            coh = np.sqrt(coh)
+        sums[:, bins]  += np.add.reduceat(coh, starts, axis=1)
+        rSums[bins]    += np.add.reduceat(r.ravel()[sel], starts)
+        counts[bins]   += n
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Coh  = sums / counts
+        rMid = np.where(counts > 0, rSums / np.maximum(counts, 1), (rBins[:-1] + rBins[1:]) / 2)
+    return freqs, rMid, Coh, counts
+
+
+def _welch_multi_setup(nt, window, noverlap, nfft, fs, nperseg, detrend, scaling):
+    """ Window, segmentation and scaling for multi-channel Welch estimates, with the defaults of pwelch """
+    window, nperseg, detrend = _pwelch_defaults(nt, window, noverlap, nperseg, detrend)
+    if nperseg is not None:
+        nperseg = int(nperseg)
+        if nperseg < 1:
+            raise ValueError('nperseg must be a positive integer')
+    win, nperseg = _triage_segments(window, nperseg, input_length=nt)
+    if nfft is None:
+        nfft = nperseg
+    elif nfft < nperseg:
+        raise ValueError('nfft must be greater than or equal to nperseg.')
+    else:
+        nfft = int(nfft)
+    if noverlap is None:
+        noverlap = nperseg//2
+    else:
+        noverlap = int(noverlap)
+    if noverlap >= nperseg:
+        raise ValueError('noverlap must be less than nperseg.')
+    if scaling == 'density':
+        scale = 1.0 / (fs * (win*win).sum())
+    elif scaling == 'spectrum':
+        scale = 1.0 / win.sum()**2
+    else:
+        raise ValueError('Unknown scaling: %r' % scaling)
+    freqs = np.fft.rfftfreq(nfft, 1/fs)
+
+    # One sided scaling
+    sided = np.full(len(freqs), 2*scale)
+    sided[0] = scale
+    if nfft % 2 == 0:
+        sided[-1] = scale # Last point is unpaired Nyquist freq point, don't double
+    return win, nperseg, noverlap, nfft, detrend, freqs, sided
+
+
+def _segments_fft(X, win, nperseg, noverlap, nfft, detrend, workers=None, blockSize=None):
+    """ 
+    FFT of the windowed segments of the columns of X (nt x nch), by blocks of channels.
+    Yields i0, i1, F where F (i1-i0 x nseg x nf) are the FFTs of the channels i0:i1.
+    The block size defaults to about 2MB of data (times workers), since a single batch over 
+    many channels is memory bound.
+    """
+    nt, nch = X.shape
+    # Segments of all channels (nch x nseg x nperseg), strided view of the data
+    Xc = np.ascontiguousarray(X.T, dtype=np.result_type(X.dtype, np.float32))
+    step = nperseg - noverlap
+    nseg = (nt - noverlap)//step
+    segs = np.lib.stride_tricks.as_strided(Xc, shape=(nch, nseg, nperseg),
+                                           strides=(Xc.strides[0], step*Xc.strides[1], Xc.strides[1]))
+    if blockSize is None:
+        blockSize = max(2**21 // (nseg*nfft*8), 1) * (workers if workers is not None and workers > 0 else 1)
+    detrend_func = _segments_detrend_func(detrend, nperseg)
+    win = win.astype(Xc.dtype)
+    for i0 in range(0, nch, blockSize):
+        i1 = min(i0 + blockSize, nch)
+        Fb = detrend_func(segs[i0:i1]) * win
+        if _rfft is not None:
+            Fb = _rfft(Fb, n=nfft, axis=-1, workers=workers, overwrite_x=True)
+        else:
+            Fb = np.fft.rfft(Fb, n=nfft, axis=-1)
+        yield i0, i1, Fb
+
+
+def _segments_detrend_func(detrend, nperseg):
+    """ Returns a function that detrends segments (last axis), the least squares projection is computed once """
+    if not detrend:
+        return lambda segs: segs
+    elif hasattr(detrend, '__call__'):
+        return detrend
+    elif detrend in ['constant', 'c']:
+        return lambda segs: segs - segs.mean(axis=-1, keepdims=True)
+    elif detrend in ['linear', 'l']:
+        A = np.ones((nperseg, 2))
+        A[:, 0] = np.arange(1, nperseg + 1) * 1.0 / nperseg
+        pinvAT = np.linalg.pinv(A).T
+        return lambda segs: segs - np.matmul(np.matmul(segs, pinvAT), A.T)
+    else:
+        raise ValueError("Trend type must be 'linear' or 'constant'.")
+
+
 def _spectral_helper(x, y, fs=1.0, window='hann', nperseg=None, noverlap=None,
                      nfft=None, detrend='constant', return_onesided=True,
                      scaling='spectrum', axis=-1, mode='psd', boundary=None,
@@ -955,7 +1250,50 @@ class TestSpectral(unittest.TestCase):
         i=np.argmax(Y)
         self.assertAlmostEqual(Y[i],A)
         self.assertAlmostEqual(f[i],f0)
-    
+
+    def test_pwelch_multi(self):
+        # Multi-channel spectra should match single channel pwelch and csd
+        dt=0.1
+        t=np.arange(0,100,dt);
+        X=np.column_stack((np.sin(2*np.pi*t), np.cos(2*np.pi*0.5*t)+np.sin(2*np.pi*t), t*0.01+np.sin(2*np.pi*2*t)))
+        f,Pxx,Pxy,Info=pwelch_multi(X, fs=1/dt, detrend=True, cross=True, blockSize=2)
+        for i in range(X.shape[1]):
+            f1,P1,_=pwelch(X[:,i], fs=1/dt, detrend=True)
+            np.testing.assert_allclose(f,f1)
+            np.testing.assert_allclose(Pxx[:,i],P1,atol=1e-12)
+        _,P01,_=csd(X[:,0], X[:,1], fs=1/dt, window='hamming', nperseg=Info.LSeg, detrend='constant')
+        np.testing.assert_allclose(Pxy[:,0,1],P01,atol=1e-12)
+        _,Pxx2,Pxy2,_=pwelch_multi(X, fs=1/dt, detrend=True)
+        np.testing.assert_allclose(Pxx2,Pxx,atol=1e-12)
+        self.assertTrue(Pxy2 is None)
+        # Same default options as pwelch
+        for kw in [{'noverlap':0}, {'window':64}, {'window':'hann', 'nperseg':100, 'noverlap':20}]:
+            f,Pxx,_,Info=pwelch_multi(X, fs=1/dt, **kw)
+            f1,P1,Info1=pwelch(X[:,1], fs=1/dt, **kw)
+            np.testing.assert_allclose(Pxx[:,1],P1,atol=1e-12)
+            self.assertEqual((Info.LSeg, Info.LOvlp), (Info1.LSeg, Info1.LOvlp))
+        self.assertRaises(NotImplementedError, pwelch_multi, X, noverlap=10)
+        self.assertRaises(NotImplementedError, pwelch, X[:,0], noverlap=10)
+
+    def test_coherence_field(self):
+        # Coherence binned by distance should match the average of pair by pair coherences
+        np.random.seed(0)
+        nt, ny, nz = 1000, 3, 2
+        base = np.cumsum(np.random.randn(nt))
+        u = np.zeros((nt, ny, nz))
+        for iy in range(ny):
+            for iz in range(nz):
+                u[:,iy,iz] = base*np.exp(-0.3*(iy+iz)) + np.random.randn(nt)
+        y, z = np.array([-1., 0, 1]), np.array([10., 11])
+        f, r, Coh, counts = coherence_field(u, y, z, direction='y', chunkSize=2)
+        np.testing.assert_array_equal(counts, [4, 2, 0])
+        np.testing.assert_allclose(r[:2], [1, 2])
+        _, c1, _ = coherence(u[:,0,0], u[:,1,0], window='hamming', nperseg=64)
+        _, c2, _ = coherence(u[:,1,0], u[:,2,0], window='hamming', nperseg=64)
+        _, c3, _ = coherence(u[:,0,1], u[:,1,1], window='hamming', nperseg=64)
+        _, c4, _ = coherence(u[:,1,1], u[:,2,1], window='hamming', nperseg=64)
+        np.testing.assert_allclose(Coh[1:,0], ((c1+c2+c3+c4)/4)[1:])
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -7,6 +7,7 @@ Set of tools for statistics
 """
 import numpy as np
 import pandas as pd
+import warnings
 
 # --------------------------------------------------------------------------------}
 # --- Stats measures 
@@ -147,44 +148,161 @@ def pdf_sns(y,nBins=50):
 # --------------------------------------------------------------------------------}
 # --- Binning 
 # --------------------------------------------------------------------------------{
+class BinAccumulator():
+    """ 
+    Bin averaging of many channels at once, where the data may be provided chunk by chunk
+    (e.g. several simulations, or a long simulation read in parts), without concatenating them.
+
+    The bins are right-closed intervals (xbins[i], xbins[i+1]], like `pandas.cut`.
+    For each bin and channel, the number of (non NaN) values, their sum and their sum of squares
+    are accumulated using `np.bincount`. The values are shifted by a reference value per channel
+    (the mean of the first chunk) to limit round-off errors in the standard deviation.
+
+    Example:
+        acc = BinAccumulator(np.arange(0,361,10))
+        for df in dfs:
+            acc.addDF(df, 'Azimuth_[deg]')
+        dfPsi = acc.toDataFrame()
+    """
+    def __init__(self, xbins, columns=None, std=True):
+        """ 
+        INPUTS:
+          - xbins: end points delimiting the bins, array of ascending x values
+          - columns: names of the channels. None: set by the first call to `addDF`, or integers
+          - std: if True, the sums of squares are accumulated, to compute standard deviations
+        """
+        self.xbins   = np.asarray(xbins, dtype=float)
+        self.xmid    = (self.xbins[:-1]+self.xbins[1:])/2
+        self.columns = None if columns is None else list(columns)
+        self.counts  = np.zeros(len(self.xmid), dtype=int) # Number of rows per bin
+        self.n       = None # Number of values per bin and channel (nBins x nChannels)
+        self.sum     = None # Sum of shifted values
+        self.sum2    = None # Sum of squares of shifted values
+        self.shift   = None # Reference value per channel
+        self.bStd    = std
+
+    def add(self, x, M):
+        """ 
+        Add a chunk of data. 
+        INPUTS:
+          - x: values used for binning, array of length n 
+          - M: values of the channels, array of shape (n x nChannels) (or length n for one channel)
+        """
+        x = np.asarray(x, dtype=float)
+        M = np.asarray(M, dtype=float)
+        if M.ndim==1:
+            M = M.reshape(-1,1)
+        if M.shape[0]!=len(x):
+            raise Exception('The binning values and data should have the same number of rows')
+        nb, nc = len(self.xmid), M.shape[1]
+        if self.n is None:
+            if self.columns is None:
+                self.columns = list(range(nc))
+            self.n     = np.zeros((nb, nc))
+            self.sum   = np.zeros((nb, nc))
+            self.sum2  = np.zeros((nb, nc))
+            self.shift = np.zeros(nc)
+            if self.bStd and len(M)>0:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', category=RuntimeWarning) # all-NaN channels
+                    self.shift = np.nan_to_num(np.nanmean(M, axis=0))
+        elif nc!=self.n.shape[1]:
+            raise Exception('Inconsistent number of channels ({} instead of {})'.format(nc, self.n.shape[1]))
+        # Bin index of each row, rows outside of the bins are discarded
+        ib = np.searchsorted(self.xbins, x, side='left')-1
+        b  = (ib>=0) & (ib<nb) & ~np.isnan(x)
+        if not b.all():
+            ib, M = ib[b], M[b]
+        cnt = np.bincount(ib, minlength=nb)
+        self.counts += cnt
+        # One bincount per channel, on the (transposed) data
+        MT = M.T
+        for j in range(nc):
+            v = MT[j] - self.shift[j] if self.bStd else MT[j]
+            valid = ~np.isnan(v)
+            if valid.all():
+                self.n[:,j] += cnt
+            else:
+                v = np.where(valid, v, 0)
+                self.n[:,j] += np.bincount(ib, weights=valid, minlength=nb)
+            self.sum [:,j] += np.bincount(ib, weights=v  , minlength=nb)
+            if self.bStd:
+                self.sum2[:,j] += np.bincount(ib, weights=v*v, minlength=nb)
+        return self
+
+    def addDF(self, df, colBin):
+        """ Add the data of a dataframe (all its columns), binned using the column `colBin`. The dataframe is not modified. """
+        if colBin not in df.columns.values:
+            raise Exception('The column `{}` does not appear to be in the dataframe'.format(colBin))
+        if self.columns is None:
+            self.columns = list(df.columns)
+        elif self.n is not None and list(df.columns)!=self.columns:
+            df = df.reindex(columns=self.columns)
+        return self.add(df[colBin].values, df.values)
+
+    @property
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n>0, self.shift + self.sum/self.n, np.nan)
+
+    @property
+    def std(self):
+        """ Standard deviation (with ddof=1, like pandas) """
+        if not self.bStd:
+            raise Exception('Use `std=True` when creating the BinAccumulator')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (self.sum2 - self.sum**2/self.n)/(self.n-1)
+            return np.where(self.n>1, np.sqrt(np.maximum(var, 0)), np.nan)
+
+    def toDataFrame(self, std=False):
+        """ 
+        Returns a dataframe with the mean values of each channel, the bin mid points as index, and 
+        an additional column 'Counts' with the number of rows per bin. 
+        If `std` is True, the standard deviations are added as columns with suffix '_std'.
+        """
+        if self.n is None:
+            raise Exception('No data was added')
+        df = pd.DataFrame(self.mean, index=pd.Index(self.xmid, name='Bin'), columns=self.columns)
+        if std:
+            dfStd = pd.DataFrame(self.std, index=df.index, columns=['{}_std'.format(c) for c in self.columns])
+            df = pd.concat((df, dfStd), axis=1)
+        df['Counts'] = self.counts
+        return df
+
+
 def bin_DF(df, xbins, colBin):
     """ 
     Perform bin averaging of a dataframe
     INPUTS:
-      - df   : pandas dataframe
+      - df   : pandas dataframe (not modified)
       - xBins: end points delimiting the bins, array of ascending x values)
       - colBin: column name (string) of the dataframe, used for binning 
     OUTPUTS:
        binned dataframe, with additional columns 'Counts' for the number 
 
     """
-    if colBin not in df.columns.values:
-        raise Exception('The column `{}` does not appear to be in the dataframe'.format(colBin))
-    xmid      = (xbins[:-1]+xbins[1:])/2
-    df['Bin'] = pd.cut(df[colBin], bins=xbins, labels=xmid ) # Adding a column that has bin attribute
-    df2       = df.groupby('Bin').mean()                     # Average by bin
-    # also counting
-    df['Counts'] = 1
-    dfCount=df[['Counts','Bin']].groupby('Bin').sum()
-    df2['Counts'] = dfCount['Counts']
-    # Just in case some bins are missing (will be nan)
-    df2       = df2.reindex(xmid)
-    return df2
-
-def azimuthal_average_DF(df, psiBin=None, colPsi='Azimuth_[deg]', tStart=None, colTime='Time_[s]'):
+    return BinAccumulator(xbins, std=False).addDF(df, colBin).toDataFrame()
+
+def azimuthal_average_DF(df, psiBin=None, colPsi='Azimuth_[deg]', tStart=None, colTime='Time_[s]', std=False):
     """ 
     Average a dataframe based on azimuthal value
     Returns a dataframe with same amount of columns as input, and azimuthal values as index
+
+    `df` may be a list of dataframes (e.g. several simulations), which are averaged together.
+    If `std` is True, the standard deviations are added as columns with suffix '_std'.
     """
     if psiBin is None: 
         psiBin = np.arange(0,360+1,10)
+    dfs = df if isinstance(df, (list, tuple)) else [df]
 
-    if tStart is not None:
-        if colTime not in df.columns.values:
-            raise Exception('The column `{}` does not appear to be in the dataframe'.format(colTime))
-        df=df[ df[colTime]>tStart].copy()
-
-    dfPsi= bin_DF(df, psiBin, colPsi)
+    acc = BinAccumulator(psiBin, std=std)
+    for df in dfs:
+        if tStart is not None:
+            if colTime not in df.columns.values:
+                raise Exception('The column `{}` does not appear to be in the dataframe'.format(colTime))
+            df=df[ df[colTime]>tStart]
+        acc.addDF(df, colPsi)
+    dfPsi = acc.toDataFrame(std=std)
     if np.any(dfPsi['Counts']<1):
         print('[WARN] some bins have no data! Increase the bin size.')
 
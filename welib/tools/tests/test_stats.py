@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+import pandas as pd
+from welib.tools.stats import *
+
+class TestStats(unittest.TestCase):
+
+    def _df(self, n=1000, seed=0):
+        np.random.seed(seed)
+        df = pd.DataFrame({'Azimuth_[deg]':np.random.uniform(0,360,n), 'A':np.random.randn(n), 'B':1e4+np.random.randn(n)})
+        df.loc[::10,'A'] = np.nan
+        return df
+
+    def test_bin_DF(self):
+        df  = self._df()
+        df0 = df.copy()
+        xbins = np.arange(0,361,30)
+        dfBin = bin_DF(df, xbins, 'Azimuth_[deg]')
+        pd.testing.assert_frame_equal(df, df0) # input not modified
+        # Reference with pandas
+        xmid = (xbins[:-1]+xbins[1:])/2
+        Bin  = pd.cut(df['Azimuth_[deg]'], bins=xbins, labels=xmid)
+        dfRef = df.groupby(Bin, observed=False).mean()
+        np.testing.assert_almost_equal(dfBin[['Azimuth_[deg]','A','B']].values, dfRef.values)
+        np.testing.assert_equal(dfBin['Counts'].values, df.groupby(Bin, observed=False).size().values)
+        np.testing.assert_equal(dfBin.index.values, xmid)
+
+    def test_bin_accumulator_chunks(self):
+        # Accumulating chunks gives the same result as the concatenated data
+        df1 = self._df(seed=1)
+        df2 = self._df(n=500, seed=2)
+        xbins = np.arange(0,361,10)
+        acc = BinAccumulator(xbins)
+        acc.addDF(df1, 'Azimuth_[deg]')
+        acc.addDF(df2, 'Azimuth_[deg]')
+        dfAcc = acc.toDataFrame(std=True)
+        df = pd.concat((df1,df2))
+        xmid = (xbins[:-1]+xbins[1:])/2
+        Bin  = pd.cut(df['Azimuth_[deg]'], bins=xbins, labels=xmid)
+        np.testing.assert_almost_equal(dfAcc[['Azimuth_[deg]','A','B']].values, df.groupby(Bin, observed=False).mean().values)
+        np.testing.assert_almost_equal(dfAcc[['A_std','B_std']].values, df[['A','B']].groupby(Bin, observed=False).std().values)
+        dfAzi = azimuthal_average_DF([df1,df2], psiBin=xbins)
+        np.testing.assert_almost_equal(dfAzi.values, dfAcc[dfAzi.columns].values)
+
+if __name__ == '__main__':
+    unittest.main()
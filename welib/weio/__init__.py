@@ -1,10 +1,20 @@
 from .file  import File, WrongFormatError, BrokenFormatError, FileNotFoundError, EmptyFileError
 from .file_formats  import FileFormat
+from .batch import readFiles
 
 class FormatNotDetectedError(Exception):
     pass
 
-def fileFormats():
+_FORMATS    = None # List of FileFormat, built on first use
+_EXT_INDEX  = None # Extension -> list of indices in _FORMATS
+_EXT_PATTERNS = None # List of (index in _FORMATS, regexp) for formats with patterns as extensions
+_DETECT_CACHE = {} # Absolute path -> (mtime, size, index in _FORMATS)
+SNIFF_SIZE = 4096 # Number of bytes read to sniff the file format
+
+def _buildFormats():
+    """ Build the list of formats (imports all the file modules) and the extension index"""
+    global _FORMATS, _EXT_INDEX, _EXT_PATTERNS
+    import re
     # User defined formats
     from .fast_input_file         import FASTInputFile
     from .fast_output_file        import FASTOutputFile
@@ -59,42 +69,74 @@ def fileFormats():
     formats.append(FileFormat(NetCDFFile))
     formats.append(FileFormat(VTKFile))
     formats.append(FileFormat(TDMSFile)) 
-    return formats
+    extIndex = {}
+    extPatterns = []
+    for i, myformat in enumerate(formats):
+        for ef in myformat.extensions:
+            if '*' in ef:
+                pat = ef.replace('.','\\.').replace('$','\\$').replace('*','[.]*')
+                extPatterns.append((i, re.compile(pat)))
+            else:
+                extIndex.setdefault(ef.lower(), []).append(i)
+    _FORMATS, _EXT_INDEX, _EXT_PATTERNS = formats, extIndex, extPatterns
+
+def fileFormats():
+    """ Returns the list of known file formats """
+    if _FORMATS is None:
+        _buildFormats()
+    return list(_FORMATS)
+
+def clearDetectCache():
+    """ Clear the cache of detected formats """
+    _DETECT_CACHE.clear()
 
+def _candidateFormats(ext):
+    """ Indices of the formats matching a given extension, in the order of the list of formats """
+    if _FORMATS is None:
+        _buildFormats()
+    I = list(_EXT_INDEX.get(ext, []))
+    I += [i for i, pat in _EXT_PATTERNS if pat.match(ext) is not None and i not in I]
+    return sorted(I)
 
-def detectFormat(filename):
-    """ Detect the file formats by looping through the known list. 
+def detectFormat(filename, useCache=True):
+    """ Detect the file formats by looping through the known formats matching the file extension. 
         The method may simply try to open the file, if that's the case
-        the read file is returned. """
+        the read file is returned. 
+        The first bytes of the file are read once to quickly discard some formats ("sniffing").
+        The format detected is stored in a cache, as long as the file is not modified.
+    """
     import os
-    import re
-    formats=fileFormats()
     ext = os.path.splitext(filename.lower())[1]
-    detected = False
-    i = 0 
-    while not detected and i<len(formats):
-        myformat = formats[i]
-        if ext in myformat.extensions:
-            extMatch = True
-        else:
-            # Try patterns if present
-            extPatterns = [ef.replace('.','\.').replace('$','\$').replace('*','[.]*') for ef in myformat.extensions if '*' in ef]
-            if len(extPatterns)>0:
-                extPatMatch = [re.match(pat, ext) is not None for pat in extPatterns]
-                extMatch = any(extPatMatch)
-            else:
-                extMatch = False
-        if extMatch: # we have a match on the extension
-            valid, F = myformat.isValid(filename)
-            if valid:
-                #print('File detected as :',myformat)
-                detected=True
-                return myformat,F
+    key = os.path.abspath(filename)
+    try:
+        stat = os.stat(filename)
+        sig = (stat.st_mtime, stat.st_size)
+    except OSError:
+        sig = None
+    candidates = _candidateFormats(ext)
+    if useCache and sig is not None and key in _DETECT_CACHE:
+        mtime, size, i = _DETECT_CACHE[key]
+        if (mtime, size) == sig:
+            return _FORMATS[i], None
+
+    header = None
+    if sig is not None and len(candidates)>0:
+        with open(filename, 'rb') as f:
+            header = f.read(SNIFF_SIZE)
 
-        i += 1
+    for i in candidates:
+        myformat = _FORMATS[i]
+        sniff = getattr(myformat.constructor, 'sniff', None)
+        if header is not None and sniff is not None and sniff(header) is False:
+            continue
+        valid, F = myformat.isValid(filename)
+        if valid:
+            #print('File detected as :',myformat)
+            if sig is not None:
+                _DETECT_CACHE[key] = (sig[0], sig[1], i)
+            return myformat,F
 
-    if not detected:
-        raise FormatNotDetectedError('The file format could not be detected for the file: '+filename)
+    raise FormatNotDetectedError('The file format could not be detected for the file: '+filename)
 
 def read(filename,fileformat=None):
     F = None
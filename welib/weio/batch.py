@@ -0,0 +1,247 @@
+"""
+Read many files (possibly in parallel) into a single dataframe.
+
+Typical use, for a set of OpenFAST simulations:
+
+    from welib.weio.batch import readFiles
+    from welib.weio.fast_output_file import FASTOutputFile
+
+    # Full time series, concatenated, with the file name as first index level
+    df = readFiles(outFiles, fileformat=FASTOutputFile, readKwargs={'channels':['RotSpeed','GenPwr']})
+
+    # One row per file, using a reduction applied in worker processes
+    # (with parallel=True, the function needs to be defined at the module level, so that it can be pickled)
+    def reduce(df):
+        return df.mean()
+    dfMean = readFiles(outFiles, reduce=reduce, parallel=True, cacheFile='_means.npz')
+
+The optional cache file (.parquet, .feather, .npz or .pkl) is reused as long as it is newer
+than all the files, and it was written for the same list of files (including the missing ones)
+with the same file format, read options and reduction (see `cacheKey`).
+"""
+import os
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+
+_INDEX_PREFIX = '__index__'
+
+
+def readFiles(filenames, reduce=None, fileformat=None, readKwargs=None, parallel=False, nCores=None,
+        cacheFile=None, overwrite=False, keyName='file', cacheKey=None, verbose=False):
+    """
+    Read a list of files, convert them to dataframes, apply an optional reduction, and concatenate the results.
+
+    INPUTS:
+      - filenames: list of files to be read
+      - reduce: function applied to the dataframe of each file, returning a DataFrame, a Series or a dict.
+                If a Series or a dict is returned, the file contributes to one row of the output.
+                None: the full dataframes are concatenated
+      - fileformat: a FileFormat, a File class (e.g. FASTOutputFile) or None to detect the format of each file
+      - readKwargs: dictionary of keyword arguments passed to the File class (e.g. {'channels':[...]})
+                    (requires `fileformat`)
+      - parallel: if True, the files are read using a pool of processes. 
+                  If `reduce` or `fileformat` cannot be pickled (e.g. lambda), the files are read serially.
+      - nCores: number of processes. None: number of cpus
+      - cacheFile: if provided, the result is stored in this file (.parquet, .feather, .npz or .pkl)
+                   and read back by subsequent calls, unless the files have changed
+      - overwrite: if True, the cache file is not used but is rewritten
+      - keyName: name of the index level (or index) containing the filenames
+      - cacheKey: string identifying the reduction in the cache signature. 
+                  None: the name and bytecode of `reduce` are used
+    OUTPUTS:
+      - df: dataframe with the filenames as (first level of the) index
+    """
+    filenames = [str(f) for f in filenames]
+    if readKwargs is None:
+        readKwargs = {}
+    if len(readKwargs)>0 and fileformat is None:
+        raise Exception('`fileformat` needs to be provided when `readKwargs` are used')
+
+    # --- Cache
+    signature = _cacheSignature(fileformat, readKwargs, reduce, cacheKey, filenames)
+    if cacheFile is not None and not overwrite and os.path.exists(cacheFile):
+        if _cacheIsValid(cacheFile, filenames):
+            df, cacheSignature = _readCache(cacheFile)
+            if cacheSignature == signature:
+                if verbose:
+                    print('[INFO] Using cache file: ', cacheFile)
+                return df
+
+    # --- Reading files
+    args = [(f, fileformat, readKwargs, reduce) for f in filenames]
+    if parallel and len(filenames)>1:
+        try:
+            pickle.dumps((fileformat, readKwargs, reduce))
+        except Exception as e:
+            print('[WARN] Cannot pickle the reduce function or read options ({}), reading files serially'.format(e))
+            parallel = False
+    if parallel and len(filenames)>1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if nCores is None:
+            nCores = multiprocessing.cpu_count()
+        nCores    = max(min(nCores, len(filenames)), 1)
+        chunksize = max(len(filenames)//(4*nCores), 1)
+        with ProcessPoolExecutor(max_workers=nCores) as executor:
+            results = list(executor.map(_readOne, args, chunksize=chunksize))
+    else:
+        results = [_readOne(a) for a in args]
+
+    # --- Concatenating results
+    dfs  = []
+    keys = []
+    invalidFiles = []
+    for f, (df, err) in zip(filenames, results):
+        if df is None:
+            invalidFiles.append(f)
+            if verbose:
+                print('[WARN] Failed to read {}: {}'.format(f, err))
+            continue
+        dfs.append(df)
+        keys.append(f)
+    if len(invalidFiles)==len(filenames):
+        raise Exception('None of the files can be read (or exist)!')
+    elif len(invalidFiles)>0:
+        print('[WARN] There were {} missing/invalid files: {}'.format(len(invalidFiles),invalidFiles))
+
+    if all([isinstance(df, pd.Series) for df in dfs]):
+        df = pd.DataFrame(dfs, index=pd.Index(keys, name=keyName))
+    else:
+        dfs = [df.to_frame().T if isinstance(df, pd.Series) else df for df in dfs]
+        df = pd.concat(dfs, keys=keys, names=[keyName, None])
+
+    if cacheFile is not None:
+        _writeCache(cacheFile, df, signature)
+    return df
+
+
+def _readOne(args):
+    """ Read one file and apply the reduction. Returns (result, None) or (None, error message) """
+    filename, fileformat, readKwargs, reduce = args
+    try:
+        if fileformat is None:
+            from welib.weio import read
+            F = read(filename)
+        elif hasattr(fileformat, 'constructor'):
+            F = fileformat.constructor(filename=filename, **readKwargs)
+        else:
+            F = fileformat(filename, **readKwargs)
+        df = F.toDataFrame()
+        if not isinstance(df, pd.DataFrame):
+            raise Exception('toDataFrame did not return a DataFrame')
+        if reduce is not None:
+            df = reduce(df)
+            if isinstance(df, dict):
+                df = pd.Series(df)
+    except Exception as e:
+        return None, '{}: {}'.format(type(e).__name__, e)
+    return df, None
+
+
+def _cacheIsValid(cacheFile, filenames):
+    """ The cache is valid if it is newer than all the files """
+    tCache = os.path.getmtime(cacheFile)
+    for f in filenames:
+        if os.path.exists(f) and os.path.getmtime(f)>tCache:
+            return False
+    return True
+
+
+def _cacheSignature(fileformat, readKwargs, reduce, cacheKey=None, filenames=None):
+    """ String identifying the file format, read options, reduction and list of requested files used to build a cache """
+    if fileformat is None:
+        formatName = 'auto'
+    elif hasattr(fileformat, 'constructor'):
+        formatName = getattr(fileformat.constructor, '__name__', repr(fileformat.constructor))
+    else:
+        formatName = getattr(fileformat, '__name__', type(fileformat).__name__)
+    if cacheKey is not None:
+        reduceKey = str(cacheKey)
+    elif reduce is None:
+        reduceKey = 'None'
+    else:
+        reduceKey = '{}.{}'.format(getattr(reduce, '__module__', ''), getattr(reduce, '__qualname__', type(reduce).__name__))
+        code = getattr(reduce, '__code__', None)
+        if code is not None:
+            # lambdas and local functions share the same qualified name, the bytecode distinguishes them
+            h = hashlib.md5(code.co_code)
+            h.update(repr((code.co_consts, code.co_names)).encode())
+            reduceKey += ':' + h.hexdigest()
+    signature = '{}|{}|{}'.format(formatName, repr(sorted(readKwargs.items())), reduceKey)
+    if filenames is not None:
+        # Requested files (valid or not, the invalid files are not in the cached dataframe), and the missing ones
+        h = hashlib.md5(repr([(f, os.path.exists(f)) for f in filenames]).encode())
+        signature += '|' + h.hexdigest()
+    return signature
+
+
+def _writeCache(cacheFile, df, signature=''):
+    ext = os.path.splitext(cacheFile)[1].lower()
+    if ext=='.pkl':
+        with open(cacheFile, 'wb') as f:
+            pickle.dump({'signature': signature, 'df': df}, f)
+    elif ext=='.parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(_arrowTable(df, signature), cacheFile)
+    elif ext in ['.feather', '.npz']:
+        # The index levels are stored as columns with a prefix
+        dfFlat = df.copy()
+        dfFlat.index.names = [_INDEX_PREFIX+(str(n) if n is not None else str(i)) for i,n in enumerate(df.index.names)]
+        dfFlat = dfFlat.reset_index()
+        dfFlat.columns = [str(c) for c in dfFlat.columns]
+        if ext=='.feather':
+            import pyarrow.feather as feather
+            feather.write_feather(_arrowTable(dfFlat, signature, preserve_index=False), cacheFile)
+        else:
+            arrays = {'col{:d}'.format(i): dfFlat[c].values for i,c in enumerate(dfFlat.columns)}
+            arrays = {k: v.astype(str) if v.dtype==object else v for k,v in arrays.items()} # no pickle
+            with open(cacheFile, 'wb') as f:
+                np.savez(f, _columns=np.array(dfFlat.columns, dtype=str), _signature=np.array(signature), **arrays)
+    else:
+        raise NotImplementedError('Cache file extension {}, use .parquet, .feather, .npz or .pkl'.format(ext))
+
+
+def _arrowTable(df, signature, preserve_index=None):
+    """ Arrow table of a dataframe, with the cache signature stored in the schema metadata """
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=preserve_index)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'welib_signature'] = signature.encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def _readCache(cacheFile):
+    """ Returns the dataframe stored in the cache file and the signature of the cache (None if absent) """
+    ext = os.path.splitext(cacheFile)[1].lower()
+    if ext=='.pkl':
+        with open(cacheFile, 'rb') as f:
+            data = pickle.load(f)
+        if isinstance(data, dict):
+            return data['df'], data.get('signature', None)
+        return data, None
+    elif ext in ['.parquet', '.feather']:
+        if ext=='.parquet':
+            import pyarrow.parquet as pq
+            table = pq.read_table(cacheFile)
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(cacheFile)
+        signature = (table.schema.metadata or {}).get(b'welib_signature', None)
+        signature = signature.decode() if signature is not None else None
+        if ext=='.parquet':
+            return table.to_pandas(), signature
+        dfFlat = table.to_pandas()
+    elif ext=='.npz':
+        with np.load(cacheFile, allow_pickle=False) as data:
+            columns = list(data['_columns'])
+            signature = str(data['_signature']) if '_signature' in data.files else None
+            dfFlat = pd.DataFrame({c: data['col{:d}'.format(i)] for i,c in enumerate(columns)})
+    else:
+        raise NotImplementedError('Cache file extension {}, use .parquet, .feather, .npz or .pkl'.format(ext))
+    IIndex = [c for c in dfFlat.columns if c.startswith(_INDEX_PREFIX)]
+    df = dfFlat.set_index(IIndex)
+    names = [n[len(_INDEX_PREFIX):] for n in IIndex]
+    df.index.names = [None if n.isdigit() else n for n in names]
+    return df, signature
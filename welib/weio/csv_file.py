@@ -5,7 +5,7 @@ from future import standard_library
 standard_library.install_aliases()
 import os
 
-from .file import File, WrongFormatError
+from .file import File, WrongFormatError, isBinaryHeader
 import pandas as pd
 
 class CSVFile(File):
@@ -33,6 +33,11 @@ class CSVFile(File):
     def formatName():
         return 'CSV file'
 
+    @staticmethod
+    def sniff(header):
+        if isBinaryHeader(header):
+            return False
+
     def __init__(self, filename=None, sep=None, colNames=[], commentChar=None, commentLines=[],\
                        colNamesLine=None, detectColumnNames=True, header=None, **kwargs):
         self.sep          = sep
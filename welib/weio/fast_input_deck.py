@@ -12,7 +12,7 @@ import numpy as np
 import re
 import pandas as pd
 
-from .fast_input_file import FASTInputFile
+from .fast_input_file import FASTInputFile, readCached
 
 __all__  = ['FASTInputDeck']
 # --------------------------------------------------------------------------------}
@@ -21,7 +21,7 @@ __all__  = ['FASTInputDeck']
 class FASTInputDeck(dict):
     """Container for input files that make up a FAST input deck"""
 
-    def __init__(self, fullFstPath='', readlist=['all'], verbose=False):
+    def __init__(self, fullFstPath='', readlist=['all'], verbose=False, useCache=False, cacheDir=None):
         """Read FAST master file and read inputs for FAST modules
 
         INPUTS:
@@ -31,10 +31,15 @@ class FASTInputDeck(dict):
                 where: 
                  AF: airfoil polars
                  AC: airfoil coordinates (if present)
+          - useCache: if True, files are parsed once and copied from a cache on subsequent reads
+                      (see fast_input_file.readCached). Default: False, files are always parsed
+          - cacheDir: directory where parsed files are stored as pickles (optional)
 
         """
         self.filename = fullFstPath
         self.verbose  = verbose
+        self.useCache = useCache
+        self.cacheDir = cacheDir
         self.readlist = readlist
         if not type(self.readlist) is list:
             self.readlist=[readlist]
@@ -248,7 +253,10 @@ class FASTInputDeck(dict):
         # Attempt reading
         fullpath =os.path.join(self.FAST_directory, relfilepath)
         try:
-            data = FASTInputFile(fullpath)
+            if self.useCache:
+                data = readCached(fullpath, cacheDir=self.cacheDir)
+            else:
+                data = FASTInputFile(fullpath)
             if self.verbose:
                 print('>>> Read: ',fullpath)
             self.inputfiles[shortkey] = fullpath
@@ -8,7 +8,7 @@ from builtins import str
 from future import standard_library
 standard_library.install_aliases()
 try:
-    from .file import File, WrongFormatError, BrokenFormatError
+    from .file import File, WrongFormatError, BrokenFormatError, isBinaryHeader
 except:
     # --- Allowing this file to be standalone..
     class WrongFormatError(Exception):
@@ -44,10 +44,16 @@ except:
                 raise Exception('No filename provided')
         def toDataFrame(self):
             return self._toDataFrame()
+    def isBinaryHeader(header):
+        if header.startswith((b'\xff\xfe', b'\xfe\xff')): # UTF-16 BOM
+            return False
+        return b'\x00' in header
 import os
+import copy
 import numpy as np
 import re
 import pandas as pd
+from collections import OrderedDict
 
 __all__  = ['FASTInputFile']
 
@@ -94,7 +100,13 @@ class FASTInputFile(File):
     def formatName():
         return 'FAST input file'
 
+    @staticmethod
+    def sniff(header):
+        if isBinaryHeader(header):
+            return False
+
     def __init__(self, filename=None, **kwargs):
+        self._labelIndex = None
         super(FASTInputFile, self).__init__(filename=filename,**kwargs)
 
     def keys(self):
@@ -108,25 +120,32 @@ class FASTInputFile(File):
         else:
             return i
 
+    def _buildLabelIndex(self):
+        """ Case insensitive dictionary: label -> indices in self.data """
+        self._labelIndex = {}
+        for i,d in enumerate(self.data):
+            self._labelIndex.setdefault(d['label'].lower(), []).append(i)
+        self._labelIndexN = len(self.data)
+
     def getIDs(self,label):
-        I=[]
-        # brute force search
-        for i in range(len(self.data)):
-            d = self.data[i]
-            if d['label'].lower()==label.lower():
-                I.append(i)
+        L = label.lower()
+        if getattr(self, '_labelIndex', None) is None or self._labelIndexN != len(self.data):
+            self._buildLabelIndex()
+        I = self._labelIndex.get(L, [])
+        if len(I)==0 or any([self.data[i]['label'].lower()!=L for i in I]):
+            # The labels may have been changed in place, index rebuilt
+            self._buildLabelIndex()
+            I = self._labelIndex.get(L, [])
         if len(I)<0:
             raise KeyError('Variable `'+ label+'` not found in FAST file:'+self.filename)
         else:
-            return I
+            return list(I)
 
     def getIDSafe(self,label):
-        # brute force search
-        for i in range(len(self.data)):
-            d = self.data[i]
-            if d['label'].lower()==label.lower():
-                return i
-        return -1
+        I = self.getIDs(label)
+        if len(I)==0:
+            return -1
+        return I[0]
 
     # Making object an iterator
     def __iter__(self):
@@ -162,6 +181,9 @@ class FASTInputFile(File):
         if descr is not None:
             d['descr']=descr
         self.data.append(d)
+        if getattr(self, '_labelIndex', None) is not None and self._labelIndexN==len(self.data)-1:
+            self._labelIndex.setdefault(key.lower(), []).append(len(self.data)-1)
+            self._labelIndexN += 1
 
     def _read(self):
 
@@ -216,6 +238,7 @@ class FASTInputFile(File):
 
 
         self.data   = []
+        self._labelIndex = None
         self.hasNodal=False
         self.module = None
         #with open(self.filename, 'r', errors="surrogateescape") as f:
@@ -385,7 +408,7 @@ class FASTInputFile(File):
                 else:
                     nTabLines = self[d['tabDimVar']]
                 #print('Reading table {} Dimension {} (based on {})'.format(d['label'],nTabLines,d['tabDimVar']));
-                d['value'], d['tabColumnNames'], d['tabUnits'] = parseFASTNumTable(self.filename,lines[i:i+nTabLines+nHeaders],nTabLines,i,nHeaders,tableType=tab_type)
+                d = LazyTable(d, self.filename,lines[i:i+nTabLines+nHeaders],nTabLines,i,nHeaders,tableType=tab_type)
                 i += nTabLines+nHeaders-1
 
                 # --- Temporary hack for e.g. SubDyn, that has duplicate table, impossible to detect in the current way...
@@ -428,7 +451,7 @@ class FASTInputFile(File):
                 else:
                     nTabLines = self[d['tabDimVar']]
                 #print('Reading table {} Dimension {} (based on {})'.format(d['label'],nTabLines,d['tabDimVar']));
-                d['value'], d['tabColumnNames'], d['tabUnits'] = parseFASTNumTable(self.filename,lines[i:i+nTabLines+nHeaders+nOffset],nTabLines,i,nHeaders,tableType=tab_type,nOffset=nOffset)
+                d = LazyTable(d, self.filename,lines[i:i+nTabLines+nHeaders+nOffset],nTabLines,i,nHeaders,tableType=tab_type,nOffset=nOffset)
                 i += nTabLines+1-nOffset
 
                 # --- Temporary hack for e.g. SubDyn, that has duplicate table, impossible to detect in the current way...
@@ -886,31 +909,94 @@ class FASTInputFile(File):
 
     def readBeamDynProps(self,lines,iStart):
         nStations=self['station_total']
-        #M=np.zeros((nStations,1+36+36))
-        M    = np.zeros((nStations,6,6))
-        K    = np.zeros((nStations,6,6))
-        span = np.zeros(nStations)
-        i=iStart;
-        try:
-            for j in range(nStations):
-                # Read span location
-                span[j]=float(lines[i]); i+=1;
-                # Read stiffness matrix
-                K[j,:,:]=np.array((' '.join(lines[i:i+6])).split()).astype(float).reshape(6,6)
-                i+=7
-                # Read mass matrix
-                M[j,:,:]=np.array((' '.join(lines[i:i+6])).split()).astype(float).reshape(6,6)
-                i+=7
-        except: 
-            raise WrongFormatError('An error occured while reading section {}/{}'.format(j+1,nStations))
-
+        if len(lines)<iStart+15*nStations-1:
+            raise WrongFormatError('Not enough lines to read {} sections'.format(nStations))
         d = getDict()
         d['label']   = 'BeamProperties'
         d['descr']   = ''
         d['tabType'] = TABTYPE_NUM_BEAMDYN
-        d['value']   = {'span':span, 'K':K, 'M':M}
+        # Sections are parsed when first accessed
+        d = LazyTable(d, lines[iStart:iStart+15*nStations], nStations, parser=parseBeamDynProps, keys=['value'])
         self.data.append(d)
 
+# --------------------------------------------------------------------------------}
+# --- Cache of parsed files 
+# --------------------------------------------------------------------------------{
+_CACHE_MAXSIZE = 2000
+_CACHE_PARSED  = OrderedDict() # content digest -> parsed FASTInputFile (least recently used first)
+_CACHE_DIGESTS = OrderedDict() # (path, mtime, size) -> content digest (least recently used first)
+
+def readCached(filename, cacheDir=None):
+    """ 
+    Read a FAST input file, using a cache of parsed files. 
+    The cache is content-addressed: identical files (e.g. copies of a template) are parsed only once.
+    The content of a file is only hashed when its (path, mtime, size) is not known.
+    A copy of the cached file is returned, it can be modified freely.
+
+    INPUTS:
+      - filename: FAST input file
+      - cacheDir: if provided, the parsed files are also stored as pickles in this directory, 
+                  so that they can be reused by other processes/sessions.
+    """
+    import hashlib
+    import pickle
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key  = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _CACHE_DIGESTS.get(key, None)
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+    _CACHE_DIGESTS[key] = digest
+    _CACHE_DIGESTS.move_to_end(key)
+    F = _CACHE_PARSED.get(digest, None)
+    if F is None and cacheDir is not None:
+        pklFile = os.path.join(cacheDir, digest+'.pkl')
+        if os.path.exists(pklFile):
+            try:
+                with open(pklFile, 'rb') as f:
+                    F = pickle.load(f)
+            except Exception:
+                F = None # corrupted or incompatible pickle, file is parsed again
+    if F is None:
+        F = FASTInputFile(path)
+        if cacheDir is not None:
+            if not os.path.exists(cacheDir):
+                os.makedirs(cacheDir)
+            with open(os.path.join(cacheDir, digest+'.pkl'), 'wb') as f:
+                pickle.dump(F, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _CACHE_PARSED[digest] = F
+    _CACHE_PARSED.move_to_end(digest)
+    _evictCache()
+    FCopy = copy.deepcopy(F)
+    FCopy.filename = filename
+    # Unparsed tables of the copy are taken from the cached file, such that they are parsed only once
+    for d, dCopy in zip(F.data, FCopy.data):
+        if isinstance(dCopy, LazyTable) and not dCopy.isLoaded:
+            keys = dCopy._lazy[3]
+            dCopy._lazy = (_copyTableValues, (d, keys), {}, keys)
+    return FCopy
+
+def _evictCache():
+    """ Limit the size of the cache, keys of evicted files are removed together with them """
+    evicted = set()
+    while len(_CACHE_PARSED)>_CACHE_MAXSIZE:
+        evicted.add(_CACHE_PARSED.popitem(last=False)[0])
+    if len(evicted)>0:
+        for key in [k for k,digest in _CACHE_DIGESTS.items() if digest in evicted]:
+            del _CACHE_DIGESTS[key]
+    while len(_CACHE_DIGESTS)>_CACHE_MAXSIZE:
+        _CACHE_DIGESTS.popitem(last=False)
+
+def _copyTableValues(d, keys):
+    values = [copy.deepcopy(d[k]) for k in keys]
+    return values[0] if len(keys)==1 else values
+
+def clearCache():
+    """ Clear the in-memory cache of parsed files (see readCached) """
+    _CACHE_PARSED.clear()
+    _CACHE_DIGESTS.clear()
+
 # --------------------------------------------------------------------------------}
 # --- Helper functions 
 # --------------------------------------------------------------------------------{
@@ -1228,6 +1314,113 @@ def parseFASTNumTable(filename,lines,n,iStart,nHeaders=2,tableType='num',nOffset
     return Tab, ColNames, Units
 
 
+def parseBeamDynProps(lines,nStations):
+    """ Parse the sections of a BeamDyn blade file, returns a dictionary with span, K, and M """
+    #M=np.zeros((nStations,1+36+36))
+    M    = np.zeros((nStations,6,6))
+    K    = np.zeros((nStations,6,6))
+    span = np.zeros(nStations)
+    i=0
+    try:
+        for j in range(nStations):
+            # Read span location
+            span[j]=float(lines[i]); i+=1;
+            # Read stiffness matrix
+            K[j,:,:]=np.array((' '.join(lines[i:i+6])).split()).astype(float).reshape(6,6)
+            i+=7
+            # Read mass matrix
+            M[j,:,:]=np.array((' '.join(lines[i:i+6])).split()).astype(float).reshape(6,6)
+            i+=7
+    except: 
+        raise WrongFormatError('An error occured while reading section {}/{}'.format(j+1,nStations))
+    return {'span':span, 'K':K, 'M':M}
+
+
+class LazyTable(dict):
+    """ 
+    Dictionary for a table of a FAST input file (see getDict), where the values are only parsed 
+    from the lines of the file when they are first accessed. 
+    The parser returns the values of `keys`.
+    """
+    def __init__(self, d, *args, **kwargs):
+        parser = kwargs.pop('parser', parseFASTNumTable)
+        keys   = kwargs.pop('keys', ['value','tabColumnNames','tabUnits'])
+        dict.__init__(self, d)
+        for k in keys:
+            dict.__setitem__(self, k, None)
+        if parser is parseFASTNumTable:
+            # Cheap check done upfront (see parseFASTNumTable)
+            filename, lines, n = args[:3]
+            nLinesExpected = n+kwargs.get('nHeaders', args[4] if len(args)>4 else 2)+kwargs.get('nOffset', 0)
+            if len(lines)!=nLinesExpected:
+                raise BrokenFormatError('Not enough lines in table: {} lines instead of {}\nFile:{}'.format(len(lines), nLinesExpected, filename))
+        self._lazy = (parser, args, kwargs, keys)
+
+    def _load(self):
+        if self._lazy is not None:
+            parser, args, kwargs, keys = self._lazy
+            values = parser(*args, **kwargs)
+            if len(keys)==1:
+                values = [values]
+            self._lazy = None
+            for k,v in zip(keys, values):
+                dict.__setitem__(self, k, v)
+
+    @property
+    def isLoaded(self):
+        return self._lazy is None
+
+    def __getitem__(self, key):
+        if self._lazy is not None and key in self._lazy[3]:
+            self._load()
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if self._lazy is not None and key in self._lazy[3]:
+            self._load()
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        self._load()
+        dict.__setitem__(self, key, value)
+
+    def __iter__(self):
+        # NOTE: overriden such that dict(d) uses __getitem__
+        return dict.__iter__(self)
+
+    def _loaded(method):
+        def wrapped(self, *args, **kwargs):
+            self._load()
+            return method(self, *args, **kwargs)
+        wrapped.__name__ = method.__name__
+        return wrapped
+    items      = _loaded(dict.items)
+    values     = _loaded(dict.values)
+    copy       = _loaded(dict.copy)
+    pop        = _loaded(dict.pop)
+    popitem    = _loaded(dict.popitem)
+    setdefault = _loaded(dict.setdefault)
+    update     = _loaded(dict.update)
+    __eq__     = _loaded(dict.__eq__)
+    __ne__     = _loaded(dict.__ne__)
+    __repr__   = _loaded(dict.__repr__)
+    del _loaded
+
+    def __reduce__(self):
+        # Copies and pickles keep the table unparsed
+        return (_rebuildLazyTable, (dict(dict.items(self)), self._lazy))
+
+    def __deepcopy__(self, memo):
+        # The lines of the table are not modified, they are shared between copies
+        return _rebuildLazyTable(copy.deepcopy(dict(dict.items(self)), memo), self._lazy)
+
+def _rebuildLazyTable(d, lazy):
+    t = LazyTable.__new__(LazyTable)
+    dict.update(t, d)
+    t._lazy = lazy
+    return t
+
+
 def parseFASTFilTable(lines,n,iStart):
     Tab = []
     try:
@@ -3,10 +3,15 @@ from __future__ import print_function
 from __future__ import absolute_import
 from io import open
 from .file import File, isBinary, WrongFormatError, BrokenFormatError
+import os
+import pickle
 import pandas as pd
 import numpy as np
 import re
 
+_NUMPY_C_LOADTXT = tuple(int(v) for v in np.__version__.split('.')[:2]) >= (1, 23)
+_CHUNK = 2000 # number of lines of a matrix converted at once
+
 class FASTLinearizationFile(File):
     """ 
     Read/write an OpenFAST linearization file. The object behaves like a dictionary.
@@ -32,6 +37,9 @@ class FASTLinearizationFile(File):
         print(df['A'].columns)
         print(df['A'])
 
+        # read only the state matrix, in single precision
+        f = FASTLinearizationFile('5MW.1.lin', matrices=['A'], dtype='float32')
+
     """
     @staticmethod
     def defaultExtensions():
@@ -41,8 +49,15 @@ class FASTLinearizationFile(File):
     def formatName():
         return 'FAST linearization output'
 
-    def _read(self, *args, **kwargs):
+    def _read(self, matrices=None, dtype=None, *args, **kwargs):
+        """ 
+        matrices: list of matrices to be read, among 'A', 'B', 'C', 'D', 'M', 'dUdu', 'dUdy'. 
+                  The other blocks are skipped without being parsed. None: all matrices
+        dtype   : type of the matrices (e.g. 'float32' to halve memory). None: float64
+        """
         self['header']=[]
+        if dtype is None:
+            dtype = np.float64
 
         def extractVal(lines, key):
             for l in lines:
@@ -87,9 +102,34 @@ class FASTLinearizationFile(File):
                     break
             return OP, Var
 
+        def readLines(lines, m):
+            # Bulk conversion of a block of lines
+            try:
+                if _NUMPY_C_LOADTXT:
+                    return np.loadtxt(lines, ndmin=2, dtype=dtype).reshape(len(lines),m)
+                else:
+                    return np.fromstring(''.join(lines), sep=' ', dtype=dtype).reshape(len(lines),m)
+            except ValueError:
+                vals=[l.strip().split() for l in lines]
+                return np.array(vals).astype(float)
+
         def readMat(fid, n, m):
-            vals=[f.readline().strip().split() for i in np.arange(n)]
-            return np.array(vals).astype(float)
+            if n==0:
+                return np.array([]).astype(dtype)
+            # Conversion by chunks into a preallocated array, to limit memory usage
+            M = np.empty((n,m), dtype=dtype)
+            for i0 in range(0, n, _CHUNK):
+                lines=[fid.readline() for i in range(min(_CHUNK, n-i0))]
+                M[i0:i0+len(lines),:] = readLines(lines, m)
+            return M
+
+        def setMat(fid, key, n, m):
+            if matrices is not None and key not in matrices:
+                # Skipping the block by line counting
+                for i in range(n):
+                    fid.readline()
+            else:
+                self[key] = readMat(fid, n, m)
 
         # Reading 
         with open(self.filename, 'r', errors="surrogateescape") as f:
@@ -115,7 +155,7 @@ class FASTLinearizationFile(File):
             except:
                 self['WindSpeed'] = None
 
-            KEYS=['Order of','A:','B:','C:','D:','ED M:']
+            KEYS=['Order of','A:','B:','C:','D:','ED M:','dUdu:','dUdy:']
 
             for i, line in enumerate(f):
                 line = line.strip()
@@ -130,16 +170,20 @@ class FASTLinearizationFile(File):
                     elif line.find('Order of outputs')>=0:
                         self['y'], self['y_info'] = readOP(f, ny)
                     elif line.find('A:')>=0:
-                        self['A'] = readMat(f, nx, nx)
+                        setMat(f, 'A', nx, nx)
                     elif line.find('B:')>=0:
-                        self['B'] = readMat(f, nx, nu)
+                        setMat(f, 'B', nx, nu)
                     elif line.find('C:')>=0:
-                        self['C'] = readMat(f, ny, nx)
+                        setMat(f, 'C', ny, nx)
                     elif line.find('D:')>=0:
-                        self['D'] = readMat(f, ny, nu)
+                        setMat(f, 'D', ny, nu)
+                    elif line.find('dUdu:')>=0:
+                        setMat(f, 'dUdu', nu, nu)
+                    elif line.find('dUdy:')>=0:
+                        setMat(f, 'dUdy', nu, ny)
                     elif line.find('ED M:')>=0:
                         self['EDDOF'] = line[5:].split()
-                        self['M']     = readMat(f, 24, 24)
+                        setMat(f, 'M', 24, 24)
 
     def toString(self):
         s=''
@@ -322,3 +366,36 @@ class FASTLinearizationFile(File):
         return dfs
 
 
+def readCached(filename, cacheDir=None, matrices=None, dtype=None):
+    """ 
+    Read a linearization file, using a binary cache (pickle) of its content.
+    The cache file (`<filename>.pkl`, stored next to the file or in `cacheDir`) is reused 
+    as long as the size and modification time of the .lin file are unchanged.
+    See `FASTLinearizationFile._read` for `matrices` and `dtype`.
+    """
+    st = os.stat(filename)
+    signature = (st.st_mtime_ns, st.st_size, None if matrices is None else sorted(matrices), None if dtype is None else np.dtype(dtype).str)
+    if cacheDir is None:
+        cacheFile = filename+'.pkl'
+    else:
+        cacheFile = os.path.join(cacheDir, os.path.basename(filename)+'.pkl')
+    lin = FASTLinearizationFile()
+    lin.filename = filename
+    if os.path.exists(cacheFile):
+        try:
+            with open(cacheFile, 'rb') as fid:
+                cache = pickle.load(fid)
+            if cache['signature']==signature:
+                lin.update(cache['data'])
+                return lin
+        except Exception:
+            pass # corrupted or incompatible cache, it is rewritten below
+    lin.read(filename, matrices=matrices, dtype=dtype)
+    try:
+        if cacheDir is not None and not os.path.exists(cacheDir):
+            os.makedirs(cacheDir)
+        with open(cacheFile, 'wb') as fid:
+            pickle.dump({'signature':signature, 'data':dict(lin)}, fid, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        print('[WARN] Unable to write linearization cache file: {}'.format(cacheFile))
+    return lin
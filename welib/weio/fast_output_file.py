@@ -40,6 +40,9 @@ class FASTOutputFile(File):
         time  = df['Time_[s]']
         Omega = df['RotSpeed_[rpm]']
 
+        # read only some channels within a time range (binary files are memory-mapped)
+        df = FASTOutputFile('5MW.outb', channels=['RotSpeed','GenPwr_[kW]'], tRange=[100,600]).toDataFrame()
+
     """
 
     @staticmethod
@@ -50,7 +53,12 @@ class FASTOutputFile(File):
     def formatName():
         return 'FAST output file'
 
-    def _read(self):
+    def _read(self, channels=None, tRange=None, dtype=None):
+        """ 
+        channels: list of channel names (with or without units) to be read, Time is always read. None: all channels
+        tRange  : [tmin, tmax], time range to be read. None: all time steps
+        dtype   : type of the data (e.g. 'float32' to reduce memory). None: float64
+        """
         def readline(iLine):
             with open(self.filename) as f:
                 for i, line in enumerate(f):
@@ -66,9 +74,13 @@ class FASTOutputFile(File):
         self['binary']=False
         try:
             if ext in ['.out','.elev']:
-                self.data, self.info = load_ascii_output(self.filename)
+                self.data, self.info = load_ascii_output(self.filename, channels=channels, dtype=dtype)
+                channels = None # already selected
             elif ext=='.outb':
-                self.data, self.info = load_binary_output(self.filename)
+                if channels is None and tRange is None and dtype is None:
+                    self.data, self.info = load_binary_output(self.filename)
+                else:
+                    self.data, self.info = load_binary_output_memmap(self.filename, channels=channels, tRange=tRange, dtype=dtype or 'float64')
                 self['binary']=True
             elif ext=='.elm':
                 F=CSVFile(filename=self.filename, sep=' ', commentLines=[0,2],colNamesLine=1)
@@ -86,6 +98,9 @@ class FASTOutputFile(File):
         if self.info['attribute_units'] is not None:
             self.info['attribute_units'] = [re.sub(r'[()\[\]]','',u) for u in self.info['attribute_units']]
 
+        if not self['binary'] and (channels is not None or tRange is not None):
+            self.data, self.info = _select_output(self.data, self.info, channels, tRange)
+
 
     def _write(self): 
         if self['binary']:
@@ -144,7 +159,22 @@ def load_output(filename):
             return load_binary_output(filename)
     return load_ascii_output(filename)
 
-def load_ascii_output(filename):
+_NUMPY_C_LOADTXT = tuple(int(v) for v in np.__version__.split('.')[:2]) >= (1, 23)
+
+def load_ascii_output(filename, channels=None, dtype=None):
+    """ 
+    Load a FAST ascii output file. 
+    The numerical data is parsed in bulk using the C-parser of numpy.loadtxt (numpy>=1.23) or pandas.read_csv.
+    NOTE: with numpy>=1.23, reading all channels is as fast as before (same parser), the gain in speed
+          and memory comes from reading a selection of `channels` (only these columns are converted) 
+          and from `dtype`.
+
+    INPUTS:
+      - channels: list of channel names (with or without units) to be read, Time is always read. None: all channels
+      - dtype   : type of returned data (e.g. 'float32' to reduce memory). None: float64
+    """
+    if dtype is None:
+        dtype = np.float64
     with open(filename) as f:
         info = {}
         info['name'] = os.path.splitext(os.path.basename(filename))[0]
@@ -166,7 +196,22 @@ def load_ascii_output(filename):
         # Data, up to end of file or empty line (potential comment line at the end)
 #         data = np.array([l.strip().split() for l in takewhile(lambda x: len(x.strip())>0, f.readlines())]).astype(np.float)
         # ---
-        data = np.loadtxt(f, comments=('This')) # Adding "This" for the Hydro Out files..
+        names, units = info['attribute_names'], info['attribute_units']
+        IC = None
+        if channels is not None:
+            IC = [0] + [i for i in _channel_indices(names, units, channels) if i>0]
+        if _NUMPY_C_LOADTXT:
+            # numpy>=1.23 has a C-implementation of loadtxt, faster than pandas
+            data = np.loadtxt(f, comments=('This'), usecols=IC, dtype=dtype, ndmin=2) # Adding "This" for the Hydro Out files..
+        else:
+            # NOTE: comment='T' to skip the last line of Hydro Out files ("This output file..")
+            df = pd.read_csv(f, sep=r'\s+', header=None, names=list(range(len(names))), usecols=IC,
+                    comment='T', dtype=dtype, engine='c')
+            # usecols returns the columns in file order, reordering them as requested
+            data = df.values if IC is None else df[IC].values
+        if channels is not None:
+            info['attribute_names'] = [names[i] for i in IC]
+            info['attribute_units'] = [units[i] for i in IC]
         return data, info
 
 
@@ -225,56 +270,14 @@ def load_binary_output(filename, use_buffer=True):
         return data
 
 
-    FileFmtID_WithTime              = 1 # File identifiers used in FAST
-    FileFmtID_WithoutTime           = 2
-    FileFmtID_NoCompressWithoutTime = 3
-    FileFmtID_ChanLen_In            = 4
-
     with open(filename, 'rb') as fid:
         #----------------------------        
         # get the header information
         #----------------------------
-
-        FileID = fread(fid, 1, 'int16')[0]  #;             % FAST output file format, INT(2)
-
-        if FileID not in [FileFmtID_WithTime, FileFmtID_WithoutTime, FileFmtID_NoCompressWithoutTime, FileFmtID_ChanLen_In]:
-            raise Exception('FileID not supported {}. Is it a FAST binary file?'.format(FileID))
-
-        if FileID == FileFmtID_ChanLen_In: 
-            LenName = fread(fid, 1, 'int16')[0] # Number of characters in channel names and units
-        else:
-            LenName = 10                    # Default number of characters per channel name
-
-        NumOutChans = fread(fid, 1, 'int32')[0]  #;             % The number of output channels, INT(4)
-        NT = fread(fid, 1, 'int32')[0]  #;             % The number of time steps, INT(4)
-
-        if FileID == FileFmtID_WithTime:
-            TimeScl = fread(fid, 1, 'float64')  #;           % The time slopes for scaling, REAL(8)
-            TimeOff = fread(fid, 1, 'float64')  #;           % The time offsets for scaling, REAL(8)
-        else:
-            TimeOut1 = fread(fid, 1, 'float64')  #;           % The first time in the time series, REAL(8)
-            TimeIncr = fread(fid, 1, 'float64')  #;           % The time increment, REAL(8)
-
-        if FileID == FileFmtID_NoCompressWithoutTime:
-            ColScl = np.ones ((NumOutChans, 1)) # The channel slopes for scaling, REAL(4)
-            ColOff = np.zeros((NumOutChans, 1)) # The channel offsets for scaling, REAL(4)
-        else:
-            ColScl = fread(fid, NumOutChans, 'float32')  # The channel slopes for scaling, REAL(4)
-            ColOff = fread(fid, NumOutChans, 'float32')  # The channel offsets for scaling, REAL(4)
-
-        LenDesc      = fread(fid, 1, 'int32')[0]  #;  % The number of characters in the description string, INT(4)
-        DescStrASCII = fread(fid, LenDesc, 'uint8')  #;  % DescStr converted to ASCII
-        DescStr      = "".join(map(chr, DescStrASCII)).strip()
-
-        ChanName = []  # initialize the ChanName cell array
-        for iChan in range(NumOutChans + 1):
-            ChanNameASCII = fread(fid, LenName, 'uint8')  #; % ChanName converted to numeric ASCII
-            ChanName.append("".join(map(chr, ChanNameASCII)).strip())
-
-        ChanUnit = []  # initialize the ChanUnit cell array
-        for iChan in range(NumOutChans + 1):
-            ChanUnitASCII = fread(fid, LenName, 'uint8')  #; % ChanUnit converted to numeric ASCII
-            ChanUnit.append("".join(map(chr, ChanUnitASCII)).strip()[1:-1])
+        hd = _read_binary_header(fid)
+        FileID, NumOutChans, NT = hd['FileID'], hd['NumOutChans'], hd['NT']
+        ColScl, ColOff          = hd['ColScl'], hd['ColOff']
+        DescStr, ChanName, ChanUnit = hd['DescStr'], hd['ChanName'], hd['ChanUnit']
 
         # -------------------------
         #  get the channel time series
@@ -308,9 +311,9 @@ def load_binary_output(filename, use_buffer=True):
             del PackedData
 
     if FileID == FileFmtID_WithTime:
-        time = (np.array(PackedTime) - TimeOff) / TimeScl;
+        time = (np.array(PackedTime) - hd['TimeOff']) / hd['TimeScl'];
     else:
-        time = TimeOut1 + TimeIncr * np.arange(NT)
+        time = hd['TimeOut1'] + hd['TimeIncr'] * np.arange(NT)
 
     # -------------------------
     #  Scale the packed binary to real data
@@ -337,6 +340,159 @@ def load_binary_output(filename, use_buffer=True):
 
 
 
+FileFmtID_WithTime              = 1 # File identifiers used in FAST
+FileFmtID_WithoutTime           = 2
+FileFmtID_NoCompressWithoutTime = 3
+FileFmtID_ChanLen_In            = 4
+
+def _read_binary_header(fid):
+    """ Read the header of a FAST binary output file, returns a dictionary. 
+    The file position is left at the start of the time data (FileID=1) or channel data. """
+    def fread(fid, n, type):
+        fmt, nbytes = {'uint8': ('B', 1), 'int16':('h', 2), 'int32':('i', 4), 'float32':('f', 4), 'float64':('d', 8)}[type]
+        return struct.unpack(fmt * n, fid.read(nbytes * n))
+
+    hd = {}
+    FileID = fread(fid, 1, 'int16')[0]  #;             % FAST output file format, INT(2)
+    if FileID not in [FileFmtID_WithTime, FileFmtID_WithoutTime, FileFmtID_NoCompressWithoutTime, FileFmtID_ChanLen_In]:
+        raise Exception('FileID not supported {}. Is it a FAST binary file?'.format(FileID))
+
+    if FileID == FileFmtID_ChanLen_In: 
+        LenName = fread(fid, 1, 'int16')[0] # Number of characters in channel names and units
+    else:
+        LenName = 10                    # Default number of characters per channel name
+
+    NumOutChans = fread(fid, 1, 'int32')[0]  #;             % The number of output channels, INT(4)
+    NT = fread(fid, 1, 'int32')[0]  #;             % The number of time steps, INT(4)
+
+    if FileID == FileFmtID_WithTime:
+        hd['TimeScl'] = fread(fid, 1, 'float64')[0]  #;           % The time slopes for scaling, REAL(8)
+        hd['TimeOff'] = fread(fid, 1, 'float64')[0]  #;           % The time offsets for scaling, REAL(8)
+    else:
+        hd['TimeOut1'] = fread(fid, 1, 'float64')[0]  #;           % The first time in the time series, REAL(8)
+        hd['TimeIncr'] = fread(fid, 1, 'float64')[0]  #;           % The time increment, REAL(8)
+
+    if FileID == FileFmtID_NoCompressWithoutTime:
+        ColScl = np.ones ((NumOutChans, 1)) # The channel slopes for scaling, REAL(4)
+        ColOff = np.zeros((NumOutChans, 1)) # The channel offsets for scaling, REAL(4)
+    else:
+        ColScl = fread(fid, NumOutChans, 'float32')  # The channel slopes for scaling, REAL(4)
+        ColOff = fread(fid, NumOutChans, 'float32')  # The channel offsets for scaling, REAL(4)
+
+    LenDesc      = fread(fid, 1, 'int32')[0]  #;  % The number of characters in the description string, INT(4)
+    DescStrASCII = fread(fid, LenDesc, 'uint8')  #;  % DescStr converted to ASCII
+    DescStr      = "".join(map(chr, DescStrASCII)).strip()
+
+    ChanName = []  # initialize the ChanName cell array
+    for iChan in range(NumOutChans + 1):
+        ChanNameASCII = fread(fid, LenName, 'uint8')  #; % ChanName converted to numeric ASCII
+        ChanName.append("".join(map(chr, ChanNameASCII)).strip())
+
+    ChanUnit = []  # initialize the ChanUnit cell array
+    for iChan in range(NumOutChans + 1):
+        ChanUnitASCII = fread(fid, LenName, 'uint8')  #; % ChanUnit converted to numeric ASCII
+        ChanUnit.append("".join(map(chr, ChanUnitASCII)).strip()[1:-1])
+
+    hd.update({'FileID':FileID, 'NumOutChans':NumOutChans, 'NT':NT, 'ColScl':ColScl, 'ColOff':ColOff,
+        'DescStr':DescStr, 'ChanName':ChanName, 'ChanUnit':ChanUnit})
+    return hd
+
+def _channel_indices(names, units, channels):
+    """ Returns the indices of `channels` in the list of channel `names`.
+    Channels may be given with units (e.g. 'RotSpeed_[rpm]') or without (e.g. 'RotSpeed'), case insensitive. """
+    lnames = [n.lower() for n in names]
+    lnamesU= [(n+'_['+u+']').lower() for n,u in zip(names, units)]
+    I = []
+    for c in channels:
+        cl = c.lower()
+        if cl in lnames:
+            I.append(lnames.index(cl))
+        elif cl in lnamesU:
+            I.append(lnamesU.index(cl))
+        else:
+            raise Exception('Channel `{}` not found in output file'.format(c))
+    return I
+
+def _time_indices(time, tRange):
+    """ Returns the slice of time steps within tRange=[tmin, tmax]"""
+    if tRange is None:
+        return slice(0, len(time))
+    I = np.where(np.logical_and(time>=tRange[0], time<=tRange[1]))[0]
+    if len(I)==0:
+        return slice(0, 0)
+    return slice(I[0], I[-1]+1)
+
+def _select_output(data, info, channels=None, tRange=None):
+    """ Select channels and time range of data already read, time is assumed to be the first column """
+    names, units = info['attribute_names'], info['attribute_units']
+    if units is None:
+        units = ['']*len(names)
+    IC = [0] + ([i for i in _channel_indices(names, units, channels) if i>0] if channels is not None else list(range(1, len(names))))
+    IT = _time_indices(np.asarray(data[:,0]), tRange)
+    data = np.asarray(data)[IT][:, IC]
+    info = info.copy()
+    info['attribute_names'] = [names[i] for i in IC]
+    if info['attribute_units'] is not None:
+        info['attribute_units'] = [units[i] for i in IC]
+    return data, info
+
+def load_binary_output_memmap(filename, channels=None, tRange=None, dtype='float64'):
+    """ 
+    Load a FAST binary output file using a memory map of the data block.
+    Only the requested channels and time range are scaled and returned.
+
+    INPUTS:
+      - channels: list of channel names (with or without units) to be read, Time is always read. None: all channels
+      - tRange  : [tmin, tmax], time range to be read. None: all time steps
+      - dtype   : type of returned data (e.g. 'float32' to reduce memory)
+    OUTPUTS:
+      - data, info: as returned by `load_binary_output`
+    """
+    with open(filename, 'rb') as fid:
+        hd = _read_binary_header(fid)
+        offset = fid.tell()
+    FileID, NumOutChans, NT = hd['FileID'], hd['NumOutChans'], hd['NT']
+    ChanName, ChanUnit = hd['ChanName'], hd['ChanUnit']
+
+    # --- Time
+    if FileID == FileFmtID_WithTime:
+        PackedTime = np.memmap(filename, dtype=np.int32, mode='r', offset=offset, shape=(NT,))
+        time   = (np.asarray(PackedTime, dtype=np.float64) - hd['TimeOff']) / hd['TimeScl']
+        offset += 4*NT
+        del PackedTime
+    else:
+        time = hd['TimeOut1'] + hd['TimeIncr'] * np.arange(NT)
+    IT = _time_indices(time, tRange)
+
+    # --- Channels (index in file, time excluded)
+    if channels is None:
+        IC = list(range(NumOutChans))
+    else:
+        IC = [i-1 for i in _channel_indices(ChanName, ChanUnit, channels) if i>0]
+
+    # --- Data, memory mapped, only needed rows/columns are scaled
+    if FileID == FileFmtID_NoCompressWithoutTime:
+        packed = np.memmap(filename, dtype=np.float64, mode='r', offset=offset, shape=(NT, NumOutChans))
+    else:
+        packed = np.memmap(filename, dtype=np.int16  , mode='r', offset=offset, shape=(NT, NumOutChans))
+    ColScl = np.asarray(hd['ColScl'], dtype=np.float64).ravel()[IC]
+    ColOff = np.asarray(hd['ColOff'], dtype=np.float64).ravel()[IC]
+    data = np.empty((IT.stop-IT.start, len(IC)+1), dtype=dtype)
+    data[:,0] = time[IT]
+    for j, (iCol, scl, off) in enumerate(zip(IC, ColScl, ColOff)):
+        if np.isnan(scl) and np.isnan(off):
+            data[:,j+1] = 0 # probably due to a division by zero in Fortran
+        else:
+            data[:,j+1] = (packed[IT, iCol] - off) / scl
+    del packed
+
+    info = {'name': os.path.splitext(os.path.basename(filename))[0],
+            'description': hd['DescStr'],
+            'attribute_names': [ChanName[0]]+[ChanName[i+1] for i in IC],
+            'attribute_units': [ChanUnit[0]]+[ChanUnit[i+1] for i in IC]}
+    return data, info
+
+
 if __name__ == "__main__":
     B=FASTOutFile('Turbine.outb')
     print(B.data)
@@ -111,6 +111,12 @@ class File(dict):
     def formatName():
         raise NotImplementedError("Method must be implemented in the subclass")
 
+    @staticmethod
+    def sniff(header):
+        """ Quick check based on the first bytes of a file (see weio.detectFormat)
+        Returns False if the file is surely not of this format, None if unknown """
+        return None
+
     @classmethod
     def isRightFormat(cls,filename):
         """ Tries to open a file, return true and the file if it succeeds """
@@ -186,6 +192,12 @@ def isBinary(filename):
         except UnicodeDecodeError:
             return True
 
+def isBinaryHeader(header):
+    """ Returns True if the first bytes of a file (`header`) are likely from a binary file """
+    if header.startswith((b'\xff\xfe', b'\xfe\xff')): # UTF-16 BOM
+        return False
+    return b'\x00' in header
+
 def ascii_comp(file1,file2,bDelete=False):
     """ Compares two ascii files line by line.
     Comparison is done ignoring multiple white spaces for now"""
@@ -18,7 +18,6 @@ The field stored in this class has the following properties:
 import pandas as pd
 import numpy as np
 import os
-import struct
 
 try:
     from .file import File, EmptyFileError 
@@ -27,6 +26,18 @@ except:
     File=dict
 
 class MannBoxFile(File):
+    """ 
+    Read/write a Mann turbulence box. The object behaves as a dictionary.
+
+    Examples
+    --------
+
+        mb = MannBoxFile('u.bin', N=(8192,64,64))
+        print(mb['field'].shape)
+
+        # Memory-mapped file, reading only the x-planes 100 to 199
+        mb = MannBoxFile('u.bin', N=(8192,64,64), memmap=True, ixRange=[100,200])
+    """
 
     @staticmethod
     def defaultExtensions():
@@ -41,10 +52,14 @@ class MannBoxFile(File):
         if filename:
             self.read(filename=filename,**kwargs)
 
-    def read(self, filename=None, N=(1024,32,32)):
+    def read(self, filename=None, N=(1024,32,32), memmap=False, ixRange=None):
         """ read MannBox
              field (nx x ny x nz)
              NOTE: y-coord in Mann Box goes from Ly/2 -> -Ly/2 but we flip this to -Ly/2 -> Ly/2
+        INPUTS:
+          - N: dimensions of the box (nx, ny, nz)
+          - memmap: if True, the file is memory-mapped (copy-on-write), only the planes accessed are read
+          - ixRange: [ix0, ix1], range of x-planes to be read (python convention, ix1 excluded). None: all
         """
         if filename:
             self.filename = filename
@@ -56,44 +71,39 @@ class MannBoxFile(File):
             raise EmptyFileError('File is empty:',self.filename)
 
         nx,ny,nz=N
-        def _read_buffered():
-            data=np.zeros((nx,ny,nz),dtype=np.float32)
-            with open(self.filename, mode='rb') as f:            
-                for ix in range(nx):
-                    Buffer = np.frombuffer(f.read(4*ny*nz), dtype=np.float32) # 4-bytes
-                    data[ix,:,:] =  np.flip(Buffer.reshape((ny,nz)),0)
-            return data
-
-        def _read_nonbuffered():
-            data = np.fromfile(self.filename, np.dtype('<f'), -1)
-            assert len(data) == nx*ny*nz, "Size of turbulence box (%d) does not match nx x ny x nz (%d)" % (len(data),nx*ny*nz)
-            # Fortran order z the fastest, then y then x. We then flip that back to nx, ny, nz
-            data = np.transpose(data.reshape(nz, ny, nx, order='F'), axes=(2,1,0))
-            # The issue is the y-coordinate in Mann Boxes go from Ly/2 -> -Ly/2
-            # So we flip the y-axis, so that the field is consistent with typical y values
-            return np.flip(data, 1) # i.e. data=data[:,::-1,:]
-
-#         self['field']= _read_nonbuffered()
-        self['field']= _read_buffered()
-#         print('1',self['field'][:,-1,0])
-#         print('2',self['field'][0,-1::-1,0])
-#         print('3',self['field'][0,-1,:])
-
-
-    def write(self, filename=None):
-        """ Write mann box """
+        nBytes = os.stat(self.filename).st_size
+        if nBytes < 4*nx*ny*nz:
+            raise Exception('Size of turbulence box ({:d}) does not match nx x ny x nz ({:d})'.format(nBytes//4, nx*ny*nz))
+        ix0, ix1 = (0, nx) if ixRange is None else slice(*ixRange).indices(nx)[:2]
+        ix1 = max(ix0, ix1)
+        # z is the fastest index, then y, then x
+        shape  = (ix1-ix0, ny, nz)
+        offset = 4*ix0*ny*nz
+        if memmap:
+            data = np.memmap(self.filename, dtype='<f4', mode='c', offset=offset, shape=shape)
+        else:
+            with open(self.filename, mode='rb') as f:
+                f.seek(offset)
+                data = np.fromfile(f, dtype='<f4', count=np.prod(shape)).reshape(shape)
+        # The y-coordinate in Mann Boxes go from Ly/2 -> -Ly/2
+        # So we flip the y-axis (view), so that the field is consistent with typical y values
+        self['field'] = data[:,::-1,:]
+
+    def write(self, filename=None, chunkSize=256):
+        """ Write mann box 
+        chunkSize: number of x-planes written at once
+        """
         if filename:
             self.filename = filename
         if not self.filename:
             raise Exception('No filename provided')
         nx,ny,nz = self['field'].shape
-        sfmt='<{:d}f'.format(ny*nz)
         with open(self.filename, mode='wb') as f:            
-            for ix in np.arange(nx):
-                data = np.flip(self['field'][ix,:,:],0).ravel() # We have to flip the y axis again
-                f.write(struct.pack(sfmt, *data))
+            for ix in range(0, nx, chunkSize):
+                # We have to flip the y axis again
+                data = np.ascontiguousarray(self['field'][ix:ix+chunkSize,::-1,:], dtype='<f4')
+                data.tofile(f)
 
-    
     def __repr__(self):
         s='<{} object> with keys:\n'.format(type(self).__name__)
         s+=' - filename: {}\n'.format(self.filename)
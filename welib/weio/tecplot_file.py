@@ -155,6 +155,19 @@ class TecplotFile(File):
     def formatName():
         return 'Tecplot ASCII file'
 
+    @staticmethod
+    def sniff(header):
+        """ The first line (apart from comments) should start with a keyword """
+        for l in header.decode('latin-1').splitlines():
+            l = l.strip().lower()
+            if len(l)==0:
+                break
+            if l[0]=='#':
+                continue
+            if not any([l.find(k)==0 for k in Keywords]):
+                return False
+            break
+
     def __init__(self,filename=None,**kwargs):
         self.filename = None
         if filename:
@@ -0,0 +1,121 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from welib.weio.batch import readFiles
+from welib.weio.fast_output_file import FASTOutputFile
+
+MyDir = os.path.dirname(__file__)
+OutbFile = os.path.join(MyDir, '../../../data/example_files/fastout_allnodes.outb')
+
+_CALLS = []
+
+def reduceMean(df):
+    _CALLS.append(1)
+    return df.mean()
+
+def reduceMax(df):
+    _CALLS.append(1)
+    return df.max()
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.files = []
+        for i in range(3):
+            f = os.path.join(self.tmpDir, 'out{:d}.outb'.format(i))
+            shutil.copyfile(OutbFile, f)
+            self.files.append(f)
+        self.dfRef = FASTOutputFile(OutbFile).toDataFrame()
+        del _CALLS[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_reduce(self):
+        df = readFiles(self.files, reduce=reduceMean, fileformat=FASTOutputFile)
+        self.assertEqual(list(df.index), self.files)
+        np.testing.assert_almost_equal(df.iloc[1].values, self.dfRef.mean().values)
+        # Without reduction, the dataframes are concatenated
+        df = readFiles(self.files[:2])
+        self.assertEqual(df.shape, (2*len(self.dfRef), self.dfRef.shape[1]))
+        np.testing.assert_almost_equal(df.loc[self.files[1]].values, self.dfRef.values)
+
+    def test_cache_hit(self):
+        for ext in ['.npz', '.pkl']:
+            cacheFile = os.path.join(self.tmpDir, '_cache'+ext)
+            del _CALLS[:]
+            df1 = readFiles(self.files, reduce=reduceMean, fileformat=FASTOutputFile, cacheFile=cacheFile)
+            self.assertEqual(len(_CALLS), 3)
+            df2 = readFiles(self.files, reduce=reduceMean, fileformat=FASTOutputFile, cacheFile=cacheFile)
+            self.assertEqual(len(_CALLS), 3) # read from cache
+            pd.testing.assert_frame_equal(df1, df2, check_names=False)
+
+    def test_cache_invalidation(self):
+        cacheFile = os.path.join(self.tmpDir, '_cache.npz')
+        readFiles(self.files, reduce=reduceMean, fileformat=FASTOutputFile, cacheFile=cacheFile)
+        self.assertEqual(len(_CALLS), 3)
+        # Different reduction
+        df = readFiles(self.files, reduce=reduceMax, fileformat=FASTOutputFile, cacheFile=cacheFile)
+        self.assertEqual(len(_CALLS), 6)
+        np.testing.assert_almost_equal(df.iloc[0].values, self.dfRef.max().values)
+        # Lambdas share the same name, their bytecode differs
+        dfMin = readFiles(self.files, reduce=lambda df: df.min(), fileformat=FASTOutputFile, cacheFile=cacheFile)
+        dfMax = readFiles(self.files, reduce=lambda df: df.max(), fileformat=FASTOutputFile, cacheFile=cacheFile)
+        np.testing.assert_almost_equal(dfMin.iloc[0].values, self.dfRef.min().values)
+        np.testing.assert_almost_equal(dfMax.iloc[0].values, self.dfRef.max().values)
+        # Different read options
+        df = readFiles(self.files, reduce=reduceMax, fileformat=FASTOutputFile, cacheFile=cacheFile, readKwargs={'channels':['RotSpeed_[rpm]']})
+        self.assertEqual(len(_CALLS), 9)
+        # User key
+        readFiles(self.files, reduce=reduceMax, fileformat=FASTOutputFile, cacheFile=cacheFile, cacheKey='v1')
+        self.assertEqual(len(_CALLS), 12)
+        readFiles(self.files, reduce=reduceMax, fileformat=FASTOutputFile, cacheFile=cacheFile, cacheKey='v1')
+        self.assertEqual(len(_CALLS), 12)
+        # File newer than the cache
+        t = os.path.getmtime(cacheFile)
+        os.utime(self.files[1], (t+10, t+10))
+        readFiles(self.files, reduce=reduceMax, fileformat=FASTOutputFile, cacheFile=cacheFile, cacheKey='v1')
+        self.assertEqual(len(_CALLS), 15)
+        # Different list of files
+        readFiles(self.files[:2], reduce=reduceMax, fileformat=FASTOutputFile, cacheFile=cacheFile, cacheKey='v1')
+        self.assertEqual(len(_CALLS), 17)
+
+    def test_invalid_files(self):
+        badFile = os.path.join(self.tmpDir, 'bad.outb')
+        with open(badFile, 'w') as f:
+            f.write('not a binary file')
+        missing = os.path.join(self.tmpDir, 'missing.outb')
+        df = readFiles(self.files[:1]+[badFile, missing], reduce=reduceMean, fileformat=FASTOutputFile)
+        self.assertEqual(list(df.index), self.files[:1])
+        with self.assertRaises(Exception):
+            readFiles([badFile, missing], reduce=reduceMean, fileformat=FASTOutputFile)
+        # The cache is reused even if some files are invalid or missing
+        cacheFile = os.path.join(self.tmpDir, '_cache.pkl')
+        del _CALLS[:]
+        df1 = readFiles(self.files[:1]+[badFile, missing], reduce=reduceMean, fileformat=FASTOutputFile, cacheFile=cacheFile)
+        df2 = readFiles(self.files[:1]+[badFile, missing], reduce=reduceMean, fileformat=FASTOutputFile, cacheFile=cacheFile)
+        self.assertEqual(len(_CALLS), 1)
+        pd.testing.assert_frame_equal(df1, df2)
+        # Files requested in a different order, or a missing file that now exists
+        readFiles([badFile, missing]+self.files[:1], reduce=reduceMean, fileformat=FASTOutputFile, cacheFile=cacheFile)
+        self.assertEqual(len(_CALLS), 2)
+        shutil.copyfile(OutbFile, missing)
+        t = os.path.getmtime(cacheFile)
+        os.utime(missing, (t-10, t-10))
+        df = readFiles([badFile, missing]+self.files[:1], reduce=reduceMean, fileformat=FASTOutputFile, cacheFile=cacheFile)
+        self.assertEqual(len(_CALLS), 4)
+        self.assertEqual(list(df.index), [missing]+self.files[:1])
+
+    def test_parallel_lambda(self):
+        # A lambda cannot be pickled, the files are read serially
+        df = readFiles(self.files, reduce=lambda df: df.mean(), fileformat=FASTOutputFile, parallel=True, nCores=2)
+        np.testing.assert_almost_equal(df.iloc[2].values, self.dfRef.mean().values)
+
+
+if __name__ == '__main__':
+    unittest.main()
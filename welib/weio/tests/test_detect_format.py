@@ -0,0 +1,94 @@
+import unittest
+import os
+import shutil
+import tempfile
+import welib.weio as weio
+from welib.weio.fast_input_file import FASTInputFile
+from welib.weio.fast_output_file import FASTOutputFile
+from welib.weio.fast_linearization_file import FASTLinearizationFile
+from welib.weio.csv_file import CSVFile
+
+MyDir = os.path.dirname(__file__)
+Files = [
+    (os.path.join(MyDir, '../../../data/NREL5MW/NREL5MW_Oper.csv')                  , CSVFile),
+    (os.path.join(MyDir, '../../../data/NREL5MW/data/NREL5MW_ED.dat')               , FASTInputFile),
+    (os.path.join(MyDir, '../../../data/example_files/fastout_allnodes.outb')       , FASTOutputFile),
+    (os.path.join(MyDir, '../../../data/example_files/linearization.1.lin')         , FASTLinearizationFile),
+]
+TwrFile = os.path.join(MyDir, '../../../data/NREL5MW/data/NREL5MW_ED_Tower_Onshore.dat')
+
+
+class TestDetectFormat(unittest.TestCase):
+
+    def setUp(self):
+        weio.clearDetectCache()
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        weio.clearDetectCache()
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_buildFormats(self):
+        weio._buildFormats()
+        classes = [f.constructor for f in weio.fileFormats()]
+        self.assertEqual(len(classes), len(set(classes)))
+        for filename, cls in Files:
+            ext = os.path.splitext(filename)[1]
+            I = weio._candidateFormats(ext)
+            self.assertTrue(cls in [weio._FORMATS[i].constructor for i in I])
+            self.assertEqual(I, sorted(I))
+        # Extensions given as patterns (Bladed)
+        I = weio._candidateFormats('.$41')
+        self.assertEqual([weio._FORMATS[i].name for i in I], ['Bladed output file'])
+        self.assertEqual(weio._candidateFormats('.unknownext'), [])
+
+    def test_cache(self):
+        for filename, cls in Files:
+            fmt, F = weio.detectFormat(filename)
+            self.assertTrue(fmt.constructor is cls)
+            self.assertTrue(os.path.abspath(filename) in weio._DETECT_CACHE)
+            # Second call is a cache hit, the file is not read
+            fmt2, F2 = weio.detectFormat(filename)
+            self.assertTrue(fmt2 is fmt)
+            self.assertTrue(F2 is None)
+            # The file is read with the format stored in the cache
+            self.assertTrue(isinstance(weio.read(filename), cls))
+            # No cache
+            fmt2, F2 = weio.detectFormat(filename, useCache=False)
+            self.assertTrue(fmt2 is fmt)
+            self.assertTrue(isinstance(F2, cls))
+        weio.clearDetectCache()
+        self.assertEqual(len(weio._DETECT_CACHE), 0)
+        fmt, F = weio.detectFormat(Files[0][0])
+        self.assertTrue(isinstance(F, CSVFile))
+
+    def test_invalidation(self):
+        filename = os.path.join(self.tmpDir, 'ED.dat')
+        shutil.copyfile(Files[1][0], filename)
+        fmt, F = weio.detectFormat(filename)
+        self.assertTrue(isinstance(F, FASTInputFile))
+        self.assertTrue(weio.detectFormat(filename)[1] is None)
+        # New modification time
+        st = os.stat(filename)
+        os.utime(filename, (st.st_atime, st.st_mtime+10))
+        fmt, F = weio.detectFormat(filename)
+        self.assertTrue(isinstance(F, FASTInputFile))
+        self.assertTrue(weio.detectFormat(filename)[1] is None)
+        # New content
+        shutil.copyfile(TwrFile, filename)
+        fmt, F = weio.detectFormat(filename)
+        self.assertTrue(isinstance(F, FASTInputFile))
+        self.assertTrue('TwrFADmp(1)' in F.keys())
+
+    def test_sniff(self):
+        self.assertEqual(FASTInputFile.sniff(b'ab\x00cd'), False)
+        self.assertEqual(CSVFile.sniff(b'ab\x00cd'), False)
+        # UTF-16 text files are not discarded
+        header = '------- ElastoDyn\n'.encode('utf-16')
+        self.assertTrue(FASTInputFile.sniff(header) is not False)
+        self.assertTrue(CSVFile.sniff(header) is not False)
+        self.assertTrue(FASTInputFile.sniff(b'------- ElastoDyn\n') is not False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+import numpy as np
+import welib.weio.fast_input_file as fi
+from welib.weio.fast_input_file import FASTInputFile, LazyTable, readCached, clearCache
+from welib.weio.file import BrokenFormatError
+
+MyDir = os.path.dirname(__file__)
+EDFile = os.path.join(MyDir, '../../../data/NREL5MW/data/NREL5MW_ED.dat')
+TwrFile = os.path.join(MyDir, '../../../data/NREL5MW/data/NREL5MW_ED_Tower_Onshore.dat')
+BDFile = os.path.join(MyDir, '../../../data/NREL5MW/data/NRELOffshrBsline5MW_BeamDyn_Blade.dat')
+
+
+class TestReadCached(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpDir, 'ED.dat')
+        shutil.copyfile(EDFile, self.filename)
+        clearCache()
+
+    def tearDown(self):
+        clearCache()
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_copy(self):
+        F1 = readCached(self.filename)
+        self.assertEqual(F1['TipRad'], FASTInputFile(self.filename)['TipRad'])
+        # The returned file is a copy, modifications do not affect the cache
+        F1['TipRad'] = 10
+        F2 = readCached(self.filename)
+        self.assertEqual(F2['TipRad'], 63)
+        self.assertFalse(F1 is F2)
+        # Parsed only once
+        with mock.patch.object(FASTInputFile, 'read', side_effect=Exception('parsed again')):
+            F3 = readCached(self.filename)
+        self.assertEqual(F3['TipRad'], 63)
+
+    def test_invalidation(self):
+        F = readCached(self.filename)
+        F['TipRad'] = 70
+        F.write(self.filename)
+        st = os.stat(self.filename)
+        os.utime(self.filename, ns=(st.st_atime_ns, st.st_mtime_ns+10**9))
+        self.assertEqual(readCached(self.filename)['TipRad'], 70)
+
+    def test_cacheDir(self):
+        cacheDir = os.path.join(self.tmpDir, '_cache')
+        readCached(self.filename, cacheDir=cacheDir)
+        pkls = os.listdir(cacheDir)
+        self.assertEqual(len(pkls), 1)
+        self.assertTrue(pkls[0].endswith('.pkl'))
+        # A new session reads the pickle instead of parsing the file
+        clearCache()
+        with mock.patch.object(FASTInputFile, 'read', side_effect=Exception('parsed again')):
+            F = readCached(self.filename, cacheDir=cacheDir)
+        self.assertEqual(F['TipRad'], 63)
+
+    def test_maxsize(self):
+        files = []
+        for i in range(5):
+            f = os.path.join(self.tmpDir, 'ED{:d}.dat'.format(i))
+            F = FASTInputFile(self.filename)
+            F['TipRad'] = 60+i
+            F.write(f)
+            files.append(f)
+        with mock.patch.object(fi, '_CACHE_MAXSIZE', 2):
+            for f in files:
+                readCached(f)
+            self.assertEqual(len(fi._CACHE_PARSED), 2)
+            self.assertEqual(len(fi._CACHE_DIGESTS), 2)
+            self.assertEqual(readCached(files[0])['TipRad'], 60)
+
+
+class TestLazyTable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_malformed(self):
+        # A non numerical value in a table is only detected when the table is accessed
+        with open(TwrFile, 'r') as f:
+            lines = f.read().splitlines()
+        i = [i for i,l in enumerate(lines) if l.startswith('0.5 ')][0]
+        lines[i] = '0.5      abc' + lines[i][len('0.5      3916.41'):]
+        filename = os.path.join(self.tmpDir, 'twr.dat')
+        with open(filename, 'w') as f:
+            f.write('\n'.join(lines)+'\n')
+        F = FASTInputFile(filename)
+        self.assertEqual(F['NTwInpSt'], 11)
+        with self.assertRaises(BrokenFormatError) as cm:
+            F['TowProp']
+        self.assertIn('abc', str(cm.exception))
+        # A missing row is also detected when the table is accessed
+        del lines[i]
+        with open(filename, 'w') as f:
+            f.write('\n'.join(lines)+'\n')
+        F = FASTInputFile(filename)
+        with self.assertRaises(BrokenFormatError):
+            F['TowProp']
+
+    def test_toString(self):
+        for filename in [TwrFile, BDFile]:
+            F0 = FASTInputFile(filename)
+            ref = F0.toString()
+            # Only the first table is accessed
+            F = FASTInputFile(filename)
+            lazies = [d for d in F.data if isinstance(d, LazyTable)]
+            self.assertTrue(all([not d.isLoaded for d in lazies]))
+            M = np.asarray(lazies[0]['value'], dtype=float).copy()
+            self.assertTrue(lazies[0].isLoaded)
+            self.assertTrue(all([not d.isLoaded for d in lazies[1:]]))
+            self.assertEqual(F.toString(), ref)
+            # Round trip after modification of the accessed table
+            lazies[0]['value'] = M*2
+            out = os.path.join(self.tmpDir, os.path.basename(filename))
+            F.write(out)
+            F2 = FASTInputFile(out)
+            lazies2 = [d for d in F2.data if isinstance(d, LazyTable)]
+            np.testing.assert_allclose(np.asarray(lazies2[0]['value'], dtype=float), M*2, rtol=1e-5)
+            for d, d2 in zip(lazies[1:], lazies2[1:]):
+                v, v2 = d['value'], d2['value']
+                if isinstance(v, dict):
+                    for k in v.keys():
+                        np.testing.assert_allclose(v2[k], v[k], rtol=1e-5)
+                else:
+                    np.testing.assert_allclose(np.asarray(v2, dtype=float), np.asarray(v, dtype=float), rtol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
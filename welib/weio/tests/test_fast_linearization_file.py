@@ -0,0 +1,132 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+import numpy as np
+import welib.weio.fast_linearization_file as fl
+from welib.weio.fast_linearization_file import FASTLinearizationFile
+
+MyDir = os.path.dirname(__file__)
+LinFile = os.path.join(MyDir, '../../../data/example_files/linearization.1.lin')
+
+MATRICES = ['A', 'B', 'C', 'D', 'dUdu', 'dUdy', 'M']
+
+
+def _readBlocks(filename):
+    """ Independent parsing of the matrices of a .lin file, line by line """
+    with open(filename) as f:
+        lines = f.read().splitlines()
+    blocks = {}
+    for i, l in enumerate(lines):
+        sp = l.split(':')
+        if len(sp)>1 and sp[0] in ['A','B','C','D','dUdu','dUdy','ED M']:
+            key = 'M' if sp[0]=='ED M' else sp[0]
+            rows = []
+            for l2 in lines[i+1:]:
+                if len(l2.strip())==0:
+                    break
+                rows.append([float(v) for v in l2.split()])
+            blocks[key] = np.array(rows)
+    return blocks
+
+
+class TestFASTLinearizationFile(unittest.TestCase):
+
+    def setUp(self):
+        self.ref = _readBlocks(LinFile)
+
+    def test_full(self):
+        F = FASTLinearizationFile(LinFile)
+        for m in MATRICES:
+            self.assertEqual(F[m].dtype, np.float64)
+            np.testing.assert_array_equal(F[m], self.ref[m])
+        self.assertEqual((len(F['x']), len(F['u']), len(F['y'])), (4, 3, 5))
+        self.assertEqual(F['EDDOF'][1], 'DOF_1')
+        self.assertEqual(F['WindSpeed'], 8)
+        self.assertEqual(F['Azimuth'], 1.5708)
+
+    def test_matrices_dtype(self):
+        F = FASTLinearizationFile(LinFile, matrices=['A'], dtype='float32')
+        self.assertEqual(F['A'].dtype, np.float32)
+        np.testing.assert_array_equal(F['A'], self.ref['A'].astype(np.float32))
+        for m in MATRICES[1:]:
+            self.assertTrue(m not in F.keys())
+        # Operating points are still read
+        np.testing.assert_array_equal(F['u'], FASTLinearizationFile(LinFile)['u'])
+        F = FASTLinearizationFile(LinFile, matrices=['dUdy', 'M'])
+        self.assertEqual(sorted([m for m in MATRICES if m in F.keys()]), ['M', 'dUdy'])
+        np.testing.assert_array_equal(F['dUdy'], self.ref['dUdy'])
+        np.testing.assert_array_equal(F['M'], self.ref['M'])
+
+    def test_parsers(self):
+        # Chunks of 3 lines, numpy<1.23 parser, and fallback parser
+        for bLoadtxt in [True, False]:
+            with mock.patch.object(fl, '_CHUNK', 3), mock.patch.object(fl, '_NUMPY_C_LOADTXT', bLoadtxt):
+                F = FASTLinearizationFile(LinFile, dtype='float32')
+            for m in MATRICES:
+                self.assertEqual(F[m].dtype, np.float32)
+                np.testing.assert_array_equal(F[m], self.ref[m].astype(np.float32))
+        with mock.patch.object(fl, '_CHUNK', 5), mock.patch.object(fl.np, 'loadtxt', side_effect=ValueError('fallback')):
+            F = FASTLinearizationFile(LinFile)
+        for m in MATRICES:
+            np.testing.assert_array_equal(F[m], self.ref[m])
+
+
+class TestReadCached(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.linFile = os.path.join(self.tmpDir, 'lin.1.lin')
+        shutil.copyfile(LinFile, self.linFile)
+        self.ref = FASTLinearizationFile(LinFile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def assertLinEqual(self, F):
+        for m in MATRICES:
+            np.testing.assert_array_equal(F[m], self.ref[m])
+        self.assertEqual(F['WindSpeed'], self.ref['WindSpeed'])
+        self.assertEqual(F['u'], self.ref['u'])
+
+    def test_cache(self):
+        # First call writes the cache
+        F = fl.readCached(self.linFile)
+        self.assertTrue(os.path.exists(self.linFile+'.pkl'))
+        self.assertLinEqual(F)
+        # Second call uses the cache
+        with mock.patch.object(FASTLinearizationFile, '_read', side_effect=Exception('not cached')) as rd:
+            F = fl.readCached(self.linFile)
+            self.assertEqual(rd.call_count, 0)
+            self.assertEqual(F.filename, self.linFile)
+            self.assertLinEqual(F)
+            # Other matrices or dtype: cache is not valid
+            self.assertRaises(Exception, fl.readCached, self.linFile, matrices=['A'])
+            self.assertRaises(Exception, fl.readCached, self.linFile, dtype='float32')
+        # Touching the file invalidates the cache
+        st = os.stat(self.linFile)
+        os.utime(self.linFile, ns=(st.st_atime_ns, st.st_mtime_ns+10**9))
+        with mock.patch.object(FASTLinearizationFile, '_read', side_effect=Exception('not cached')):
+            self.assertRaises(Exception, fl.readCached, self.linFile)
+        F = fl.readCached(self.linFile, matrices=['A'], dtype='float32')
+        self.assertEqual(F['A'].dtype, np.float32)
+        self.assertTrue('B' not in F.keys())
+        # Corrupted cache file is rewritten
+        with open(self.linFile+'.pkl', 'wb') as fid:
+            fid.write(b'corrupted')
+        self.assertLinEqual(fl.readCached(self.linFile))
+        with mock.patch.object(FASTLinearizationFile, '_read', side_effect=Exception('not cached')):
+            self.assertLinEqual(fl.readCached(self.linFile))
+
+    def test_cacheDir(self):
+        cacheDir = os.path.join(self.tmpDir, 'cache')
+        F = fl.readCached(self.linFile, cacheDir=cacheDir)
+        self.assertTrue(os.path.exists(os.path.join(cacheDir, 'lin.1.lin.pkl')))
+        self.assertFalse(os.path.exists(self.linFile+'.pkl'))
+        with mock.patch.object(FASTLinearizationFile, '_read', side_effect=Exception('not cached')):
+            self.assertLinEqual(fl.readCached(self.linFile, cacheDir=cacheDir))
+
+
+if __name__ == '__main__':
+    unittest.main()
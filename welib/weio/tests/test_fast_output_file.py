@@ -0,0 +1,108 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+import numpy as np
+import welib.weio.fast_output_file as fo
+from welib.weio.fast_output_file import FASTOutputFile, load_binary_output, load_binary_output_memmap, _select_output
+
+MyDir = os.path.dirname(__file__)
+OutbFile = os.path.join(MyDir, '../../../data/example_files/fastout_allnodes.outb')
+
+
+class TestFASTOutputFile(unittest.TestCase):
+
+    def setUp(self):
+        self.dfRef = FASTOutputFile(OutbFile).toDataFrame()
+
+    def test_memmap_all(self):
+        data, info = load_binary_output(OutbFile)
+        data2, info2 = load_binary_output_memmap(OutbFile)
+        np.testing.assert_allclose(data2, data, rtol=1e-12, atol=1e-12)
+        self.assertEqual(info2['attribute_names'], info['attribute_names'])
+        self.assertEqual(info2['attribute_units'], info['attribute_units'])
+
+    def test_channels(self):
+        channels = ['GenPwr_[kW]', 'rotspeed', 'Azimuth']
+        df = FASTOutputFile(OutbFile, channels=channels).toDataFrame()
+        self.assertEqual(list(df.columns), ['Time_[s]', 'GenPwr_[kW]', 'RotSpeed_[rpm]', 'Azimuth_[deg]'])
+        for c in df.columns:
+            np.testing.assert_allclose(df[c].values, self.dfRef[c].values, rtol=1e-12, atol=1e-12)
+        with self.assertRaises(Exception):
+            FASTOutputFile(OutbFile, channels=['NotAChannel'])
+
+    def test_tRange(self):
+        df = FASTOutputFile(OutbFile, tRange=[2, 5.05]).toDataFrame()
+        b = np.logical_and(self.dfRef['Time_[s]']>=2, self.dfRef['Time_[s]']<=5.05)
+        self.assertEqual(df.shape, (np.sum(b), self.dfRef.shape[1]))
+        np.testing.assert_allclose(df.values, self.dfRef[b].values, rtol=1e-12, atol=1e-12)
+        # Combined with channels, same as selection after a full read
+        data, info = load_binary_output(OutbFile)
+        dataSel, infoSel = _select_output(data, info, channels=['GenPwr'], tRange=[2, 5.05])
+        df = FASTOutputFile(OutbFile, channels=['GenPwr'], tRange=[2, 5.05]).toDataFrame()
+        np.testing.assert_allclose(df.values, dataSel, rtol=1e-12, atol=1e-12)
+        self.assertEqual(infoSel['attribute_names'], ['Time', 'GenPwr'])
+        # Empty range
+        df = FASTOutputFile(OutbFile, tRange=[100, 200]).toDataFrame()
+        self.assertEqual(len(df), 0)
+
+    def test_float32(self):
+        df = FASTOutputFile(OutbFile, dtype='float32').toDataFrame()
+        self.assertTrue(all(df.dtypes==np.float32))
+        np.testing.assert_allclose(df.values, self.dfRef.values, rtol=1e-6, atol=1e-6*np.abs(self.dfRef.values).max())
+
+
+
+class TestFASTOutputFileAscii(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpDir, 'out.out')
+        F = FASTOutputFile(OutbFile)
+        names, units = F.info['attribute_names'], F.info['attribute_units']
+        self.data = F.data
+        with open(self.filename, 'w') as f:
+            f.write('Predictions were generated on 01-Jan-2020\nDescription\n\n')
+            f.write('\t'.join(names)+'\n')
+            f.write('\t'.join(['('+u+')' for u in units])+'\n')
+            for row in self.data:
+                f.write('\t'.join(['{:10.4f}'.format(row[0])]+['{:10.3E}'.format(x) for x in row[1:]])+'\n')
+            f.write('This output file was closed on 01-Jan-2020\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_full(self):
+        F = FASTOutputFile(self.filename)
+        df = F.toDataFrame()
+        self.assertEqual(F.data.shape, self.data.shape)
+        self.assertEqual(list(df.columns), list(FASTOutputFile(OutbFile).toDataFrame().columns))
+        np.testing.assert_allclose(F.data, self.data, rtol=1e-3, atol=1e-3)
+
+    def test_channels_dtype(self):
+        dfRef = FASTOutputFile(self.filename).toDataFrame()
+        df = FASTOutputFile(self.filename, channels=['GenPwr_[kW]', 'rotspeed']).toDataFrame()
+        self.assertEqual(list(df.columns), ['Time_[s]', 'GenPwr_[kW]', 'RotSpeed_[rpm]'])
+        np.testing.assert_array_equal(df.values, dfRef[df.columns].values)
+        df = FASTOutputFile(self.filename, channels=['GenPwr'], tRange=[2, 5.05], dtype='float32').toDataFrame()
+        b = np.logical_and(dfRef['Time_[s]']>=2, dfRef['Time_[s]']<=5.05)
+        self.assertTrue(all(df.dtypes==np.float32))
+        np.testing.assert_allclose(df.values, dfRef[b][['Time_[s]','GenPwr_[kW]']].values, rtol=1e-6)
+
+    def test_channels_order(self):
+        # Channels not in file order, with the numpy and pandas parsers
+        dfRef = FASTOutputFile(self.filename).toDataFrame()
+        channels = ['GenPwr_[kW]', 'Azimuth_[deg]', 'Wind1VelX_[m/s]']
+        self.assertTrue(list(dfRef.columns).index(channels[0]) > list(dfRef.columns).index(channels[1]))
+        for bLoadtxt in [True, False]:
+            with mock.patch.object(fo, '_NUMPY_C_LOADTXT', bLoadtxt):
+                df = FASTOutputFile(self.filename, channels=channels).toDataFrame()
+                dfAll = FASTOutputFile(self.filename).toDataFrame()
+            self.assertEqual(list(df.columns), ['Time_[s]']+channels)
+            np.testing.assert_array_equal(df.values, dfRef[['Time_[s]']+channels].values)
+            np.testing.assert_array_equal(dfAll.values, dfRef.values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from welib.weio.mannbox_file import MannBoxFile
+
+
+class TestMannBoxFile(unittest.TestCase):
+
+    def setUp(self):
+        # Raw box, z is the fastest index, then y (from ly/2 to -ly/2), then x
+        self.tmpDir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpDir, 'u.bin')
+        self.N = (10, 4, 6)
+        np.random.seed(0)
+        self.raw = np.random.randn(*self.N).astype('<f4')
+        self.raw.tofile(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_read(self):
+        mb = MannBoxFile(self.filename, N=self.N)
+        self.assertEqual(mb['field'].shape, self.N)
+        # y axis flipped
+        np.testing.assert_array_equal(mb['field'], self.raw[:,::-1,:])
+        np.testing.assert_array_equal(mb['field'][:,0,:], self.raw[:,-1,:])
+        with self.assertRaises(Exception):
+            MannBoxFile(self.filename, N=(11,4,6))
+
+    def test_memmap_ixRange(self):
+        mb0 = MannBoxFile(self.filename, N=self.N)
+        mb = MannBoxFile(self.filename, N=self.N, memmap=True)
+        np.testing.assert_array_equal(mb['field'], mb0['field'])
+        for ixRange in [[2,5], [7,None], [8,20]]:
+            ix = slice(*ixRange)
+            for memmap in [False, True]:
+                mb = MannBoxFile(self.filename, N=self.N, memmap=memmap, ixRange=ixRange)
+                np.testing.assert_array_equal(mb['field'], mb0['field'][ix])
+        # Copy-on-write: the file is not modified
+        mb = MannBoxFile(self.filename, N=self.N, memmap=True)
+        mb['field'][0,0,0] = 1000
+        np.testing.assert_array_equal(np.fromfile(self.filename, dtype='<f4').reshape(self.N), self.raw)
+
+    def test_write(self):
+        mb = MannBoxFile(self.filename, N=self.N)
+        for chunkSize in [1, 3, 256]:
+            out = os.path.join(self.tmpDir, 'u_out.bin')
+            mb.write(out, chunkSize=chunkSize)
+            with open(self.filename, 'rb') as f1, open(out, 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read())
+        # Write a memory-mapped box and a float64 field
+        mb = MannBoxFile(self.filename, N=self.N, memmap=True)
+        mb.write(out, chunkSize=4)
+        np.testing.assert_array_equal(MannBoxFile(out, N=self.N)['field'], mb['field'])
+        mb = MannBoxFile()
+        mb['field'] = self.raw[:,::-1,:].astype(np.float64)
+        mb.write(out, chunkSize=3)
+        np.testing.assert_array_equal(np.fromfile(out, dtype='<f4').reshape(self.N), self.raw)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from welib.weio.turbsim_file import TurbSimFile, TurbSimField
+
+
+class TestTurbSimFile(unittest.TestCase):
+
+    def setUp(self):
+        # Small generated box, with tower points
+        self.tmpDir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpDir, 'Turb.bts')
+        nt, ny, nz, nTwr = 20, 4, 5, 3
+        np.random.seed(0)
+        ts = TurbSimFile()
+        ts['u']    = 8 + np.random.randn(3, nt, ny, nz)
+        ts['u'][1:] -= 8
+        ts['uTwr'] = np.random.randn(3, nt, nTwr)
+        ts['y']    = np.linspace(-20, 20, ny)
+        ts['z']    = np.linspace(60, 100, nz)
+        ts['t']    = np.arange(nt)*0.05
+        ts.write(self.filename)
+        self.uIn    = ts['u']
+        self.uTwrIn = ts['uTwr']
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def test_default(self):
+        ts = TurbSimFile(self.filename)
+        self.assertEqual(ts['u'].shape, self.uIn.shape)
+        self.assertEqual(ts['u'].dtype, np.float64)
+        # Int16 quantization of the written field
+        np.testing.assert_allclose(ts['u'], self.uIn, atol=1e-3)
+        np.testing.assert_allclose(ts['uTwr'], self.uTwrIn, atol=1e-3)
+
+    def test_memmap(self):
+        ts0 = TurbSimFile(self.filename)
+        ts  = TurbSimFile(self.filename, memmap=True)
+        self.assertTrue(isinstance(ts['u'], TurbSimField))
+        self.assertEqual(ts['u'].shape, ts0['u'].shape)
+        np.testing.assert_array_equal(np.asarray(ts['u']), ts0['u'])
+        np.testing.assert_array_equal(np.asarray(ts['uTwr']), ts0['uTwr'])
+        np.testing.assert_array_equal(ts['u'][:, 5:10, 1], ts0['u'][:, 5:10, 1])
+        np.testing.assert_array_equal(ts['u'][0, 3], ts0['u'][0, 3])
+        np.testing.assert_array_equal(ts['y'], ts0['y'])
+        np.testing.assert_array_equal(ts['z'], ts0['z'])
+
+    def test_float32(self):
+        ts0 = TurbSimFile(self.filename)
+        for memmap in [False, True]:
+            ts = TurbSimFile(self.filename, memmap=memmap, dtype=np.float32)
+            u = np.asarray(ts['u'])
+            self.assertEqual(u.dtype, np.float32)
+            np.testing.assert_allclose(u, ts0['u'], rtol=1e-6, atol=1e-6)
+            np.testing.assert_allclose(np.asarray(ts['uTwr']), ts0['uTwr'], rtol=1e-6, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,6 +36,10 @@ class TurbSimFile(File):
         print(ts.keys())
         print(ts['u'].shape)  
 
+        # Memory-mapped file, only the time steps accessed are read and scaled
+        ts = TurbSimFile('Turb.bts', memmap=True, dtype=np.float32)
+        u = ts['u'][:, 100:200]  # (3 x 100 x ny x nz) array
+
 
     """
 
@@ -52,10 +56,15 @@ class TurbSimFile(File):
         if filename:
             self.read(filename, **kwargs)
 
-    def read(self, filename=None, header_only=False):
+    def read(self, filename=None, header_only=False, memmap=False, dtype=np.float64):
         """ read BTS file, with field: 
                      u    (3 x nt x ny x nz)
                      uTwr (3 x nt x nTwr)
+        INPUTS:
+         - header_only: if True, only read the header (no field)
+         - memmap: if True, the file is memory-mapped and 'u' and 'uTwr' are TurbSimField objects,
+                   which are scaled lazily when indexed (e.g. ts['u'][:, it0:it1])
+         - dtype: type of the scaled field (e.g. np.float32 to reduce memory)
         """
         if filename:
             self.filename = filename
@@ -76,19 +85,26 @@ class TurbSimFile(File):
             info = (f.read(nChar)).decode()
             # Reading turbulence field
             if not header_only: 
-                u    = np.zeros((3,nt,ny,nz))
-                uTwr = np.zeros((3,nt,nTwr))
-                # For loop on time (acts as buffer reading, and only possible way when nTwr>0)
-                for it in range(nt):
-                    Buffer = np.frombuffer(f.read(2*3*ny*nz), dtype=np.int16).astype(np.float32).reshape([3, ny, nz], order='F')
-                    u[:,it,:,:]=Buffer
-                    Buffer = np.frombuffer(f.read(2*3*nTwr), dtype=np.int16).astype(np.float32).reshape([3, nTwr], order='F')
-                    uTwr[:,it,:]=Buffer
-                u -= off[:, None, None, None]
-                u /= scl[:, None, None, None]
+                # Time records are interleaved grid and tower data, component being the fastest index
+                rec = [('u', '<i2', (nz, ny, 3))]
+                if nTwr>0:
+                    rec += [('uTwr', '<i2', (nTwr, 3))]
+                rec = np.dtype(rec)
+                if memmap:
+                    raw = np.memmap(self.filename, dtype=rec, mode='r', offset=f.tell(), shape=(nt,))
+                else:
+                    raw = np.fromfile(f, dtype=rec, count=nt)
+                    if len(raw)<nt:
+                        raise Exception('Unexpected end of file, expected {} time steps, read {}'.format(nt, len(raw)))
+                u = TurbSimField(raw['u'].transpose(3,0,2,1), scl, off, dtype=dtype)
+                if nTwr>0:
+                    uTwr = TurbSimField(raw['uTwr'].transpose(2,0,1), scl, off, dtype=dtype)
+                else:
+                    uTwr = np.zeros((3,nt,0), dtype=dtype)
+                if not memmap:
+                    u    = u[...]
+                    uTwr = uTwr[...]
                 self['u']    = u
-                uTwr -= off[:, None, None]
-                uTwr /= scl[:, None, None]
                 self['uTwr'] = uTwr
         self['info'] = info
         self['ID']   = ID
@@ -196,7 +212,7 @@ class TurbSimFile(File):
     def makePeriodic(self):
         """ Make the box periodic by mirroring it """
         nDim, nt0, ny, nz = self['u'].shape
-        u = self['u'].copy()
+        u = np.array(self['u'])
         del self['u']
 
         nt = 2*len(self['t'])-2
@@ -207,7 +223,7 @@ class TurbSimFile(File):
         self['t'] = np.arange(nt)*dt
         if 'uTwr' in self.keys():
             _, _, nTwr = self['uTwr'].shape
-            uTwr = self['uTwr'].copy()
+            uTwr = np.array(self['uTwr'])
             del self['uTwr']
             # empty tower for now
             self['uTwr'] = np.zeros((nDim,nt,nTwr))
@@ -299,5 +315,53 @@ class TurbSimFile(File):
         #    pass
         return dfs
 
+class TurbSimField():
+    """ 
+    Read-only array-like view of an int16 TurbSim field (e.g. a memory-mapped file), with shape (3 x nt x ...).
+    The scaling of each component is applied when the field is indexed, such that
+    only the requested part of the field is read and converted:
+        u = field[0, it0:it1]    # numpy array of the u-component for some time steps
+        u = np.asarray(field)    # full field
+    """
+    def __init__(self, raw, scl, off, dtype=np.float64):
+        self.raw   = raw
+        self.dtype = np.dtype(dtype)
+        shp = (3,)+(1,)*(raw.ndim-1)
+        self._scl = np.asarray(scl, dtype=self.dtype).reshape(shp)
+        self._off = np.asarray(off, dtype=self.dtype).reshape(shp)
+
+    @property
+    def shape(self):
+        return self.raw.shape
+
+    @property
+    def ndim(self):
+        return self.raw.ndim
+
+    @property
+    def size(self):
+        return self.raw.size
+
+    def __len__(self):
+        return self.raw.shape[0]
+
+    def __getitem__(self, key):
+        u   = np.asarray(self.raw[key], dtype=self.dtype)
+        scl = np.broadcast_to(self._scl, self.raw.shape)[key]
+        off = np.broadcast_to(self._off, self.raw.shape)[key]
+        u -= off
+        u /= scl
+        return u
+
+    def __array__(self, dtype=None, copy=None):
+        u = self[...]
+        if dtype is not None:
+            u = u.astype(dtype, copy=False)
+        return u
+
+    def __repr__(self):
+        return '<{} object> shape: {}, dtype: {}'.format(type(self).__name__, self.shape, self.dtype)
+
+
 if __name__=='__main__':
     ts = TurbSimFile('../_tests/TurbSim.bts')